@@ -23,6 +23,94 @@ ARGS = [
         "arg_help": "Molecule results directory "
         "(works for --generate-compatibility-chart only)",
     },
+    {
+        "arg_name": "roles-path",
+        "arg_help": "Generates the compatibility chart of every role under a "
+        "roles path (colon separated), i.e. every dir with a molecule results "
+        "dir. Roles are charted in parallel, --jobs defaults to the number of "
+        "CPUs (works for --generate-compatibility-chart only)",
+    },
+    {
+        "arg_name": "aggregate-file",
+        "arg_help": "Also writes a role x OS compatibility matrix of all the "
+        "roles to this JSON file, in a compact columnar format (works for "
+        "--roles-path only)",
+    },
+    {
+        "arg_name": "tail-first",
+        "arg_help": "Reads molecule test files starting from the end, which is "
+        "faster for huge logs (works for --generate-compatibility-chart only)",
+        "arg_action": "store_true",
+    },
+    {
+        "arg_name": "strip-ansi",
+        "arg_help": "Strips ANSI escape sequences (colors) from molecule test "
+        "files (works for --generate-compatibility-chart only)",
+        "arg_action": "store_true",
+    },
+    {
+        "arg_name": "jobs",
+        "arg_help": "Number of processes used to parse molecule test files, "
+        "defaults to 1 (the number of CPUs with --roles-path). Works for "
+        "--generate-compatibility-chart and --compact-molecule-results only",
+    },
+    {
+        "arg_name": "newest-first",
+        "arg_help": "Reads molecule test files newest first and stops once "
+        "every OS in the current chart or in the test files is covered (works "
+        "for --generate-compatibility-chart only)",
+        "arg_action": "store_true",
+    },
+    {
+        "arg_name": "watch",
+        "arg_help": "Keeps running and updates the compatibility chart whenever "
+        "a new molecule test file lands in the results directory (works for "
+        "--generate-compatibility-chart only)",
+        "arg_action": "store_true",
+    },
+    {
+        "arg_name": "from-stdin",
+        "arg_help": "Reads the output of a running molecule test from stdin, "
+        "e.g. molecule test 2>&1 | ansibler --generate-compatibility-chart "
+        "--from-stdin (works for --generate-compatibility-chart only, can't be "
+        "combined with --history, --tail-first or --newest-first)",
+        "arg_action": "store_true",
+    },
+    {
+        "arg_name": "history",
+        "arg_help": "Records every parsed molecule test in the compatibility "
+        "history and builds the chart from it, so test files are only parsed "
+        "once (works for --generate-compatibility-chart only)",
+        "arg_action": "store_true",
+    },
+    {
+        "arg_name": "history-file",
+        "arg_help": "Overrides the compatibility history database used by "
+        "default (~/.local/megabytelabs/ansibler/compatibility_history.sqlite)",
+    },
+    {
+        "arg_name": "query-history",
+        "arg_help": "Prints when an OS (e.g. Debian-11) was last tested and "
+        "last passed, for every role in the compatibility history",
+    },
+    {
+        "arg_name": "compact-molecule-results",
+        "arg_help": "Archives (gzipped, under archive/) the molecule test files "
+        "that no longer contribute to the compatibility chart, keeping the "
+        "newest one of every OS and the ones in the --keep-days window",
+        "arg_action": "store_true",
+    },
+    {
+        "arg_name": "keep-days",
+        "arg_help": "Molecule test files tested in the last N days are kept by "
+        "--compact-molecule-results (defaults to 30)",
+    },
+    {
+        "arg_name": "delete-compacted",
+        "arg_help": "Deletes the molecule test files compacted by "
+        "--compact-molecule-results instead of archiving them",
+        "arg_action": "store_true",
+    },
     {
         "arg_name": "json-file",
         "arg_help": "Overrides the JSON file used by default (ansibler.json)",
@@ -41,6 +129,28 @@ ARGS = [
         "arg_help": "Variables used to populate the repo status template. It "
         "must be a valid JSON file path",
     },
+    {
+        "arg_name": "galaxy-concurrency",
+        "arg_help": "Number of Ansible Galaxy requests made at once (defaults "
+        "to 8, works for --role-dependencies only)",
+    },
+    {
+        "arg_name": "galaxy-timeout",
+        "arg_help": "Seconds to wait for Ansible Galaxy to respond (defaults to "
+        "10, works for --role-dependencies only)",
+    },
+    {
+        "arg_name": "galaxy-cache-ttl",
+        "arg_help": "Seconds Ansible Galaxy responses are cached for, after "
+        "which they're revalidated (defaults to a day, roles that weren't found "
+        "are asked for again after an hour; works for --role-dependencies only)",
+    },
+    {
+        "arg_name": "galaxy-snapshot",
+        "arg_help": "Resolves dependencies from a local snapshot of Ansible "
+        "Galaxy metadata (an NDJSON file, or a dir of them, with a role per "
+        "line) before asking Ansible Galaxy (works for --role-dependencies only)",
+    },
     {
         "arg_name": "clear-cache",
         "arg_help": "Clears ansibler cache",
@@ -49,6 +159,12 @@ ARGS = [
     {"arg_name": "version", "arg_help": "project version"},
 ]
 
+# Options that have no effect in a mode are rejected, instead of being
+# silently ignored
+INCOMPATIBLE_ARGS = {
+    "from-stdin": ["history", "tail-first", "newest-first"],
+}
+
 
 def get_user_arguments() -> Dict[str, str]:
     """
@@ -135,4 +251,29 @@ def read_parser_args(parser) -> Dict[str, str]:
     if "version" in user_args.keys() and len(user_args) > 1:
         raise ArgumentError('Invalid option: "version"')
 
+    validate_arg_combinations(user_args)
+
     return user_args
+
+
+def validate_arg_combinations(user_args: Dict[str, str]) -> None:
+    """
+    Makes sure no option is combined with another one it has no effect with
+    (see INCOMPATIBLE_ARGS)
+
+    Args:
+        user_args (Dict[str, str]): user arguments ({ name: value, ... })
+
+    Raises:
+        ArgumentError: raised when incompatible options are combined
+    """
+    for arg_name, incompatible_args in INCOMPATIBLE_ARGS.items():
+        if arg_name not in user_args:
+            continue
+
+        for incompatible_arg in incompatible_args:
+            if incompatible_arg in user_args:
+                raise ArgumentError(
+                    None,
+                    f"--{incompatible_arg} can't be combined with --{arg_name}",
+                )
@@ -0,0 +1,107 @@
+from typing import Any, Dict, Iterable, List, Tuple
+from ansibler.utils.files import write_json_file_if_changed
+
+
+# One entry per (role, OS) that was tested, roles and OSes are stored once
+# and referenced by index
+AGGREGATE_COLUMNS = ("role", "os", "success", "idempotent", "tested_on")
+
+
+def build_aggregate_matrix(
+    charts: Iterable[Tuple[str, Dict[str, Dict[str, Any]]]]
+) -> Dict[str, Any]:
+    """
+    Builds a role x OS compatibility matrix for many roles, in a single pass
+    over their play recap summaries (see get_play_recap_summary). The matrix
+    is columnar:
+
+        {
+            "roles": ["system/homebrew", "system/snapd"],
+            "oses": [["Debian", "10"], ["Ubuntu", "20.04 (Focal)"]],
+            "role": [0, 1, 1],
+            "os": [0, 0, 1],
+            "success": [true, true, false],
+            "idempotent": [true, true, null],
+            "tested_on": ["2021-08-07", "2021-08-07", "2021-08-07"]
+        }
+
+    Args:
+        charts (Iterable[Tuple[str, Dict[str, Dict[str, Any]]]]): role ids
+        (unique, see get_role_ids) and their play recap summaries per OS
+
+    Returns:
+        Dict[str, Any]: columnar matrix, roles and OSes sorted
+    """
+    role_indexes, os_indexes = {}, {}
+    columns = {column: [] for column in AGGREGATE_COLUMNS}
+
+    for role, temp_compat in charts:
+        role_index = role_indexes.setdefault(role, len(role_indexes))
+
+        for data in temp_compat.values():
+            os_key = (data["os_family"], data["os_version"])
+            columns["role"].append(role_index)
+            columns["os"].append(os_indexes.setdefault(os_key, len(os_indexes)))
+            columns["success"].append(data["success"])
+            columns["idempotent"].append(data["idempotent"])
+            columns["tested_on"].append(data["added"].date().isoformat())
+
+    # Roles and OSes are indexed as they show up, map them to their sorted
+    # positions
+    roles = sorted(role_indexes)
+    columns["role"] = remap_indexes(columns["role"], role_indexes, roles)
+    oses = sorted(os_indexes, key=lambda os_key: (os_key[0], str(os_key[1])))
+    columns["os"] = remap_indexes(columns["os"], os_indexes, oses)
+
+    return {"roles": roles, "oses": [list(os_key) for os_key in oses], **columns}
+
+
+def remap_indexes(
+    column: List[int], indexes: Dict[Any, int], keys: List[Any]
+) -> List[int]:
+    """
+    Maps a column of indexes (in the order keys showed up) to the positions of
+    the keys once sorted.
+
+    Args:
+        column (List[int]): indexes
+        indexes (Dict[Any, int]): index per key
+        keys (List[Any]): sorted keys
+
+    Returns:
+        List[int]: positions in keys
+    """
+    positions = [0] * len(keys)
+    for position, key in enumerate(keys):
+        positions[indexes[key]] = position
+
+    return [positions[index] for index in column]
+
+
+def write_aggregate_matrix(
+    charts: Iterable[Tuple[str, Dict[str, Dict[str, Any]]]],
+    aggregate_file: str,
+) -> Dict[str, Any]:
+    """
+    Writes the role x OS compatibility matrix of many roles (see
+    build_aggregate_matrix) to a compact JSON file, unless it didn't change.
+
+    Args:
+        charts (Iterable[Tuple[str, Dict[str, Dict[str, Any]]]]): role ids
+        and their play recap summaries per OS
+        aggregate_file (str): output JSON file
+
+    Returns:
+        Dict[str, Any]: columnar matrix
+    """
+    matrix = build_aggregate_matrix(charts)
+    if write_json_file_if_changed(aggregate_file, matrix, compact=True):
+        print(
+            f"Wrote {len(matrix['roles'])} role(s) x {len(matrix['oses'])} "
+            f"OS(es) to {aggregate_file}"
+        )
+    else:
+        print(f"{aggregate_file} is up to date")
+
+    return matrix
+
@@ -0,0 +1,314 @@
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from ansibler.compatibility.aggregate import write_aggregate_matrix
+from ansibler.compatibility.cache import (
+    read_molecule_results_cache,
+    write_molecule_results_cache,
+)
+from ansibler.compatibility.chart import (
+    MOLECULE_RESULTS_DIR,
+    read_compatibility_chart,
+    read_compatibility_history,
+    read_json_data,
+    write_compatibility_chart,
+)
+from ansibler.compatibility.history import get_history_role
+from ansibler.exceptions.ansibler import BaseAnsiblerException, MoleculeTestsNotFound
+from ansibler.utils.files import check_folder_exists, report_written_files
+
+
+# Dirs that never contain roles, skipped when looking for them
+SKIPPED_DIRS = {"node_modules"}
+
+
+def generate_compatibility_charts(
+    roles_path: str,
+    molecule_results_dir: Optional[str] = MOLECULE_RESULTS_DIR,
+    json_file: Optional[str] = "./ansibler.json",
+    tail_first: Optional[bool] = False,
+    strip_ansi: Optional[bool] = False,
+    use_cache: Optional[bool] = True,
+    jobs: Optional[int] = 1,
+    newest_first: Optional[bool] = False,
+    history_file: Optional[str] = None,
+    aggregate_file: Optional[str] = None,
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Generates the compatibility chart of every role under a roles path (i.e.
+    every dir with a molecule results dir), in a single process pool. The
+    parsed molecule tests cache is read and written once for all roles.
+    Optionally, a role x OS matrix of all the roles is written too.
+
+    Args:
+        roles_path (str): roles path (several can be separated with colons,
+        like in ansible.cfg)
+        molecule_results_dir (str, optional): molecule results dir, relative
+        to each role
+        json_file (str, optional): output JSON file, relative to each role
+        tail_first (bool, optional): read test files backwards first
+        strip_ansi (bool, optional): strip ANSI escape sequences
+        use_cache (bool, optional): use the parsed molecule tests cache
+        jobs (int, optional): number of roles charted at once. Defaults to 1.
+        newest_first (bool, optional): read test files newest first
+        history_file (str, optional): record tests in (and build the charts
+        from) this compatibility history. Defaults to None (no history).
+        aggregate_file (str, optional): write the role x OS matrix of all the
+        roles to this JSON file (see build_aggregate_matrix). Defaults to None.
+
+    Raises:
+        MoleculeTestsNotFound: raised when no role has a molecule results dir
+
+    Returns:
+        Dict[str, Dict[str, Dict[str, Any]]]: play recap summaries per OS, per
+        role dir
+    """
+    role_dirs = find_role_dirs(roles_path, molecule_results_dir)
+    if not role_dirs:
+        raise MoleculeTestsNotFound(
+            f"Couldn't find molecule results dirs under {roles_path}"
+        )
+
+    role_ids = get_role_ids(roles_path, role_dirs)
+    cache = read_molecule_results_cache() if use_cache else {}
+    options = {
+        "molecule_results_dir": molecule_results_dir,
+        "json_file": json_file,
+        "tail_first": tail_first,
+        "strip_ansi": strip_ansi,
+        "use_cache": use_cache,
+        "newest_first": newest_first,
+        "history_file": history_file,
+    }
+
+    if jobs > 1 and len(role_dirs) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            charts, written, cache_changed = collect_role_compatibility_charts(
+                role_ids, cache, options, executor=executor
+            )
+    else:
+        charts, written, cache_changed = collect_role_compatibility_charts(
+            role_ids, cache, options
+        )
+
+    if use_cache and cache_changed:
+        write_molecule_results_cache(cache)
+
+    if aggregate_file is not None:
+        write_aggregate_matrix(
+            [(role_ids[role_dir], chart) for role_dir, chart in charts.items()],
+            aggregate_file,
+        )
+
+    print(f"Generated {len(charts)} compatibility chart(s)")
+    report_written_files(written, len(charts))
+    print("Done")
+    return charts
+
+
+def collect_role_compatibility_charts(
+    role_ids: Dict[str, str],
+    cache: Dict[str, Any],
+    options: Dict[str, Any],
+    executor: Optional[ProcessPoolExecutor] = None,
+) -> Tuple[Dict[str, Dict[str, Dict[str, Any]]], int, bool]:
+    """
+    Generates the compatibility chart of every role (see
+    generate_role_compatibility_chart), in worker processes when an executor
+    is given. Each role gets its own slice of the cache, and the updated
+    slices are merged back into cache.
+
+    Args:
+        role_ids (Dict[str, str]): role id per role dir (see get_role_ids)
+        cache (Dict[str, Any]): cached tests (updated in place)
+        options (Dict[str, Any]): generate_role_compatibility_chart options
+        executor (ProcessPoolExecutor, optional): process pool. Defaults to
+        None (charted in this process).
+
+    Returns:
+        Tuple[Dict[str, Dict[str, Dict[str, Any]]], int, bool]: play recap
+        summaries per OS per role dir, the number of JSON files written, and
+        whether the cache changed
+    """
+    pending_charts = {}
+    if executor is not None:
+        pending_charts = {
+            role_dir: executor.submit(
+                generate_role_compatibility_chart,
+                role_dir,
+                get_role_cache(cache, role_dir),
+                role_id=role_id,
+                **options,
+            )
+            for role_dir, role_id in role_ids.items()
+        }
+
+    charts, written, cache_changed = {}, 0, False
+    for role_dir, role_id in role_ids.items():
+        try:
+            if role_dir in pending_charts:
+                temp_compat, role_cache, changed = pending_charts[role_dir].result()
+            else:
+                temp_compat, role_cache, changed = generate_role_compatibility_chart(
+                    role_dir,
+                    get_role_cache(cache, role_dir),
+                    role_id=role_id,
+                    **options,
+                )
+        except (OSError, sqlite3.Error, BaseAnsiblerException) as e:
+            print(f"Couldn't generate compatibility chart for {role_dir}: {e}")
+            continue
+
+        # Only roles with new or changed test files update their slice
+        if role_cache != get_role_cache(cache, role_dir):
+            cache.update(role_cache)
+            cache_changed = True
+
+        charts[role_dir] = temp_compat
+        written += changed
+
+    return charts, written, cache_changed
+
+
+def generate_role_compatibility_chart(
+    role_dir: str,
+    cache: Dict[str, Any],
+    molecule_results_dir: Optional[str] = MOLECULE_RESULTS_DIR,
+    json_file: Optional[str] = "./ansibler.json",
+    tail_first: Optional[bool] = False,
+    strip_ansi: Optional[bool] = False,
+    use_cache: Optional[bool] = True,
+    newest_first: Optional[bool] = False,
+    history_file: Optional[str] = None,
+    role_id: Optional[str] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any], bool]:
+    """
+    Generates the compatibility chart of a single role (see
+    generate_compatibility_charts).
+
+    Args:
+        role_dir (str): role dir
+        cache (Dict[str, Any]): cached tests of the role
+        molecule_results_dir (str, optional): molecule results dir, relative
+        to the role
+        json_file (str, optional): output JSON file, relative to the role
+        tail_first (bool, optional): read test files backwards first
+        strip_ansi (bool, optional): strip ANSI escape sequences
+        use_cache (bool, optional): use the parsed molecule tests cache
+        newest_first (bool, optional): read test files newest first
+        history_file (str, optional): compatibility history path
+        role_id (str, optional): role the tests are recorded under in the
+        history (see get_role_ids). Defaults to None (the role dir name).
+
+    Returns:
+        Tuple[Dict[str, Dict[str, Any]], Dict[str, Any], bool]: play recap
+        summaries per OS, the updated cached tests of the role, and whether
+        the role's JSON file was written
+    """
+    results_dir = os.path.join(role_dir, molecule_results_dir)
+    role_json_file = os.path.join(role_dir, json_file)
+    data = read_json_data(role_json_file)
+
+    if history_file is not None:
+        temp_compat = read_compatibility_history(
+            results_dir,
+            role_id or get_history_role(role_json_file),
+            history_file,
+            tail_first=tail_first,
+            strip_ansi=strip_ansi,
+            use_cache=use_cache,
+            cache=cache,
+        )
+    else:
+        temp_compat = read_compatibility_chart(
+            results_dir,
+            data,
+            tail_first=tail_first,
+            strip_ansi=strip_ansi,
+            use_cache=use_cache,
+            newest_first=newest_first,
+            cache=cache,
+        )
+
+    written = write_compatibility_chart(temp_compat, data, role_json_file)
+
+    return temp_compat, cache, written
+
+
+def find_role_dirs(roles_path: str, molecule_results_dir: str) -> List[str]:
+    """
+    Finds the roles under a roles path that have a molecule results dir. Roles
+    can be nested (e.g. roles/system/snapd), but not inside another role.
+
+    Args:
+        roles_path (str): roles path (several can be separated with colons)
+        molecule_results_dir (str): molecule results dir, relative to each
+        role
+
+    Returns:
+        List[str]: role dirs (absolute paths), sorted
+    """
+    role_dirs = []
+
+    for path in roles_path.split(os.pathsep):
+        if not check_folder_exists(path):
+            continue
+
+        for root, dirs, _ in os.walk(os.path.abspath(path)):
+            if check_folder_exists(os.path.join(root, molecule_results_dir)):
+                role_dirs.append(root)
+                dirs[:] = []
+                continue
+
+            dirs[:] = [
+                d for d in dirs if not d.startswith(".") and d not in SKIPPED_DIRS
+            ]
+
+    return sorted(set(role_dirs))
+
+
+def get_role_ids(roles_path: str, role_dirs: List[str]) -> Dict[str, str]:
+    """
+    Names roles by their path relative to the roles path (e.g. system/snapd),
+    so roles with the same dir name under different parents can be told
+    apart. With several roles paths, roles are named relative to the dir they
+    have in common.
+
+    Args:
+        roles_path (str): roles path (several can be separated with colons)
+        role_dirs (List[str]): role dirs (absolute paths, see find_role_dirs)
+
+    Returns:
+        Dict[str, str]: role id per role dir
+    """
+    paths = [
+        os.path.abspath(path)
+        for path in roles_path.split(os.pathsep)
+        if check_folder_exists(path)
+    ]
+    base_path = os.path.commonpath(paths) if paths else os.sep
+
+    return {
+        role_dir: os.path.relpath(role_dir, base_path).replace(os.sep, "/")
+        for role_dir in role_dirs
+    }
+
+
+def get_role_cache(cache: Dict[str, Any], role_dir: str) -> Dict[str, Any]:
+    """
+    Returns the cached tests of a role.
+
+    Args:
+        cache (Dict[str, Any]): cached tests
+        role_dir (str): role dir (absolute path)
+
+    Returns:
+        Dict[str, Any]: cached tests of the test files under role_dir
+    """
+    prefix = os.path.join(role_dir, "")
+    return {
+        test_file: entry
+        for test_file, entry in cache.items()
+        if test_file.startswith(prefix)
+    }
@@ -0,0 +1,150 @@
+import json
+import os
+from json.decoder import JSONDecodeError
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from ansibler.molecule_test.parse import RecapRecord
+from ansibler.role_dependencies.cache import CACHE_MAP_DIR
+from ansibler.utils.files import create_folder_if_not_exists, write_json_file_if_changed
+
+
+MOLECULE_CACHE_FILE = "molecule_results"
+# Bump whenever the parsed test structure changes
+MOLECULE_CACHE_VERSION = 3
+
+
+def read_molecule_results_cache() -> Dict[str, Any]:
+    """
+    Reads parsed molecule tests from cache.
+
+    Returns:
+        Dict[str, Any]: cached tests ({ test file path: entry, ... })
+    """
+    try:
+        with open(CACHE_MAP_DIR + MOLECULE_CACHE_FILE) as f:
+            cache = json.load(f)
+    except (FileNotFoundError, JSONDecodeError):
+        return {}
+
+    if not isinstance(cache, dict) or cache.get("version") != MOLECULE_CACHE_VERSION:
+        return {}
+
+    return cache.get("files", {})
+
+
+def write_molecule_results_cache(cache: Dict[str, Any]) -> None:
+    """
+    Writes parsed molecule tests to cache. Entries of test files that no longer
+    exist are dropped.
+
+    Args:
+        cache (Dict[str, Any]): cached tests ({ test file path: entry, ... })
+    """
+    create_folder_if_not_exists(CACHE_MAP_DIR)
+
+    files = {
+        test_file: entry
+        for test_file, entry in cache.items()
+        if os.path.isfile(test_file)
+    }
+
+    write_json_file_if_changed(
+        CACHE_MAP_DIR + MOLECULE_CACHE_FILE,
+        {"version": MOLECULE_CACHE_VERSION, "files": files},
+        compact=True,
+    )
+
+
+def get_cached_molecule_tests(
+    cache: Dict[str, Any], test_file: str, options: Optional[Dict[str, Any]] = None
+) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Returns the cached converge and idempotence tests of a test file, as long
+    as the file didn't change (same size and mtime) and was parsed with the
+    same options.
+
+    Args:
+        cache (Dict[str, Any]): cached tests
+        test_file (str): test file path
+        options (Dict[str, Any], optional): options used to parse the file.
+        Defaults to None (no options).
+
+    Returns:
+        Optional[Tuple[Dict[str, Any], Dict[str, Any]]]: converge and
+        idempotence tests, None when not cached
+    """
+    entry = cache.get(test_file)
+    if not entry:
+        return None
+
+    try:
+        stat = os.stat(test_file)
+    except OSError:
+        return None
+
+    if (
+        entry.get("size") != stat.st_size
+        or entry.get("mtime") != stat.st_mtime_ns
+        or entry.get("options") != (options or {})
+    ):
+        return None
+
+    return (
+        load_cached_test(entry.get("converge", {})),
+        load_cached_test(entry.get("idempotence", {})),
+    )
+
+
+def load_cached_test(test: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turns the play recap of a cached test back into records (they're cached as
+    JSON arrays).
+
+    Args:
+        test (Dict[str, Any]): cached converge or idempotence test
+
+    Returns:
+        Dict[str, Any]: converge or idempotence test
+    """
+    if not test.get("play_recap"):
+        return test
+
+    return {
+        **test,
+        "play_recap": [RecapRecord(*recap) for recap in test["play_recap"]],
+    }
+
+
+def cache_molecule_tests(
+    cache: Dict[str, Any],
+    test_file: str,
+    converge: Dict[str, Any],
+    idempotence: Dict[str, Any],
+    options: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Adds the converge and idempotence tests of a test file to the cache.
+
+    Args:
+        cache (Dict[str, Any]): cached tests
+        test_file (str): test file path
+        converge (Dict[str, Any]): converge test
+        idempotence (Dict[str, Any]): idempotence test
+        options (Dict[str, Any], optional): options used to parse the file.
+        Defaults to None (no options).
+    """
+    stat = os.stat(test_file)
+    cache[test_file] = {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "options": options or {},
+        "converge": converge,
+        "idempotence": idempotence,
+    }
+
+
+def clear_molecule_results_cache() -> None:
+    """
+    Clears parsed molecule tests cache
+    """
+    Path(CACHE_MAP_DIR + MOLECULE_CACHE_FILE).unlink(missing_ok=True)
@@ -1,94 +1,805 @@
 from json.decoder import JSONDecodeError
 import os
-from datetime import datetime
+import sys
+from datetime import date, datetime
 import re
 import json
 import traceback
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from ansibler.utils.files import (
     check_folder_exists,
-    create_folder_if_not_exists,
     list_files,
+    report_written_files,
+    write_json_file_if_changed,
 )
+from ansibler.utils.watch import WATCH_POLL_INTERVAL, watch_files
 from ansibler.exceptions.ansibler import MoleculeTestParseError, MoleculeTestsNotFound
-from ansibler.molecule_test.parse import parse_test
+from ansibler.compatibility.cache import (
+    cache_molecule_tests,
+    get_cached_molecule_tests,
+    read_molecule_results_cache,
+    write_molecule_results_cache,
+)
+from ansibler.compatibility.history import (
+    get_history_role,
+    list_unrecorded_test_files,
+    open_history,
+    read_latest_recaps,
+    record_test_file,
+)
+from ansibler.molecule_test.parse import RecapRecord, index_play_recap
+from ansibler.molecule_test.parse import strip_ansi as strip_ansi_stage
+from ansibler.molecule_test.read import (
+    parse_test_lines,
+    read_test_file,
+    read_test_hosts,
+)
 
 
 MOLECULE_RESULTS_DIR = "./molecule-results/"
+# Also matches compressed test files (e.g. 2021-08-07-default.txt.gz)
 FILTER_FILES_PATTERN = r"\d{4}-\d{2}-\d{2}-.*.txt"
 
 
 def generate_compatibility_chart(
     molecule_results_dir: Optional[str] = MOLECULE_RESULTS_DIR,
     json_file: Optional[str] = "./ansibler.json",
-) -> None:
+    tail_first: Optional[bool] = False,
+    strip_ansi: Optional[bool] = False,
+    use_cache: Optional[bool] = True,
+    jobs: Optional[int] = 1,
+    newest_first: Optional[bool] = False,
+    history_file: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
     # TODO: TESTS
     # Check molecule-results dir exists
     if not check_folder_exists(molecule_results_dir):
         raise MoleculeTestsNotFound("Couldn't find molecule results dir")
 
+    # Read output file
+    data = read_json_data(json_file)
+
+    if history_file is not None:
+        temp_compat = read_compatibility_history(
+            molecule_results_dir,
+            get_history_role(json_file),
+            history_file,
+            tail_first=tail_first,
+            strip_ansi=strip_ansi,
+            use_cache=use_cache,
+            jobs=jobs,
+        )
+    else:
+        temp_compat = read_compatibility_chart(
+            molecule_results_dir,
+            data,
+            tail_first=tail_first,
+            strip_ansi=strip_ansi,
+            use_cache=use_cache,
+            jobs=jobs,
+            newest_first=newest_first,
+        )
+
+    written = write_compatibility_chart(temp_compat, data, json_file)
+    report_written_files(int(written), 1)
+
+    print("Done")
+    return temp_compat
+
+
+def read_compatibility_chart(
+    molecule_results_dir: str,
+    data: Dict[str, Any],
+    tail_first: Optional[bool] = False,
+    strip_ansi: Optional[bool] = False,
+    use_cache: Optional[bool] = True,
+    jobs: Optional[int] = 1,
+    newest_first: Optional[bool] = False,
+    cache: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads the test files of the molecule results dir, and keeps the most
+    recent play recap summary of every OS.
+
+    Args:
+        molecule_results_dir (str): molecule results dir
+        data (Dict[str, Any]): output JSON data
+        tail_first (bool, optional): read test files backwards first
+        strip_ansi (bool, optional): strip ANSI escape sequences
+        use_cache (bool, optional): use the parsed molecule tests cache
+        jobs (int, optional): number of processes used to parse
+        newest_first (bool, optional): read test files newest first
+        cache (Dict[str, Any], optional): cached tests to use (and update)
+        instead of the cache file, which is then left untouched
+
+    Returns:
+        Dict[str, Dict[str, Any]]: play recap summaries per OS
+    """
     # Get list of molecule test files
-    test_files = list_files(molecule_results_dir, absolute_path=True)
-    test_files = [
-        (file_name, get_test_file_date(file_name))
-        for file_name, _ in test_files
-        if re.search(FILTER_FILES_PATTERN, file_name)
-    ]
+    test_files = list_test_files(molecule_results_dir)
 
-    # Prepare to build blueprint.compatibility array
-    # Start by adding headers
-    compat = [["OS Family", "OS Version", "Status", "Idempotent", "Tested On"]]
     temp_compat = {}
 
-    # Parse test files
-    for test_file, test_date in test_files:
-        try:
-            converge, idempotence = read_molecule_tests(test_file)
+    # Parsed tests are cached, so only new or changed test files are parsed
+    write_cache = use_cache and cache is None
+    if cache is None:
+        cache = read_molecule_results_cache() if use_cache else {}
+    cache_options = {"tail_first": tail_first, "strip_ansi": strip_ansi}
+
+    if newest_first:
+        expected_oses = get_compatibility_matrix_oses(
+            data.get("compatibility_matrix", [])
+        )
+        parsed_files = add_newest_tests_to_compat(
+            temp_compat, test_files, cache, cache_options, expected_oses, jobs=jobs
+        )
+    else:
+        tests, parsed_files = read_test_files(
+            [test_file for test_file, _ in test_files], cache, cache_options, jobs=jobs
+        )
+        for (_, test_date), test in zip(test_files, tests):
+            if test is not None:
+                add_test_to_compat(temp_compat, *test, test_date)
+
+    if write_cache and parsed_files:
+        write_molecule_results_cache(cache)
+
+    return temp_compat
+
+
+def read_compatibility_history(
+    molecule_results_dir: str,
+    role: str,
+    history_file: str,
+    tail_first: Optional[bool] = False,
+    strip_ansi: Optional[bool] = False,
+    use_cache: Optional[bool] = True,
+    jobs: Optional[int] = 1,
+    cache: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Records the test files of the molecule results dir that are not in the
+    compatibility history yet, then reads the most recent play recap summary
+    of every OS from the history. Test files that were recorded before are
+    neither parsed nor read from cache.
+
+    Args:
+        molecule_results_dir (str): molecule results dir
+        role (str): role name the tests are recorded under
+        history_file (str): compatibility history (SQLite database) path
+        tail_first (bool, optional): read test files backwards first
+        strip_ansi (bool, optional): strip ANSI escape sequences
+        use_cache (bool, optional): use the parsed molecule tests cache
+        jobs (int, optional): number of processes used to parse
+        cache (Dict[str, Any], optional): cached tests to use (and update)
+        instead of the cache file, which is then left untouched
+
+    Returns:
+        Dict[str, Dict[str, Any]]: play recap summaries per OS
+    """
+    conn = open_history(history_file)
+
+    try:
+        test_files = dict(list_test_files(molecule_results_dir))
+        new_files = list_unrecorded_test_files(conn, role, list(test_files))
+
+        write_cache = use_cache and cache is None
+        if cache is None:
+            cache = read_molecule_results_cache() if use_cache and new_files else {}
+        cache_options = {"tail_first": tail_first, "strip_ansi": strip_ansi}
+        tests, parsed_files = read_test_files(
+            new_files, cache, cache_options, jobs=jobs
+        )
+
+        # A single transaction, however many test files are recorded
+        with conn:
+            for test_file, test in zip(new_files, tests):
+                if test is not None:
+                    record_test_file(
+                        conn,
+                        role,
+                        test_file,
+                        test_files[test_file],
+                        get_play_recap_summaries(*test, test_files[test_file]),
+                    )
+
+        if write_cache and parsed_files:
+            write_molecule_results_cache(cache)
+
+        return read_latest_recaps(conn, role)
+    finally:
+        conn.close()
+
+
+def generate_compatibility_chart_from_stream(
+    stream: Optional[Iterable[bytes]] = None,
+    molecule_results_dir: Optional[str] = MOLECULE_RESULTS_DIR,
+    json_file: Optional[str] = "./ansibler.json",
+    strip_ansi: Optional[bool] = False,
+    use_cache: Optional[bool] = True,
+    jobs: Optional[int] = 1,
+    test_date: Optional[datetime] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Generates the compatibility chart from a molecule test that is still
+    running (e.g. molecule test 2>&1 | ansibler --from-stdin ...). The stream
+    is parsed as it's read, and the chart is written as soon as the
+    idempotence PLAY RECAP is over. Test files in the molecule results dir, if
+    any, are added to the chart too.
+
+    Args:
+        stream (Iterable[bytes], optional): molecule test output. Defaults to
+        stdin.
+        molecule_results_dir (str, optional): molecule results dir
+        json_file (str, optional): output JSON file
+        strip_ansi (bool, optional): strip ANSI escape sequences
+        use_cache (bool, optional): use the parsed molecule tests cache
+        jobs (int, optional): number of processes used to parse
+        test_date (datetime, optional): test date. Defaults to today.
+
+    Raises:
+        MoleculeTestParseError: raised when the converge PLAY RECAP wasn't found
+
+    Returns:
+        Dict[str, Dict[str, Any]]: play recap summaries per OS
+    """
+    if stream is None:
+        stream = sys.stdin.buffer
+
+    if test_date is None:
+        test_date = datetime.combine(date.today(), datetime.min.time())
+
+    # Read the results dir first, while molecule is still running
+    data = read_json_data(json_file)
+    temp_compat = {}
+    if check_folder_exists(molecule_results_dir):
+        temp_compat = read_compatibility_chart(
+            molecule_results_dir,
+            data,
+            strip_ansi=strip_ansi,
+            use_cache=use_cache,
+            jobs=jobs,
+        )
+
+    lines = (line.decode("utf-8", errors="replace") for line in stream)
+
+    try:
+        test = parse_test_lines(strip_ansi_stage(lines) if strip_ansi else lines)
+    except MoleculeTestParseError:
+        drain_stream(stream)
+        raise
+
+    add_test_to_compat(
+        temp_compat, test.get("converge", {}), test.get("idempotence", {}), test_date
+    )
+    written = write_compatibility_chart(temp_compat, data, json_file)
+    report_written_files(int(written), 1)
+    print("Done")
+
+    drain_stream(stream)
+    return temp_compat
+
+
+def drain_stream(stream: Iterable[bytes]) -> None:
+    """
+    Reads a stream until it ends, so the process writing to it (e.g. molecule)
+    doesn't block, or get killed by SIGPIPE, writing to a pipe nobody reads.
 
-            # Skip if converge is invalid
-            if not converge:
+    Args:
+        stream (Iterable[bytes]): stream to drain
+    """
+    for _ in stream:
+        pass
+
+
+def watch_compatibility_chart(
+    molecule_results_dir: Optional[str] = MOLECULE_RESULTS_DIR,
+    json_file: Optional[str] = "./ansibler.json",
+    tail_first: Optional[bool] = False,
+    strip_ansi: Optional[bool] = False,
+    use_cache: Optional[bool] = True,
+    jobs: Optional[int] = 1,
+    newest_first: Optional[bool] = False,
+    history_file: Optional[str] = None,
+    poll_interval: Optional[float] = WATCH_POLL_INTERVAL,
+) -> None:
+    """
+    Generates the compatibility chart, then watches the molecule results dir
+    and updates the chart whenever new test files land in it. Only the new
+    files are parsed, the rest of the chart is kept in memory (or read from
+    the compatibility history, when new files are recorded in it).
+
+    Args:
+        molecule_results_dir (str, optional): molecule results dir
+        json_file (str, optional): output JSON file
+        tail_first (bool, optional): read test files backwards first
+        strip_ansi (bool, optional): strip ANSI escape sequences
+        use_cache (bool, optional): use the parsed molecule tests cache
+        jobs (int, optional): number of processes used to parse
+        newest_first (bool, optional): read test files newest first (initial
+        chart only)
+        history_file (str, optional): record tests in (and build the chart
+        from) this compatibility history. Defaults to None (no history).
+        poll_interval (float, optional): seconds between polls (when inotify
+        isn't available)
+
+    Raises:
+        MoleculeTestsNotFound: raised when the molecule results dir is missing
+    """
+    if not check_folder_exists(molecule_results_dir):
+        raise MoleculeTestsNotFound("Couldn't find molecule results dir")
+
+    # Start watching before the initial chart, so no test file is missed
+    test_file_batches = watch_files(molecule_results_dir, poll_interval)
+
+    temp_compat = generate_compatibility_chart(
+        molecule_results_dir,
+        json_file=json_file,
+        tail_first=tail_first,
+        strip_ansi=strip_ansi,
+        use_cache=use_cache,
+        jobs=jobs,
+        newest_first=newest_first,
+        history_file=history_file,
+    )
+
+    cache = read_molecule_results_cache() if use_cache else {}
+    cache_options = {"tail_first": tail_first, "strip_ansi": strip_ansi}
+
+    print(f"Watching {molecule_results_dir} for new molecule test files")
+
+    try:
+        for test_files in test_file_batches:
+            test_files = [f for f in test_files if re.search(FILTER_FILES_PATTERN, f)]
+            if not test_files:
                 continue
 
-            # Read play recaps and add them to temp_compat if they are the most
-            # recent for a given OS
-            play_recap = converge.get("play_recap", [])
-            for recap in play_recap:
-                os_name, recap_summary = get_play_recap_summary(
-                    recap, idempotence, test_date
+            if history_file is not None:
+                temp_compat = read_compatibility_history(
+                    molecule_results_dir,
+                    get_history_role(json_file),
+                    history_file,
+                    use_cache=use_cache,
+                    jobs=jobs,
+                    cache=cache,
+                    **cache_options,
+                )
+                write_updated_compatibility_chart(temp_compat, test_files, json_file)
+            else:
+                update_compatibility_chart(
+                    temp_compat, test_files, json_file, cache, cache_options, jobs=jobs
                 )
 
-                if os_name in temp_compat and test_date < temp_compat[os_name]["added"]:
-                    continue
+            if use_cache:
+                write_molecule_results_cache(cache)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+
+
+def update_compatibility_chart(
+    temp_compat: Dict[str, Dict[str, Any]],
+    test_files: List[str],
+    json_file: str,
+    cache: Dict[str, Any],
+    cache_options: Dict[str, Any],
+    jobs: Optional[int] = 1,
+) -> None:
+    """
+    Adds new test files to the compatibility chart and rewrites the output
+    JSON file.
+
+    Args:
+        temp_compat (Dict[str, Dict[str, Any]]): play recap summaries per OS
+        test_files (List[str]): new test file paths
+        json_file (str): output JSON file
+        cache (Dict[str, Any]): cached tests
+        cache_options (Dict[str, Any]): parse options (tail_first, strip_ansi)
+        jobs (int, optional): number of processes used to parse. Defaults to 1.
+    """
+    tests, _ = read_test_files(test_files, cache, cache_options, jobs=jobs)
+
+    for test_file, test in zip(test_files, tests):
+        if test is not None:
+            add_test_to_compat(temp_compat, *test, get_test_file_date(test_file))
+
+    write_updated_compatibility_chart(temp_compat, test_files, json_file)
+
 
-                temp_compat[os_name] = recap_summary
-        except MoleculeTestParseError as e:
-            traceback.print_exc()
-            print(f"Error while parsing molecule test file {test_file}: {e}")
+def write_updated_compatibility_chart(
+    temp_compat: Dict[str, Dict[str, Any]], test_files: List[str], json_file: str
+) -> None:
+    """
+    Rewrites the output JSON file with the chart updated by new test files.
+
+    Args:
+        temp_compat (Dict[str, Dict[str, Any]]): play recap summaries per OS
+        test_files (List[str]): new test file paths
+        json_file (str): output JSON file
+    """
+    # Read the output file again, other commands may have changed it
+    written = write_compatibility_chart(
+        temp_compat, read_json_data(json_file), json_file
+    )
+
+    if written:
+        print(f"Updated {json_file} with {len(test_files)} molecule test file(s)")
+    else:
+        print(f"{json_file} unchanged by {len(test_files)} molecule test file(s)")
+
+
+def write_compatibility_chart(
+    temp_compat: Dict[str, Dict[str, Any]], data: Dict[str, Any], json_file: str
+) -> bool:
+    """
+    Writes the compatibility (and performance) matrix to the output JSON file.
+    The file is replaced atomically, so readers never see a partial chart, and
+    left untouched when the chart didn't change.
+
+    Args:
+        temp_compat (Dict[str, Dict[str, Any]]): play recap summaries per OS
+        data (Dict[str, Any]): output JSON data
+        json_file (str): output JSON file
+
+    Returns:
+        bool: whether the output JSON file was written
+    """
+    # Prepare to build blueprint.compatibility array
+    # Start by adding headers
+    compat = [["OS Family", "OS Version", "Status", "Idempotent", "Tested On"]]
 
     # Add to blueprint.compatibility
     add_items_to_blueprint_compatibility(temp_compat, compat)
 
     # Populate output file
-    data = {}
+    data["compatibility_matrix"] = compat
+
+    # Converge timings, only available when profile_tasks is enabled
+    perf = [
+        [
+            "OS Family",
+            "OS Version",
+            "Converge Time",
+            "Idempotence Time",
+            "Slowest Tasks",
+            "Tested On",
+        ]
+    ]
+    add_items_to_performance_matrix(temp_compat, perf)
+
+    if len(perf) > 1:
+        data["performance_matrix"] = perf
+    else:
+        data.pop("performance_matrix", None)
+
+    # Save
+    return write_json_file_if_changed(json_file, data)
+
+
+def list_test_files(molecule_results_dir: str) -> List[Tuple[str, datetime]]:
+    """
+    Lists molecule test files and their dates.
+
+    Args:
+        molecule_results_dir (str): molecule results dir
+
+    Returns:
+        List[Tuple[str, datetime]]: test files (absolute path, date)
+    """
+    test_files = list_files(molecule_results_dir, absolute_path=True)
+    return [
+        (file_name, get_test_file_date(file_name))
+        for file_name, _ in test_files
+        if re.search(FILTER_FILES_PATTERN, file_name)
+    ]
+
+
+def read_json_data(json_file: str) -> Dict[str, Any]:
+    """
+    Reads the output JSON file (ansibler.json), if it exists.
+
+    Args:
+        json_file (str): JSON file path
+
+    Returns:
+        Dict[str, Any]: JSON data, empty if the file is missing or invalid
+    """
     try:
         with open(json_file) as f:
             data = json.load(f)
-
-        if isinstance(data, list):
-            raise JSONDecodeError()
     except (JSONDecodeError, FileNotFoundError):
-        data = {}
+        return {}
 
-    data["compatibility_matrix"] = compat
+    return data if isinstance(data, dict) else {}
 
-    # Create output path if not exists
-    create_folder_if_not_exists(json_file.replace(os.path.basename(json_file), ""))
 
-    # Save
-    with open(json_file, "w") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def read_test_files(
+    test_files: List[str],
+    cache: Dict[str, Any],
+    cache_options: Dict[str, Any],
+    jobs: Optional[int] = 1,
+) -> Tuple[List[Optional[Tuple[Dict[str, Any], Dict[str, Any]]]], int]:
+    """
+    Reads converge and idempotence tests from test files. Cached tests are
+    reused, the rest are parsed (and added to the cache).
 
-    print("Done")
+    Args:
+        test_files (List[str]): test file paths
+        cache (Dict[str, Any]): cached tests
+        cache_options (Dict[str, Any]): parse options (tail_first, strip_ansi)
+        jobs (int, optional): number of processes used to parse. Defaults to 1.
+
+    Returns:
+        Tuple[List[Optional[Tuple[Dict[str, Any], Dict[str, Any]]]], int]:
+        converge and idempotence tests in test_files order (None when a file
+        couldn't be parsed or read, e.g. removed meanwhile), and the number of
+        files parsed
+    """
+    tests = [
+        get_cached_molecule_tests(cache, test_file, cache_options)
+        for test_file in test_files
+    ]
+    uncached_files = [f for f, test in zip(test_files, tests) if test is None]
+
+    # Fan the files that need parsing out over a process pool. Results are
+    # still collected in test_files order, so the output matches a serial run
+    executor, pending_tests = None, {}
+    try:
+        if jobs > 1 and len(uncached_files) > 1:
+            executor = ProcessPoolExecutor(max_workers=jobs)
+            pending_tests = {
+                test_file: executor.submit(
+                    read_molecule_tests, test_file, **cache_options
+                )
+                for test_file in uncached_files
+            }
+
+        for i, test_file in enumerate(test_files):
+            if tests[i] is not None:
+                continue
+
+            try:
+                tests[i] = read_pending_molecule_tests(
+                    test_file, pending_tests.get(test_file), cache_options
+                )
+                cache_molecule_tests(cache, test_file, *tests[i], cache_options)
+            except MoleculeTestParseError as e:
+                traceback.print_exc()
+                print(f"Error while parsing molecule test file {test_file}: {e}")
+            except OSError as e:
+                tests[i] = None
+                print(f"Couldn't read molecule test file {test_file}: {e}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return tests, len(uncached_files)
+
+
+def read_pending_molecule_tests(
+    test_file: str, pending_test: Optional[Future], cache_options: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Returns the converge and idempotence tests of a test file, parsed in the
+    process pool if it was submitted to it. Files are parsed in this process
+    when the pool broke (e.g. a worker was killed).
+
+    Args:
+        test_file (str): test file path
+        pending_test (Future, optional): test file submitted to the pool
+        cache_options (Dict[str, Any]): parse options (tail_first, strip_ansi)
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, Any]]: converge and idempotence tests
+    """
+    if pending_test is not None:
+        try:
+            return pending_test.result()
+        except BrokenProcessPool:
+            pass
+
+    return read_molecule_tests(test_file, **cache_options)
+
+
+def add_test_to_compat(
+    temp_compat: Dict[str, Dict[str, Any]],
+    converge: Dict[str, Any],
+    idempotence: Dict[str, Any],
+    test_date: datetime,
+    keep_existing: Optional[bool] = False,
+) -> None:
+    """
+    Adds the play recaps of a test to temp_compat if they are the most recent
+    for a given OS.
+
+    Args:
+        temp_compat (Dict[str, Dict[str, Any]]): play recap summaries per OS
+        converge (Dict[str, Any]): converge test
+        idempotence (Dict[str, Any]): idempotence test
+        test_date (datetime): test date
+        keep_existing (bool, optional): never replace OSes already in
+        temp_compat (tests are added newest first). Defaults to False.
+    """
+    # Skip if converge is invalid
+    if not converge:
+        return
+
+    existing_oses = set(temp_compat) if keep_existing else set()
+    idempotence_index = index_play_recap(idempotence.get("play_recap", []))
+
+    for recap in converge.get("play_recap", []):
+        os_name, recap_summary = get_play_recap_summary(
+            recap, idempotence_index, test_date
+        )
+
+        if os_name in existing_oses:
+            continue
+
+        if os_name in temp_compat and test_date < temp_compat[os_name]["added"]:
+            continue
+
+        recap_summary.update(get_performance_summary(converge, idempotence))
+        temp_compat[os_name] = recap_summary
+
+
+def get_play_recap_summaries(
+    converge: Dict[str, Any], idempotence: Dict[str, Any], test_date: datetime
+) -> List[Tuple[RecapRecord, Dict[str, Any]]]:
+    """
+    Returns the summary of every converge play recap of a test (timings
+    included), e.g. to record them in the compatibility history.
+
+    Args:
+        converge (Dict[str, Any]): converge test
+        idempotence (Dict[str, Any]): idempotence test
+        test_date (datetime): test date
+
+    Returns:
+        List[Tuple[RecapRecord, Dict[str, Any]]]: play recaps and summaries
+    """
+    idempotence_index = index_play_recap(idempotence.get("play_recap", []))
+    performance_summary = get_performance_summary(converge, idempotence)
+
+    summaries = []
+    for recap in converge.get("play_recap", []):
+        _, recap_summary = get_play_recap_summary(recap, idempotence_index, test_date)
+        summaries.append((recap, {**recap_summary, **performance_summary}))
+
+    return summaries
+
+
+def add_newest_tests_to_compat(
+    temp_compat: Dict[str, Dict[str, Any]],
+    test_files: List[Tuple[str, datetime]],
+    cache: Dict[str, Any],
+    cache_options: Dict[str, Any],
+    expected_oses: Set[str],
+    jobs: Optional[int] = 1,
+) -> int:
+    """
+    Adds tests to temp_compat, newest first. Older test files are skipped when
+    all of their OSes are already covered, and reading stops altogether once
+    every expected OS is covered: the ones in the existing compatibility
+    matrix, and the ones the test files contain (see get_test_file_oses), so
+    OSes only tested in older files still make it to the chart. A warning is
+    printed when files whose OSes couldn't be read cheaply are skipped.
+
+    Args:
+        temp_compat (Dict[str, Dict[str, Any]]): play recap summaries per OS
+        test_files (List[Tuple[str, datetime]]): test files (path, date)
+        cache (Dict[str, Any]): cached tests
+        cache_options (Dict[str, Any]): parse options (tail_first, strip_ansi)
+        expected_oses (Set[str]): OSes that should end up in temp_compat
+        jobs (int, optional): number of test files parsed at once. Defaults to
+        1.
+
+    Returns:
+        int: number of files parsed
+    """
+    # Newest first. Ties go to the file listed last, like in a serial run
+    ordered_files = [
+        test_file
+        for _, test_file in sorted(
+            enumerate(test_files), key=lambda f: (f[1][1], f[0]), reverse=True
+        )
+    ]
+
+    test_file_oses = {
+        test_file: get_test_file_oses(test_file, cache, cache_options)
+        for test_file, _ in ordered_files
+    }
+    expected_oses = expected_oses.union(
+        *(hosts for hosts in test_file_oses.values() if hosts is not None)
+    )
+
+    parsed_files, skipped_files, i = 0, 0, 0
+    while i < len(ordered_files):
+        if expected_oses and expected_oses.issubset(temp_compat):
+            skipped_files += len(ordered_files) - i
+            unknown_files = sum(
+                1
+                for test_file, _ in ordered_files[i:]
+                if test_file_oses[test_file] is None
+            )
+            if unknown_files:
+                print(
+                    f"Skipped {unknown_files} older molecule test file(s) without "
+                    "reading their OSes, OSes only tested in them are missing "
+                    "from the chart (run without --newest-first to include them)"
+                )
+            break
+
+        # Next batch of files that may still contribute to the chart
+        batch = []
+        while i < len(ordered_files) and len(batch) < max(jobs, 1):
+            test_file, test_date = ordered_files[i]
+            i += 1
+            hosts = test_file_oses[test_file]
+
+            if hosts is not None and hosts.issubset(temp_compat):
+                skipped_files += 1
+                continue
+
+            batch.append((test_file, test_date))
+
+        tests, parsed = read_test_files(
+            [test_file for test_file, _ in batch], cache, cache_options, jobs=jobs
+        )
+        parsed_files += parsed
+
+        for (_, test_date), test in zip(batch, tests):
+            if test is not None:
+                add_test_to_compat(temp_compat, *test, test_date, keep_existing=True)
+
+    if skipped_files:
+        print(f"Skipped {skipped_files} older molecule test file(s)")
+
+    return parsed_files
+
+
+def get_test_file_oses(
+    test_file: str, cache: Dict[str, Any], cache_options: Dict[str, Any]
+) -> Optional[Set[str]]:
+    """
+    Returns the OSes a test file contains, without fully parsing it.
+
+    Args:
+        test_file (str): test file path
+        cache (Dict[str, Any]): cached tests
+        cache_options (Dict[str, Any]): parse options (tail_first, strip_ansi)
+
+    Returns:
+        Optional[Set[str]]: OSes ({name}-{version}), None when they can't be
+        read cheaply or there are none (the file is parsed normally then)
+    """
+    test = get_cached_molecule_tests(cache, test_file, cache_options)
+    if test is not None:
+        converge, _ = test
+        hosts = [recap.os for recap in converge.get("play_recap", [])]
+    elif cache_options.get("strip_ansi"):
+        return None
+    else:
+        hosts = read_test_hosts(test_file)
+
+    if not hosts:
+        return None
+
+    return {f"{os_name}-{os_version}" for os_name, os_version in hosts}
+
+
+def get_compatibility_matrix_oses(compatibility_matrix: List[List[str]]) -> Set[str]:
+    """
+    Returns the OSes in a compatibility matrix.
+
+    Args:
+        compatibility_matrix (List[List[str]]): compatibility matrix (headers
+        included)
+
+    Returns:
+        Set[str]: OSes ({name}-{version})
+    """
+    return {f"{row[0]}-{row[1]}" for row in compatibility_matrix[1:] if len(row) > 1}
 
 
 def get_test_file_date(test_file_name) -> datetime:
@@ -104,23 +815,26 @@ def get_test_file_date(test_file_name) -> datetime:
     return datetime.fromisoformat(basename[:10])
 
 
-def read_molecule_tests(test_file: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+def read_molecule_tests(
+    test_file: str,
+    tail_first: Optional[bool] = False,
+    strip_ansi: Optional[bool] = False,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     """
     Reads converge and idempotence tests from a test file.
 
     Args:
         test_file (str): test file path
+        tail_first (bool, optional): read the file backwards first. Defaults to
+        False.
+        strip_ansi (bool, optional): strip ANSI escape sequences (colored
+        logs). Defaults to False.
 
     Returns:
         Tuple[Dict[str, Any], Dict[str, Any]]: converge and idempotence tests
     """
     # TODO: TESTS
-    molecule_test_dump = ""
-
-    with open(test_file) as f:
-        molecule_test_dump = f.read()
-
-    test = parse_test(molecule_test_dump)
+    test = read_test_file(test_file, tail_first=tail_first, strip_ansi=strip_ansi)
     converge = test.get("converge", {})
     idempotence = test.get("idempotence", {})
 
@@ -128,23 +842,27 @@ def read_molecule_tests(test_file: str) -> Tuple[Dict[str, Any], Dict[str, Any]]
 
 
 def get_play_recap_summary(
-    recap: Dict[str, Any], idempotence: Dict[str, Any], test_date: datetime
+    recap: RecapRecord,
+    idempotence_index: Dict[Tuple[str, Optional[str]], RecapRecord],
+    test_date: datetime,
 ) -> Tuple[str, Dict[str, Any]]:
     """
     Returns a summary of a converge play recap.
 
     Args:
-        recap (Dict[str, Any]): play recap
-        idempotence (Dict[str, Any]): corresponding idempotence test
+        recap (RecapRecord): play recap
+        idempotence_index (Dict[Tuple[str, Optional[str]], RecapRecord]):
+        corresponding idempotence play recap, indexed by OS (see
+        index_play_recap)
+        test_date (datetime): test date
 
     Returns:
         Tuple[str, Dict[str, Any]]: os, play recap summary
     """
-    # TODO: TESTS
-    os_name = recap.get("os_name")
-    os_version = recap.get("os_version")
+    os_name = recap.os_name
+    os_version = recap.os_version
     success = did_play_succeed(recap)
-    idempotent = is_idempotent(recap, idempotence)
+    idempotent = is_idempotent(recap, idempotence_index)
 
     os = f"{os_name}-{os_version}"
 
@@ -157,59 +875,74 @@ def get_play_recap_summary(
     }
 
 
+def get_performance_summary(
+    converge: Dict[str, Any], idempotence: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Returns the timings of a test (parsed from the profile_tasks callback
+    output). Hosts converge in the same play, so they share these timings.
+
+    Args:
+        converge (Dict[str, Any]): converge test
+        idempotence (Dict[str, Any]): idempotence test
+
+    Returns:
+        Dict[str, Any]: converge and idempotence durations (None when not
+        profiled) and slowest converge tasks
+    """
+    return {
+        "converge_duration": converge.get("duration"),
+        "idempotence_duration": idempotence.get("duration"),
+        "slowest_tasks": converge.get("slowest_tasks", []),
+    }
+
+
 def did_play_succeed(
-    recap: Dict[str, Any], idempotency_play: Optional[bool] = False
+    recap: RecapRecord, idempotency_play: Optional[bool] = False
 ) -> bool:
     """
     Checks if a play succeeded.
 
     Args:
-        recap (Dict[str, Any]): play recap
+        recap (RecapRecord): play recap
         idempotency_play (bool, optional): idempotence play? Defaults to False.
 
     Returns:
         bool: whether successful or not
     """
-    # TODO: TESTS
-    ok = recap.get("ok", 0)
-    failed = recap.get("failed", 0)
-    unreachable = recap.get("unreachable", 0)
+    ok = recap.ok
+    failed = recap.failed
+    unreachable = recap.unreachable
 
     if idempotency_play:
-        changed = recap.get("changed", 0)
+        changed = recap.changed
         return ok > 0 and not failed and not unreachable and not changed
 
     return ok > 0 and failed == 0 and unreachable == 0
 
 
-def is_idempotent(recap: Dict[str, Any], idempotence_test: Dict[str, Any]) -> bool:
+def is_idempotent(
+    recap: RecapRecord,
+    idempotence_index: Dict[Tuple[str, Optional[str]], RecapRecord],
+) -> Optional[bool]:
     """
     Checks if a test was idempotent.
 
     Args:
-        recap (Dict[str, Any]): play recap
-        idempotence_test (Dict[str, Any]): corresponding idempotence test
+        recap (RecapRecord): play recap
+        idempotence_index (Dict[Tuple[str, Optional[str]], RecapRecord]):
+        corresponding idempotence play recap, indexed by OS (see
+        index_play_recap)
 
     Returns:
-        bool: whether idempotent or not
+        Optional[bool]: whether idempotent or not, None when the OS wasn't
+        part of the idempotence test
     """
-    # TODO: TESTS
-    idempotence_results = idempotence_test.get("play_recap", [])
-
-    if not idempotence_results:
+    result = idempotence_index.get(recap.os)
+    if result is None:
         return None
 
-    recap_os_name = recap.get("os_name")
-    recap_os_version = recap.get("os_version")
-
-    for result in idempotence_results:
-        idp_os_name = result.get("os_name")
-        idp_os_version = result.get("os_version")
-
-        if idp_os_name == recap_os_name and idp_os_version == recap_os_version:
-            return did_play_succeed(result, idempotency_play=True)
-
-    return None
+    return did_play_succeed(result, idempotency_play=True)
 
 
 def add_items_to_blueprint_compatibility(
@@ -241,6 +974,53 @@ def add_items_to_blueprint_compatibility(
         )
 
 
+def add_items_to_performance_matrix(
+    items: Dict[str, Dict[str, Any]], perf: List[List[str]]
+) -> None:
+    """
+    Appends the timings of items to the performance matrix. Items without
+    timings (profile_tasks wasn't enabled) are skipped.
+
+    Args:
+        items (Dict[str, Dict[str, Any]]): items to add
+        perf (List[List[str]]): List to append the items to.
+    """
+    for _, data in items.items():
+        if data.get("converge_duration") is None:
+            continue
+
+        slowest_tasks = "<br>".join(
+            f"{task['task']} ({format_duration(task['duration'])})"
+            for task in data.get("slowest_tasks", [])
+        )
+
+        perf.append(
+            [
+                data["os_family"],
+                data["os_version"],
+                format_duration(data["converge_duration"]),
+                format_duration(data.get("idempotence_duration")),
+                slowest_tasks,
+                custom_strftime("%B {S}, %Y", data["added"]),
+            ]
+        )
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """
+    Formats a duration the way profile_tasks does (e.g. 25.32s).
+
+    Args:
+        seconds (Optional[float]): duration in seconds
+
+    Returns:
+        str: formatted duration, "-" when unknown
+    """
+    if seconds is None:
+        return "-"
+    return f"{seconds:.2f}s"
+
+
 def custom_strftime(format: str, t: datetime) -> str:
     """
     Custom time format containing English day suffixes (st, nd, rd, th).
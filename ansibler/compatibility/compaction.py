@@ -0,0 +1,219 @@
+import gzip
+import os
+import shutil
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from ansibler.compatibility.cache import (
+    read_molecule_results_cache,
+    write_molecule_results_cache,
+)
+from ansibler.compatibility.chart import (
+    MOLECULE_RESULTS_DIR,
+    get_play_recap_summaries,
+    list_test_files,
+    read_json_data,
+    read_test_files,
+)
+from ansibler.exceptions.ansibler import MoleculeTestsNotFound
+from ansibler.molecule_test.read import is_compressed
+from ansibler.utils.files import check_folder_exists, write_json_file_if_changed
+
+
+# Compacted test files are moved here (gzipped), along with the index. Test
+# files are only listed from the top of the results dir, so they're not read
+# again when the chart is generated
+ARCHIVE_DIR = "archive"
+ARCHIVE_INDEX_FILE = "index.json"
+ARCHIVE_INDEX_VERSION = 1
+KEEP_DAYS = 30
+
+
+def compact_molecule_results(
+    molecule_results_dir: Optional[str] = MOLECULE_RESULTS_DIR,
+    keep_days: Optional[int] = KEEP_DAYS,
+    delete: Optional[bool] = False,
+    tail_first: Optional[bool] = False,
+    strip_ansi: Optional[bool] = False,
+    use_cache: Optional[bool] = True,
+    jobs: Optional[int] = 1,
+    today: Optional[date] = None,
+) -> Dict[str, Any]:
+    """
+    Compacts a molecule results dir: only the test files that still
+    contribute to the compatibility chart (the newest one of every OS) and
+    the ones tested in the last keep_days days are kept. The rest are gzipped
+    into the archive dir (or deleted), and summarized in the archive index.
+
+    Test files that can't be parsed are kept.
+
+    Args:
+        molecule_results_dir (str, optional): molecule results dir
+        keep_days (int, optional): keep test files tested in the last keep_days
+        days. Defaults to 30.
+        delete (bool, optional): delete compacted test files instead of
+        archiving them. Defaults to False.
+        tail_first (bool, optional): read test files backwards first
+        strip_ansi (bool, optional): strip ANSI escape sequences
+        use_cache (bool, optional): use the parsed molecule tests cache
+        jobs (int, optional): number of processes used to parse
+        today (date, optional): date the history window ends. Defaults to
+        today.
+
+    Raises:
+        MoleculeTestsNotFound: raised when the molecule results dir is missing
+
+    Returns:
+        Dict[str, Any]: archive index (see read_archive_index)
+    """
+    if not check_folder_exists(molecule_results_dir):
+        raise MoleculeTestsNotFound("Couldn't find molecule results dir")
+
+    if today is None:
+        today = date.today()
+
+    test_files = list_test_files(molecule_results_dir)
+
+    cache = read_molecule_results_cache() if use_cache else {}
+    cache_options = {"tail_first": tail_first, "strip_ansi": strip_ansi}
+    tests, parsed_files = read_test_files(
+        [test_file for test_file, _ in test_files], cache, cache_options, jobs=jobs
+    )
+
+    window_start = datetime.combine(
+        today - timedelta(days=keep_days), datetime.min.time()
+    )
+    compacted = get_compacted_test_files(test_files, tests, window_start)
+
+    archive_dir = os.path.join(molecule_results_dir, ARCHIVE_DIR)
+    index_file = os.path.join(archive_dir, ARCHIVE_INDEX_FILE)
+    index = read_archive_index(index_file)
+
+    for test_file, test_date, test in compacted:
+        archived = None if delete else archive_test_file(test_file, archive_dir)
+        if delete:
+            os.remove(test_file)
+
+        index["files"][os.path.basename(test_file)] = {
+            "date": test_date.date().isoformat(),
+            "archive": archived,
+            "results": [
+                [
+                    recap.os_name,
+                    recap.os_version,
+                    summary["success"],
+                    summary["idempotent"],
+                ]
+                for recap, summary in get_play_recap_summaries(*test, test_date)
+            ],
+        }
+
+    if compacted:
+        write_json_file_if_changed(index_file, index, compact=True)
+
+    # Entries of compacted test files are dropped when the cache is written
+    if use_cache and (parsed_files or compacted):
+        write_molecule_results_cache(cache)
+
+    print(
+        f"Compacted {len(compacted)} molecule test file(s), "
+        f"kept {len(test_files) - len(compacted)}"
+    )
+    return index
+
+
+def get_compacted_test_files(
+    test_files: List[Tuple[str, datetime]],
+    tests: List[Optional[Tuple[Dict[str, Any], Dict[str, Any]]]],
+    window_start: datetime,
+) -> List[Tuple[str, datetime, Tuple[Dict[str, Any], Dict[str, Any]]]]:
+    """
+    Returns the test files that no longer contribute to the compatibility
+    chart, i.e. that are not the newest test file of any of their OSes. Ties
+    go to the file listed last, like in add_test_to_compat.
+
+    Args:
+        test_files (List[Tuple[str, datetime]]): test files (path, date)
+        tests (List[Optional[Tuple[Dict[str, Any], Dict[str, Any]]]]):
+        converge and idempotence tests of every test file (None when it
+        couldn't be parsed)
+        window_start (datetime): test files tested since then are kept
+
+    Returns:
+        List[Tuple[str, datetime, Tuple[Dict[str, Any], Dict[str, Any]]]]:
+        compacted test files (path, date, converge and idempotence tests)
+    """
+    newest = {}
+    for i, ((_, test_date), test) in enumerate(zip(test_files, tests)):
+        if test is None:
+            continue
+
+        for recap in test[0].get("play_recap", []):
+            if recap.os not in newest or test_date >= test_files[newest[recap.os]][1]:
+                newest[recap.os] = i
+
+    kept = set(newest.values())
+
+    return [
+        (test_file, test_date, test)
+        for i, ((test_file, test_date), test) in enumerate(zip(test_files, tests))
+        if test is not None and i not in kept and test_date < window_start
+    ]
+
+
+def archive_test_file(test_file: str, archive_dir: str) -> str:
+    """
+    Moves a test file to the archive dir, gzipped unless it's already
+    compressed.
+
+    Args:
+        test_file (str): test file path
+        archive_dir (str): archive dir
+
+    Returns:
+        str: archived file path, relative to the molecule results dir
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    name = os.path.basename(test_file)
+
+    if is_compressed(test_file):
+        shutil.move(test_file, os.path.join(archive_dir, name))
+    else:
+        name += ".gz"
+        temp_path = os.path.join(archive_dir, f".{name}.tmp")
+        with open(test_file, "rb") as src, gzip.open(temp_path, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(temp_path, os.path.join(archive_dir, name))
+        os.remove(test_file)
+
+    return f"{ARCHIVE_DIR}/{name}"
+
+
+def read_archive_index(index_file: str) -> Dict[str, Any]:
+    """
+    Reads the archive index of a molecule results dir:
+
+        {
+            "version": 1,
+            "files": {
+                "2021-08-07-default.txt": {
+                    "date": "2021-08-07",
+                    "archive": "archive/2021-08-07-default.txt.gz",
+                    "results": [["Debian", "10", true, true], ...]
+                }
+            }
+        }
+
+    "archive" is null when the test file was deleted, and results hold the
+    OS family, OS version, status and idempotence of every OS.
+
+    Args:
+        index_file (str): archive index path
+
+    Returns:
+        Dict[str, Any]: archive index, empty when missing or invalid
+    """
+    index = read_json_data(index_file)
+    if index.get("version") != ARCHIVE_INDEX_VERSION:
+        return {"version": ARCHIVE_INDEX_VERSION, "files": {}}
+
+    return index
@@ -0,0 +1,321 @@
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from ansibler.molecule_test.parse import RECAP_COUNTERS, RecapRecord, parse_os_name
+from ansibler.role_dependencies.cache import CACHE_MAP_DIR
+from ansibler.utils.files import create_folder_if_not_exists
+
+
+# Every parsed PLAY RECAP (one row per OS and test file), append only. Unlike
+# the cache, it's kept when test files are removed or the cache is cleared
+HISTORY_FILE = CACHE_MAP_DIR + "compatibility_history.sqlite"
+# Seconds to wait for other writers (e.g. roles charted in parallel)
+HISTORY_BUSY_TIMEOUT = 30.0
+HISTORY_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS test_files (
+    role TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    PRIMARY KEY (role, path, size, mtime)
+);
+CREATE TABLE IF NOT EXISTS recaps (
+    id INTEGER PRIMARY KEY,
+    role TEXT NOT NULL,
+    os_family TEXT NOT NULL,
+    os_version TEXT,
+    test_date TEXT NOT NULL,
+    test_file TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    idempotent INTEGER,
+    {", ".join(f"{counter} INTEGER NOT NULL" for counter in RECAP_COUNTERS)},
+    converge_duration REAL,
+    idempotence_duration REAL,
+    slowest_tasks TEXT
+);
+CREATE INDEX IF NOT EXISTS recaps_role_os
+    ON recaps (role, os_family, os_version, test_date);
+CREATE INDEX IF NOT EXISTS recaps_test_date ON recaps (test_date);
+"""
+HISTORY_COLUMNS = (
+    "role",
+    "os_family",
+    "os_version",
+    "test_date",
+    "test_file",
+    "success",
+    "idempotent",
+    *RECAP_COUNTERS,
+    "converge_duration",
+    "idempotence_duration",
+    "slowest_tasks",
+)
+
+
+def open_history(history_file: Optional[str] = HISTORY_FILE) -> sqlite3.Connection:
+    """
+    Opens the compatibility history, creating it if it doesn't exist.
+
+    Args:
+        history_file (str, optional): SQLite database path
+
+    Returns:
+        sqlite3.Connection: connection (rows can be accessed by column name)
+    """
+    create_folder_if_not_exists(os.path.dirname(os.path.abspath(history_file)))
+
+    conn = sqlite3.connect(history_file, timeout=HISTORY_BUSY_TIMEOUT)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(HISTORY_SCHEMA)
+
+    return conn
+
+
+def get_history_role(json_file: str) -> str:
+    """
+    Returns the role name tests are recorded under: the name of the dir the
+    output JSON file (ansibler.json) is in.
+
+    Args:
+        json_file (str): output JSON file
+
+    Returns:
+        str: role name
+    """
+    return os.path.basename(os.path.dirname(os.path.abspath(json_file)))
+
+
+def list_unrecorded_test_files(
+    conn: sqlite3.Connection, role: str, test_files: List[str]
+) -> List[str]:
+    """
+    Returns the test files that are not in the history yet. Files that changed
+    (size or mtime) since they were recorded are returned too.
+
+    Args:
+        conn (sqlite3.Connection): compatibility history
+        role (str): role name
+        test_files (List[str]): test file paths
+
+    Returns:
+        List[str]: test files to record, in test_files order
+    """
+    recorded = {
+        (row["path"], row["size"], row["mtime"])
+        for row in conn.execute(
+            "SELECT path, size, mtime FROM test_files WHERE role = ?", (role,)
+        )
+    }
+
+    unrecorded = []
+    for test_file in test_files:
+        stat = os.stat(test_file)
+        if (test_file, stat.st_size, stat.st_mtime_ns) not in recorded:
+            unrecorded.append(test_file)
+
+    return unrecorded
+
+
+def record_test_file(
+    conn: sqlite3.Connection,
+    role: str,
+    test_file: str,
+    test_date: datetime,
+    recaps: List[Tuple[RecapRecord, Dict[str, Any]]],
+) -> None:
+    """
+    Appends the play recaps of a test file to the history. Changes are
+    committed by the caller, so many files can be recorded at once.
+
+    Args:
+        conn (sqlite3.Connection): compatibility history
+        role (str): role name
+        test_file (str): test file path
+        test_date (datetime): test date
+        recaps (List[Tuple[RecapRecord, Dict[str, Any]]]): converge play recaps
+        and their summaries (see get_play_recap_summary)
+    """
+    stat = os.stat(test_file)
+    conn.execute(
+        "INSERT OR IGNORE INTO test_files VALUES (?, ?, ?, ?)",
+        (role, test_file, stat.st_size, stat.st_mtime_ns),
+    )
+
+    rows = [
+        (
+            role,
+            recap.os_name,
+            recap.os_version,
+            test_date.date().isoformat(),
+            test_file,
+            summary["success"],
+            summary["idempotent"],
+            *(getattr(recap, counter) for counter in RECAP_COUNTERS),
+            summary.get("converge_duration"),
+            summary.get("idempotence_duration"),
+            json.dumps(summary.get("slowest_tasks", [])),
+        )
+        for recap, summary in recaps
+    ]
+    conn.executemany(
+        f"INSERT INTO recaps ({', '.join(HISTORY_COLUMNS)}) "
+        f"VALUES ({', '.join('?' for _ in HISTORY_COLUMNS)})",
+        rows,
+    )
+
+
+def read_latest_recaps(
+    conn: sqlite3.Connection, role: str
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads the most recent play recap summary of every OS a role was tested on.
+    Ties (same test date) go to the recap recorded last. OSes are in the order
+    they were first recorded, like in charts built from test files.
+
+    Args:
+        conn (sqlite3.Connection): compatibility history
+        role (str): role name
+
+    Returns:
+        Dict[str, Dict[str, Any]]: play recap summaries per OS
+    """
+    rows = conn.execute(
+        """
+        SELECT * FROM recaps AS r
+        WHERE r.role = ? AND r.id = (
+            SELECT id FROM recaps
+            WHERE role = r.role
+                AND os_family = r.os_family
+                AND os_version IS r.os_version
+            ORDER BY test_date DESC, id DESC
+            LIMIT 1
+        )
+        ORDER BY (
+            SELECT MIN(id) FROM recaps
+            WHERE role = r.role
+                AND os_family = r.os_family
+                AND os_version IS r.os_version
+        )
+        """,
+        (role,),
+    )
+
+    return {
+        f"{row['os_family']}-{row['os_version']}": {
+            "os_family": row["os_family"],
+            "os_version": row["os_version"],
+            "success": bool(row["success"]),
+            "idempotent": (
+                None if row["idempotent"] is None else bool(row["idempotent"])
+            ),
+            "added": datetime.fromisoformat(row["test_date"]),
+            "converge_duration": row["converge_duration"],
+            "idempotence_duration": row["idempotence_duration"],
+            "slowest_tasks": json.loads(row["slowest_tasks"] or "[]"),
+        }
+        for row in rows
+    }
+
+
+def query_os_history(
+    conn: sqlite3.Connection, os_name: str, role: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Returns when an OS was last tested, and last passed, for every role (or a
+    single one).
+
+    Args:
+        conn (sqlite3.Connection): compatibility history
+        os_name (str): OS, named like molecule hosts (e.g. Debian-11,
+        Ubuntu-20.04-focal)
+        role (str, optional): role name. Defaults to every role.
+
+    Returns:
+        List[Dict[str, Any]]: role, last_tested, last_success and last_passed
+        (None when it never passed) per role
+    """
+    os_family, os_version = parse_os_name(os_name)
+
+    rows = conn.execute(
+        """
+        SELECT
+            role,
+            MAX(test_date) AS last_tested,
+            MAX(CASE WHEN success THEN test_date END) AS last_passed
+        FROM recaps
+        WHERE (? IS NULL OR role = ?) AND os_family = ? AND os_version IS ?
+        GROUP BY role
+        ORDER BY role
+        """,
+        (role, role, os_family, os_version),
+    ).fetchall()
+
+    history = []
+    for row in rows:
+        last_success = conn.execute(
+            """
+            SELECT success FROM recaps
+            WHERE role = ? AND os_family = ? AND os_version IS ? AND test_date = ?
+            ORDER BY id DESC
+            LIMIT 1
+            """,
+            (row["role"], os_family, os_version, row["last_tested"]),
+        ).fetchone()["success"]
+
+        history.append(
+            {
+                "role": row["role"],
+                "last_tested": datetime.fromisoformat(row["last_tested"]),
+                "last_success": bool(last_success),
+                "last_passed": (
+                    datetime.fromisoformat(row["last_passed"])
+                    if row["last_passed"] is not None
+                    else None
+                ),
+            }
+        )
+
+    return history
+
+
+def print_os_history(
+    os_name: str,
+    role: Optional[str] = None,
+    history_file: Optional[str] = HISTORY_FILE,
+) -> List[Dict[str, Any]]:
+    """
+    Prints when an OS was last tested, and last passed, for every role (or a
+    single one).
+
+    Args:
+        os_name (str): OS, named like molecule hosts (e.g. Debian-11)
+        role (str, optional): role name. Defaults to every role.
+        history_file (str, optional): SQLite database path
+
+    Returns:
+        List[Dict[str, Any]]: see query_os_history
+    """
+    conn = open_history(history_file)
+    try:
+        history = query_os_history(conn, os_name, role=role)
+    finally:
+        conn.close()
+
+    if not history:
+        print(f"No {os_name} tests in the compatibility history")
+
+    for entry in history:
+        passed = (
+            f"last passed on {entry['last_passed'].date().isoformat()}"
+            if entry["last_passed"] is not None
+            else "never passed"
+        )
+        print(
+            f"{entry['role']}: {os_name} {passed} (last tested on "
+            f"{entry['last_tested'].date().isoformat()}, "
+            f"{'passed' if entry['last_success'] else 'failed'})"
+        )
+
+    return history
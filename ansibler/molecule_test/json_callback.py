@@ -0,0 +1,294 @@
+import json
+import mmap
+import re
+from datetime import datetime
+from itertools import chain
+from json.decoder import JSONDecodeError
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from ansibler.molecule_test.parse import (
+    RECAP_COUNTERS,
+    RecapRecord,
+    build_parsed_test,
+    parse_os_name,
+)
+
+
+# Logs of molecule tests run with the json (or ansible.posix.json) stdout
+# callback: one JSON document per ansible-playbook run, keys sorted, so every
+# document starts with custom_stats and ends with stats
+JSON_CALLBACK_SNIFF_SIZE = 64 * 1024
+JSON_CALLBACK_SNIFF_REGEX = re.compile(r'^\{\s*"custom_stats"\s*:', re.MULTILINE)
+JSON_CALLBACK_SNIFF_BYTES_REGEX = re.compile(
+    JSON_CALLBACK_SNIFF_REGEX.pattern.encode(), re.MULTILINE
+)
+# Lines only the default (text) stdout callback prints
+TEXT_CALLBACK_MARKERS = ("PLAY [", "TASK [")
+
+CONVERGE_PLAY_NAME = "Converge"
+DOCUMENT_START_MARKER = '"custom_stats"'
+PLAYS_MARKER = '"plays":'
+PLAY_MARKER = '"play":'
+TASKS_MARKER = '"tasks":'
+STATS_MARKER = '"stats":'
+DOCUMENT_END_MARKER = "\n}"
+
+# ok, changed, etc.. are named like in a PLAY RECAP line, except for failed
+STATS_COUNTERS = {counter: counter for counter in RECAP_COUNTERS}
+STATS_COUNTERS["failed"] = "failures"
+
+JSON_DECODER = json.JSONDecoder()
+
+
+def is_json_callback_buffer(buffer: Union[bytes, mmap.mmap]) -> bool:
+    """
+    Checks if a molecule test was produced with the json stdout callback, by
+    looking for a JSON document in its first bytes.
+
+    Args:
+        buffer (Union[bytes, mmap.mmap]): molecule test content
+
+    Returns:
+        bool: whether json callback output or not
+    """
+    return (
+        JSON_CALLBACK_SNIFF_BYTES_REGEX.search(buffer[:JSON_CALLBACK_SNIFF_SIZE])
+        is not None
+    )
+
+
+def sniff_json_callback(lines: Iterable[str]) -> Tuple[bool, Iterator[str]]:
+    """
+    Checks if a molecule test was produced with the json stdout callback, by
+    looking for a JSON document in its first lines. Stops reading as soon as
+    the format is known, so it can be used on live output.
+
+    Args:
+        lines (Iterable[str]): molecule test lines
+
+    Returns:
+        Tuple[bool, Iterator[str]]: whether json callback output or not, and
+        the lines (the ones read to find out included)
+    """
+    lines = iter(lines)
+    head, size = [], 0
+
+    for line in lines:
+        head.append(line.rstrip("\r\n"))
+        size += len(line)
+
+        if JSON_CALLBACK_SNIFF_REGEX.search("\n".join(head[-2:])):
+            return True, chain(head, lines)
+
+        if head[-1].startswith(TEXT_CALLBACK_MARKERS):
+            break
+
+        if size >= JSON_CALLBACK_SNIFF_SIZE:
+            break
+
+    return False, chain(head, lines)
+
+
+def parse_json_callback_buffer(buffer: Union[bytes, mmap.mmap]) -> Dict[str, Any]:
+    """
+    Parses a molecule test produced with the json stdout callback from a
+    bytes-like buffer (e.g. a memory-mapped file). Only the play and stats
+    objects of every document are decoded, task results are skipped.
+
+    Args:
+        buffer (Union[bytes, mmap.mmap]): molecule test content
+
+    Raises:
+        MoleculeTestParseError: raised when the converge play wasn't found
+
+    Returns:
+        Dict[str, Any]: converge and idempotence play recaps and durations
+    """
+    recaps, profiles = [], []
+    start_marker = DOCUMENT_START_MARKER.encode()
+    start = buffer.find(start_marker)
+
+    while start != -1 and len(recaps) < 2:
+        end = buffer.find(start_marker, start + len(start_marker))
+        parsed = parse_json_document(buffer, start, len(buffer) if end == -1 else end)
+
+        if parsed is not None:
+            recaps.append(parsed[0])
+            profiles.append(parsed[1])
+
+        start = end
+
+    return build_parsed_test(recaps, profiles)
+
+
+def parse_json_callback_stream(lines: Iterable[str]) -> Dict[str, Any]:
+    """
+    Parses a molecule test produced with the json stdout callback line by
+    line. Lines holding task results (between the first play and the stats of
+    a document) are dropped as they are read.
+
+    Args:
+        lines (Iterable[str]): molecule test lines
+
+    Raises:
+        MoleculeTestParseError: raised when the converge play wasn't found
+
+    Returns:
+        Dict[str, Any]: converge and idempotence play recaps and durations
+    """
+    recaps, profiles = [], []
+    document, skipping = None, False
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+
+        if document is None:
+            if line != "{" and not line.startswith("{" + DOCUMENT_START_MARKER):
+                continue
+            document, skipping = [], False
+
+        if skipping and line.lstrip().startswith(STATS_MARKER):
+            skipping = False
+
+        if not skipping:
+            document.append(line)
+            skipping = line.lstrip().startswith(TASKS_MARKER)
+
+        # Documents end with a closing brace on its own line, unless they were
+        # dumped on a single line
+        if line == "}" or (len(document) == 1 and line.endswith("}")):
+            text = "\n".join(document)
+            parsed = parse_json_document(text, 0, len(text))
+            document = None
+
+            if parsed is not None:
+                recaps.append(parsed[0])
+                profiles.append(parsed[1])
+
+                if len(recaps) == 2:
+                    break
+
+    return build_parsed_test(recaps, profiles)
+
+
+def parse_json_document(
+    document: Union[str, bytes, mmap.mmap], start: int, end: int
+) -> Optional[Tuple[List[RecapRecord], Dict[str, Any]]]:
+    """
+    Parses the stats of a json callback document, if its first play is a
+    converge play.
+
+    Args:
+        document (Union[str, bytes, mmap.mmap]): molecule test content
+        start (int): offset of the document
+        end (int): offset of the next document (or the end of the content)
+
+    Returns:
+        Optional[Tuple[List[RecapRecord], Dict[str, Any]]]: play recap and
+        duration, None when it's not a converge play
+    """
+
+    def marker(text: str) -> Union[str, bytes]:
+        return text if isinstance(document, str) else text.encode()
+
+    plays_index = document.find(marker(PLAYS_MARKER), start, end)
+    stats_index = document.rfind(marker(STATS_MARKER), start, end)
+    if plays_index == -1 or stats_index == -1:
+        return None
+
+    # Keys are sorted, so the first play object comes before its tasks
+    play_index = document.find(marker(PLAY_MARKER), plays_index, stats_index)
+    if play_index == -1:
+        return None
+
+    tasks_index = document.find(marker(TASKS_MARKER), play_index, stats_index)
+    play = decode_json_object(
+        document[
+            play_index
+            + len(PLAY_MARKER) : stats_index if tasks_index == -1 else tasks_index
+        ]
+    )
+    if not isinstance(play, dict) or play.get("name") != CONVERGE_PLAY_NAME:
+        return None
+
+    stats_end = document.find(marker(DOCUMENT_END_MARKER), stats_index, end)
+    stats = decode_json_object(
+        document[stats_index + len(STATS_MARKER) : end if stats_end == -1 else stats_end]
+    )
+    if not isinstance(stats, dict):
+        return None
+
+    duration = parse_play_duration(play.get("duration", {}))
+
+    return (
+        parse_json_stats(stats),
+        {"duration": duration} if duration is not None else {},
+    )
+
+
+def decode_json_object(chunk: Union[str, bytes]) -> Any:
+    """
+    Decodes the JSON object a chunk starts with, ignoring whatever follows it.
+
+    Args:
+        chunk (Union[str, bytes]): chunk of a json callback document
+
+    Returns:
+        Any: decoded object, None when invalid
+    """
+    if not isinstance(chunk, str):
+        chunk = chunk.decode("utf-8", errors="replace")
+
+    try:
+        obj, _ = JSON_DECODER.raw_decode(chunk.lstrip())
+    except JSONDecodeError:
+        return None
+
+    return obj
+
+
+def parse_json_stats(stats: Dict[str, Dict[str, int]]) -> List[RecapRecord]:
+    """
+    Parses the stats of a json callback document, the same way PLAY RECAP lines
+    are parsed.
+
+    Args:
+        stats (Dict[str, Dict[str, int]]): stats per host
+
+    Returns:
+        List[RecapRecord]: list of recaps per OS
+    """
+    recap = []
+
+    for host, host_stats in stats.items():
+        os_name, os_version = parse_os_name(host)
+        if not os_name or not isinstance(host_stats, dict):
+            continue
+
+        recap.append(
+            RecapRecord(
+                os_name,
+                os_version,
+                *(int(host_stats.get(key, -1)) for key in STATS_COUNTERS.values()),
+            )
+        )
+
+    return recap
+
+
+def parse_play_duration(duration: Dict[str, str]) -> Optional[float]:
+    """
+    Parses the duration of a play (start and end timestamps).
+
+    Args:
+        duration (Dict[str, str]): play start and end (ISO 8601)
+
+    Returns:
+        Optional[float]: duration in seconds, None when unknown
+    """
+    try:
+        start = datetime.fromisoformat(duration["start"].replace("Z", "+00:00"))
+        end = datetime.fromisoformat(duration["end"].replace("Z", "+00:00"))
+    except (KeyError, TypeError, AttributeError, ValueError):
+        return None
+
+    return round((end - start).total_seconds(), 3)
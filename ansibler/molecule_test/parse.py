@@ -1,13 +1,31 @@
+import mmap
 import re
 import sys
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 from ansibler.exceptions.ansibler import MoleculeTestParseError
 
 
-CONVERGE_START_PATTERN = "PLAY \[Converge\]"
+CONVERGE_START_PATTERN = r"PLAY \[Converge\]"
+CONVERGE_START_MARKER = "PLAY [Converge]"
 PLAY_RECAP_PATTERN = "PLAY RECAP"
+CONVERGE_START_BYTES = CONVERGE_START_MARKER.encode()
+PLAY_RECAP_BYTES = PLAY_RECAP_PATTERN.encode()
 
 IDEMPOTENCE_START_PATTERN = r"INFO(\s)+Running(.*)idempotence"
+IDEMPOTENCE_START_REGEX = re.compile(rb"INFO\s+Running[^\n]*idempotence")
+CONVERGE_STAGE_REGEX = re.compile(rb"INFO\s+Running[^\n]*>\s*converge\b")
+PLAY_START_BYTES = b"PLAY ["
 PLAY_FINISH_PATTERN = r"INFO(\s)+(.*)"
 PLAY_NAME_PATTERN = r"INFO\s+Running.*>\s*(\w.*)"
 
@@ -24,71 +42,426 @@ SKIPPED_COUNT_PATTERN = r"skipped=(\d*)"
 RESCUED_COUNT_PATTERN = r"rescued=(\d*)"
 IGNORED_COUNT_PATTERN = r"ignored=(\d*)"
 
+RECAP_COUNTERS = (
+    "ok",
+    "changed",
+    "unreachable",
+    "failed",
+    "skipped",
+    "rescued",
+    "ignored",
+)
+
+# Precompiled patterns used while parsing PLAY RECAP lines. A regular line is
+# tokenized with a single match; anything unusual (e.g. counters in a different
+# order) falls back to a single findall over the line.
+PLAY_RECAP_OS_NAME_REGEX = re.compile(PLAY_RECAP_OS_NAME_PATTERN)
+PLAY_RECAP_PARALLEL_OS_ID_REGEX = re.compile(PLAY_RECAP_PARALLEL_OS_ID_PATTERN)
+PLAY_RECAP_LINE_REGEX = re.compile(
+    r"^\s?(?P<host>\S*)\s*:?\s*"
+    r"ok=(?P<ok>\d+)\s+"
+    r"changed=(?P<changed>\d+)\s+"
+    r"unreachable=(?P<unreachable>\d+)\s+"
+    r"failed=(?P<failed>\d+)"
+    r"(?:\s+skipped=(?P<skipped>\d+))?"
+    r"(?:\s+rescued=(?P<rescued>\d+))?"
+    r"(?:\s+ignored=(?P<ignored>\d+))?"
+)
+RECAP_COUNTER_REGEX = re.compile(
+    r"(ok|changed|unreachable|failed|skipped|rescued|ignored)=(\d+)"
+)
+
+# Summary printed by the profile_tasks callback right after a PLAY RECAP: a
+# timestamp line (previous task duration, total duration), a separator line
+# and one line per task, slowest first (e.g. "role : Task ------- 25.32s")
+PROFILE_TASKS_TIMESTAMP_PATTERN = (
+    r"\(\d+:\d{2}:\d{2}(?:\.\d+)?\)\s+(\d+):(\d{2}):(\d{2}(?:\.\d+)?)"
+)
+PROFILE_TASKS_TIMESTAMP_REGEX = re.compile(PROFILE_TASKS_TIMESTAMP_PATTERN)
+PROFILE_TASKS_TASK_REGEX = re.compile(
+    r"^(?P<task>.*?)[ \t][- ]*(?P<duration>\d+\.\d+)s[ \t]*$"
+)
+PROFILE_TASKS_SEPARATOR = "==="
+PLAYBOOK_TIMER_PATTERN = "Playbook run took"
+PROFILE_TASKS_SUMMARY_REGEX = re.compile(
+    rb"(?:[ \t\r\n]|Playbook run took[^\n]*\n)*"
+    rb"([^\n]*" + PROFILE_TASKS_TIMESTAMP_PATTERN.encode() + rb"[^\n]*\n"
+    rb"===[^\n]*\n"
+    rb"(?:[^\n]*?[ \t][- ]*\d+\.\d+s[ \t\r]*(?:\n|\Z))*)"
+)
+SLOWEST_TASKS_COUNT = 5
+
+# CSI escape sequences (colors, cursor movement, etc.)
+ANSI_ESCAPE_REGEX = re.compile(r"\x1b\[[0-?]*[ -/]*[@-~]")
+
+# States of the streaming parser (see parse_test_stream)
+SEEK_CONVERGE, SEEK_RECAP, IN_RECAP, IN_PROFILE = range(4)
+
+
+class RecapRecord(NamedTuple):
+    """
+    PLAY RECAP of a host. Counters missing from the recap are set to -1.
+    """
+
+    os_name: str
+    os_version: Optional[str]
+    ok: int
+    changed: int
+    unreachable: int
+    failed: int
+    skipped: int
+    rescued: int
+    ignored: int
+
+    @property
+    def os(self) -> Tuple[str, Optional[str]]:
+        """
+        OS name and version, e.g. to index recaps by OS
+        """
+        return self.os_name, self.os_version
+
 
 def parse_test(test: str) -> Dict[str, Any]:
-    """[summary]
+    """
+    Parses a molecule test dump. Exits when the converge PLAY RECAP is missing.
 
     Args:
         test (str): molecule test content
 
     Returns:
-        Dict[str, Any]: [description]
+        Dict[str, Any]: converge and idempotence play recaps and timings
     """
-    parsed_test = {}
+    try:
+        return parse_test_stream(test.splitlines())
+    except MoleculeTestParseError:
+        print("Could not parse molecule test")
+        sys.exit(1)
 
-    # Scan text in test for first ocurrence of PLAY [Converge]
-    # (This is where the role first starts installing the first time around)
-    converge_index = scan_molecule_results(
-        test, scan_for=CONVERGE_START_PATTERN, start_from=0
-    )
 
-    # (This is where the role first starts installing the first time around)
-    converge_recap_start = scan_molecule_results(
-        test, scan_for=PLAY_RECAP_PATTERN, start_from=converge_index
-    )
+def parse_test_stream(lines: Iterable[str]) -> Dict[str, Any]:
+    """
+    Parses a molecule test line by line, in a single pass. Stops reading as
+    soon as both the converge and the idempotence PLAY RECAP were found, so it
+    works with file handles and any other line iterator.
 
-    converge_recap_end = scan_molecule_results(
-        test, scan_for="\n\n", start_from=converge_recap_start
-    )
+    Timings printed by the profile_tasks callback after a PLAY RECAP are parsed
+    as well (see parse_profile_tasks).
 
-    if converge_recap_start is None or converge_recap_end is None:
-        print("Could not parse molecule test")
-        sys.exit(1)
+    Args:
+        lines (Iterable[str]): molecule test lines
 
-    # Extract section
-    parsed_test["converge"] = {
-        "play_recap": parse_play_recap(test[converge_recap_start:converge_recap_end])
-    }
+    Raises:
+        MoleculeTestParseError: raised when the converge PLAY RECAP wasn't found
 
-    # For idempotency column, continue in text until you see PLAY [Converge]
-    idempotency_index = scan_molecule_results(
-        test, scan_for=CONVERGE_START_PATTERN, start_from=converge_recap_end
-    )
+    Returns:
+        Dict[str, Any]: converge and idempotence play recaps and timings
+    """
+    recaps, profiles = [], []
+    current_recap, profile_lines = None, []
+    state = SEEK_CONVERGE
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+
+        if state == IN_PROFILE:
+            # Blank lines and the timer callback line may come first
+            if not profile_lines and (
+                not line.strip() or PLAYBOOK_TIMER_PATTERN in line
+            ):
+                continue
+
+            if is_profile_tasks_line(line, len(profile_lines)):
+                profile_lines.append(line)
+                continue
+
+            # Anything else ends the profile_tasks summary, and may be the
+            # start of the next play
+            profiles.append(parse_profile_tasks(profile_lines))
+            state = SEEK_CONVERGE
+
+            if len(recaps) == 2:
+                break
 
-    # If only one [Converge] section, dont calculate the idempotency indicator
-    if not idempotency_index:
-        parsed_test["idempotence"] = {}
-        return parsed_test
+        if state == SEEK_CONVERGE:
+            # First PLAY [Converge] is the converge run, the second one is the
+            # idempotence run
+            if CONVERGE_START_MARKER in line:
+                state = SEEK_RECAP
+        elif state == SEEK_RECAP:
+            if PLAY_RECAP_PATTERN in line:
+                current_recap = []
+                state = IN_RECAP
+        elif not line:
+            # A blank line ends the PLAY RECAP section
+            recaps.append(current_recap)
+            current_recap, profile_lines = None, []
+            state = IN_PROFILE
+        else:
+            recap = parse_play_recap_line(line)
+            if recap:
+                current_recap.append(recap)
+
+    # Log ended right after a PLAY RECAP section
+    if state == IN_RECAP:
+        recaps.append(current_recap)
+    elif state == IN_PROFILE:
+        profiles.append(parse_profile_tasks(profile_lines))
+
+    return build_parsed_test(recaps, profiles)
+
+
+def strip_ansi(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Streaming stage that removes ANSI escape sequences (e.g. colors) from
+    molecule test lines.
 
-    # If another [Converge] section was found...
-    # Go to next occurrence of PLAY RECAP
-    idempotency_recap_start = scan_molecule_results(
-        test, scan_for=PLAY_RECAP_PATTERN, start_from=idempotency_index
-    )
+    Args:
+        lines (Iterable[str]): molecule test lines
 
-    idempotency_recap_end = scan_molecule_results(
-        test, scan_for="\n\n", start_from=idempotency_recap_start
-    )
+    Yields:
+        Iterator[str]: lines without ANSI escape sequences
+    """
+    for line in lines:
+        if "\x1b" in line:
+            line = ANSI_ESCAPE_REGEX.sub("", line)
+        yield line
+
+
+def parse_test_buffer(
+    buffer: Union[bytes, mmap.mmap], start_from: Optional[int] = 0
+) -> Dict[str, Any]:
+    """
+    Parses a molecule test from a bytes-like buffer (e.g. a memory-mapped
+    file). Only the PLAY RECAP sections (and the profile_tasks summaries that
+    follow them) are decoded, the rest of the buffer is never copied.
+
+    Args:
+        buffer (Union[bytes, mmap.mmap]): molecule test content
+        start_from (int, optional): offset to start from. Defaults to 0.
+
+    Raises:
+        MoleculeTestParseError: raised when the converge PLAY RECAP wasn't found
+
+    Returns:
+        Dict[str, Any]: converge and idempotence play recaps and timings
+    """
+    recaps, profiles = [], []
+
+    while len(recaps) < 2:
+        converge_index = buffer.find(CONVERGE_START_BYTES, start_from)
+        if converge_index == -1:
+            break
+
+        recap_start = buffer.find(PLAY_RECAP_BYTES, converge_index)
+        if recap_start == -1:
+            break
+
+        recap_end = find_blank_line(buffer, recap_start)
+        recap_dump = buffer[recap_start:recap_end].decode("utf-8", errors="replace")
+        recaps.append(parse_play_recap(recap_dump))
+        start_from = recap_end
+
+        m = PROFILE_TASKS_SUMMARY_REGEX.match(buffer, recap_end)
+        if m:
+            profile_dump = m.group(1).decode("utf-8", errors="replace")
+            profiles.append(parse_profile_tasks(profile_dump.splitlines()))
+            start_from = m.end()
+        else:
+            profiles.append({})
+
+    return build_parsed_test(recaps, profiles)
+
+
+def parse_converge_hosts_buffer(
+    buffer: Union[bytes, mmap.mmap]
+) -> List[Tuple[str, str]]:
+    """
+    Parses the hosts (OS name, version) of the converge PLAY RECAP from a
+    bytes-like buffer, skipping the counters and the idempotence play.
+
+    Args:
+        buffer (Union[bytes, mmap.mmap]): molecule test content
+
+    Returns:
+        List[Tuple[str, str]]: os name, version of every host
+    """
+    converge_index = buffer.find(CONVERGE_START_BYTES)
+    if converge_index == -1:
+        return []
+
+    recap_start = buffer.find(PLAY_RECAP_BYTES, converge_index)
+    if recap_start == -1:
+        return []
+
+    recap_end = find_blank_line(buffer, recap_start)
+    recap_dump = buffer[recap_start:recap_end].decode("utf-8", errors="replace")
+
+    # Skip first line (PLAY RECAP ***)
+    hosts = [parse_os(recap_line) for recap_line in recap_dump.splitlines()[1:]]
+    return [(os_name, os_version) for os_name, os_version in hosts if os_name]
+
+
+def find_tail_recaps_start(buffer: bytes) -> Tuple[bool, Optional[int]]:
+    """
+    Looks for the converge and idempotence plays in the last part of a molecule
+    test (read backwards from the end of the file).
+
+    The expected structure is: PLAY [Converge] -> PLAY RECAP -> idempotence
+    INFO line -> PLAY [Converge] -> PLAY RECAP.
+
+    Args:
+        buffer (bytes): last bytes of a molecule test
+
+    Returns:
+        Tuple[bool, Optional[int]]: whether the structure is the expected one
+        so far, and the offset of the converge play (None when more bytes need
+        to be read)
+    """
+    idempotence_markers = list(IDEMPOTENCE_START_REGEX.finditer(buffer))
+    if not idempotence_markers:
+        # The whole converge stage was read and nothing follows it (e.g. it
+        # failed), there's no idempotence play further back
+        return CONVERGE_STAGE_REGEX.search(buffer) is None, None
+
+    marker = idempotence_markers[-1].start()
+
+    # Idempotence play must be complete
+    idempotence_index = buffer.find(CONVERGE_START_BYTES, marker)
+    if idempotence_index == -1:
+        return False, None
 
-    # Extract section
-    parsed_test["idempotence"] = {
-        "play_recap": parse_play_recap(
-            test[idempotency_recap_start:idempotency_recap_end]
-        )
+    if buffer.find(PLAY_RECAP_BYTES, idempotence_index) == -1:
+        return False, None
+
+    # Converge recap must come right before the idempotence play...
+    converge_recap_start = buffer.rfind(PLAY_RECAP_BYTES, 0, marker)
+    if converge_recap_start == -1:
+        return True, None
+
+    # ... and belong to a PLAY [Converge]
+    play_index = buffer.rfind(PLAY_START_BYTES, 0, converge_recap_start)
+    if play_index == -1:
+        return True, None
+
+    if not buffer.startswith(CONVERGE_START_BYTES, play_index):
+        return False, None
+
+    converge_recap_end = find_blank_line(buffer, converge_recap_start)
+    if buffer.find(CONVERGE_START_BYTES, converge_recap_end) != idempotence_index:
+        return False, None
+
+    return True, play_index
+
+
+def find_blank_line(buffer: Union[bytes, mmap.mmap], start_from: int) -> int:
+    """
+    Finds the first blank line of a buffer, starting from a given offset.
+
+    Args:
+        buffer (Union[bytes, mmap.mmap]): molecule test content
+        start_from (int): offset to start from
+
+    Returns:
+        int: offset of the blank line, or the buffer length if there's none
+    """
+    ends = [
+        i
+        for i in (buffer.find(b"\n\n", start_from), buffer.find(b"\n\r\n", start_from))
+        if i != -1
+    ]
+    return min(ends) if ends else len(buffer)
+
+
+def build_parsed_test(
+    recaps: List[List[RecapRecord]],
+    profiles: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Builds the parsed test from the PLAY RECAP sections that were found.
+
+    Args:
+        recaps (List[List[RecapRecord]]): converge and idempotence recaps
+        profiles (List[Dict[str, Any]], optional): converge and idempotence
+        timings (see parse_profile_tasks). Defaults to None (no timings).
+
+    Raises:
+        MoleculeTestParseError: raised when the converge PLAY RECAP wasn't found
+
+    Returns:
+        Dict[str, Any]: converge and idempotence play recaps and timings
+    """
+    if not recaps:
+        raise MoleculeTestParseError("No converge PLAY RECAP found")
+
+    profiles = profiles or []
+    tests = []
+    for i, recap in enumerate(recaps):
+        test = {"play_recap": recap}
+        if i < len(profiles):
+            test.update(profiles[i])
+        tests.append(test)
+
+    return {
+        "converge": tests[0],
+        "idempotence": tests[1] if len(tests) > 1 else {},
     }
 
-    # Scan through the results and mark anything that has any changed
-    return parsed_test
+
+def is_profile_tasks_line(line: str, index: int) -> bool:
+    """
+    Checks if a line belongs to a profile_tasks summary.
+
+    Args:
+        line (str): molecule test line
+        index (int): index of the line in the summary
+
+    Returns:
+        bool: whether it belongs to the summary or not
+    """
+    if index == 0:
+        return PROFILE_TASKS_TIMESTAMP_REGEX.search(line) is not None
+    elif index == 1:
+        return line.startswith(PROFILE_TASKS_SEPARATOR)
+
+    return PROFILE_TASKS_TASK_REGEX.match(line) is not None
+
+
+def parse_profile_tasks(profile_lines: List[str]) -> Dict[str, Any]:
+    """
+    Parses the summary printed by the profile_tasks callback after a play:
+    total duration of the play and the slowest tasks.
+
+    Args:
+        profile_lines (List[str]): profile_tasks summary lines
+
+    Returns:
+        Dict[str, Any]: duration (in seconds) and slowest tasks, empty when
+        there's no summary
+    """
+    if not profile_lines:
+        return {}
+
+    m = PROFILE_TASKS_TIMESTAMP_REGEX.search(profile_lines[0])
+    if not m:
+        return {}
+
+    hours, minutes, seconds = m.groups()
+    duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    tasks = []
+    for line in profile_lines[2:]:
+        m = PROFILE_TASKS_TASK_REGEX.match(line)
+        if m:
+            tasks.append(
+                {"task": m.group("task").strip(), "duration": float(m.group("duration"))}
+            )
+
+    tasks.sort(key=lambda task: task["duration"], reverse=True)
+
+    return {
+        "duration": round(duration, 3),
+        "slowest_tasks": tasks[:SLOWEST_TASKS_COUNT],
+    }
 
 
 def scan_molecule_results(
@@ -126,7 +499,7 @@ def parse_play_name(play_dump: str) -> str:
     return m.group(1)
 
 
-def parse_play_recap(play_dump: str) -> List[Dict[str, Any]]:
+def parse_play_recap(play_dump: str) -> List[RecapRecord]:
     """
     Parses PLAY RECAP
 
@@ -134,34 +507,71 @@ def parse_play_recap(play_dump: str) -> List[Dict[str, Any]]:
         play_dump (str): molecule test dump (play section)
 
     Returns:
-        List[Dict[str, Any]]: list of recaps per OS
+        List[RecapRecord]: list of recaps per OS
     """
     recap = []
     recap_lines = play_dump.splitlines()
 
     # Iterate lines, but skip first (PLAY RECAP ***)
     for recap_line in recap_lines[1:]:
-        os_name, os_version = parse_os(recap_line)
-        if not os_name:
-            continue
-
-        recap.append(
-            {
-                "os_name": os_name,
-                "os_version": os_version,
-                "ok": parse_recap_value(OK_COUNT_PATTERN, recap_line),
-                "changed": parse_recap_value(CHANGED_COUNT_PATTERN, recap_line),
-                "unreachable": parse_recap_value(UNREACHABLE_COUNT_PATTERN, recap_line),
-                "failed": parse_recap_value(FAILED_COUNT_PATTERN, recap_line),
-                "skipped": parse_recap_value(SKIPPED_COUNT_PATTERN, recap_line),
-                "rescued": parse_recap_value(RESCUED_COUNT_PATTERN, recap_line),
-                "ignored": parse_recap_value(IGNORED_COUNT_PATTERN, recap_line),
-            }
-        )
+        parsed_line = parse_play_recap_line(recap_line)
+        if parsed_line:
+            recap.append(parsed_line)
 
     return recap
 
 
+def parse_play_recap_line(recap_line: str) -> Optional[RecapRecord]:
+    """
+    Parses a single PLAY RECAP line (one per host)
+
+    Args:
+        recap_line (str): play recap line
+
+    Returns:
+        Optional[RecapRecord]: recap for the host, None if there's no host
+    """
+    m = PLAY_RECAP_LINE_REGEX.match(recap_line)
+
+    if m:
+        os_name, os_version = parse_os_name(m.group("host"))
+        counters = m.groupdict()
+    else:
+        os_name, os_version = parse_os(recap_line)
+        counters = dict(RECAP_COUNTER_REGEX.findall(recap_line))
+
+    if not os_name:
+        return None
+
+    return RecapRecord(
+        os_name,
+        os_version,
+        *(
+            int(counters[counter]) if counters.get(counter) is not None else -1
+            for counter in RECAP_COUNTERS
+        ),
+    )
+
+
+def index_play_recap(
+    play_recap: List[RecapRecord],
+) -> Dict[Tuple[str, Optional[str]], RecapRecord]:
+    """
+    Indexes a PLAY RECAP by OS (name, version). When an OS shows up more than
+    once, its first recap is kept.
+
+    Args:
+        play_recap (List[RecapRecord]): list of recaps per OS
+
+    Returns:
+        Dict[Tuple[str, Optional[str]], RecapRecord]: recaps by OS
+    """
+    index = {}
+    for recap in play_recap:
+        index.setdefault(recap.os, recap)
+    return index
+
+
 def parse_os(recap: str) -> Tuple[str, str]:
     """
     Parses OS name and version from a PLAY RECAP line
@@ -172,13 +582,27 @@ def parse_os(recap: str) -> Tuple[str, str]:
     Returns:
         Tuple[str, str]: os name, version
     """
-    m = re.search(PLAY_RECAP_OS_NAME_PATTERN, recap)
+    m = PLAY_RECAP_OS_NAME_REGEX.search(recap)
     if not m:
         return None, None
 
+    return parse_os_name(m.group())
+
+
+@lru_cache(maxsize=1024)
+def parse_os_name(host: str) -> Tuple[str, str]:
+    """
+    Parses OS name and version from a PLAY RECAP host name. Results are cached
+    since the same hosts show up in every recap.
+
+    Args:
+        host (str): host name (first column of a play recap line)
+
+    Returns:
+        Tuple[str, str]: os name, version
+    """
     # Replace molecule parallel ID
-    os = m.group()
-    os = re.sub(PLAY_RECAP_PARALLEL_OS_ID_PATTERN, "", os)
+    os = PLAY_RECAP_PARALLEL_OS_ID_REGEX.sub("", host)
 
     # Split to get name, version
     os_data = os.split("-")
@@ -0,0 +1,235 @@
+import gzip
+import lzma
+import mmap
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Tuple, Union
+from ansibler.exceptions.ansibler import MoleculeTestParseError
+from ansibler.molecule_test.json_callback import (
+    is_json_callback_buffer,
+    parse_json_callback_buffer,
+    parse_json_callback_stream,
+    sniff_json_callback,
+)
+from ansibler.molecule_test.parse import (
+    find_tail_recaps_start,
+    parse_converge_hosts_buffer,
+    parse_test_buffer,
+    parse_test_stream,
+    strip_ansi as strip_ansi_stage,
+)
+
+
+TAIL_CHUNK_SIZE = 64 * 1024
+TAIL_MAX_SIZE = 32 * 1024 * 1024
+COMPRESSED_EXTENSIONS = (".gz", ".xz", ".zst")
+
+
+def read_test_file(
+    test_file: str,
+    tail_first: Optional[bool] = False,
+    strip_ansi: Optional[bool] = False,
+) -> Dict[str, Any]:
+    """
+    Reads and parses a molecule test file. The file is memory-mapped, so only
+    its PLAY RECAP sections are ever loaded into Python strings.
+
+    Colored logs (strip_ansi) are streamed line by line through an ANSI
+    stripping stage instead, since escape sequences can show up anywhere. So
+    are compressed logs (.gz, .xz, .zst), which are decompressed on the fly.
+
+    Logs produced with the json stdout callback are detected and parsed as
+    JSON instead of text.
+
+    Args:
+        test_file (str): test file path
+        tail_first (bool, optional): read the file backwards first. Defaults to
+        False.
+        strip_ansi (bool, optional): strip ANSI escape sequences. Defaults to
+        False.
+
+    Raises:
+        MoleculeTestParseError: raised when the file is empty or invalid
+
+    Returns:
+        Dict[str, Any]: converge and idempotence play recaps
+    """
+    if strip_ansi or is_compressed(test_file):
+        with open_test_file(test_file) as f:
+            return parse_test_lines(strip_ansi_stage(f) if strip_ansi else f)
+
+    with open(test_file, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped
+            raise MoleculeTestParseError(f"Empty molecule test file: {test_file}")
+
+        with buffer:
+            if is_json_callback_buffer(buffer):
+                return parse_json_callback_buffer(buffer)
+
+            if tail_first:
+                test = read_test_file_tail(buffer)
+                if test is not None:
+                    return test
+
+            return parse_test_buffer(buffer)
+
+
+def parse_test_lines(lines: Iterable[str]) -> Dict[str, Any]:
+    """
+    Parses molecule test lines with the parser that matches their format
+    (json stdout callback output or text).
+
+    Args:
+        lines (Iterable[str]): molecule test lines
+
+    Returns:
+        Dict[str, Any]: converge and idempotence play recaps
+    """
+    json_callback, lines = sniff_json_callback(lines)
+    if json_callback:
+        return parse_json_callback_stream(lines)
+
+    return parse_test_stream(lines)
+
+
+def read_test_file_tail(
+    buffer: Union[bytes, mmap.mmap],
+    chunk_size: Optional[int] = TAIL_CHUNK_SIZE,
+    max_size: Optional[int] = TAIL_MAX_SIZE,
+) -> Optional[Dict[str, Any]]:
+    """
+    Reads a molecule test backwards, in chunks of growing size, until both the
+    converge and the idempotence plays were found. Gives up as soon as the
+    converge stage was read without an idempotence play after it.
+
+    Args:
+        buffer (Union[bytes, mmap.mmap]): molecule test content (e.g. a
+        memory-mapped file)
+        chunk_size (int, optional): size of the first chunk
+        max_size (int, optional): stop reading backwards after this many bytes
+
+    Returns:
+        Optional[Dict[str, Any]]: converge and idempotence play recaps, None
+        when the file doesn't have the expected structure (read it forward)
+    """
+    size = len(buffer)
+    read_size = min(chunk_size, size)
+
+    while read_size > 0:
+        offset = size - read_size
+        expected, start_from = find_tail_recaps_start(buffer[offset:])
+        if not expected:
+            return None
+
+        if start_from is not None:
+            return parse_test_buffer(buffer, start_from=offset + start_from)
+
+        if offset == 0 or read_size >= max_size:
+            break
+
+        # Double the amount of bytes read on every iteration
+        read_size = min(read_size * 2, size)
+
+    return None
+
+
+def read_test_hosts(test_file: str) -> Optional[List[Tuple[str, str]]]:
+    """
+    Reads the hosts (OS name, version) a test file contains, from its converge
+    PLAY RECAP. Cheaper than read_test_file since no counters are parsed and
+    the idempotence play isn't looked for.
+
+    Args:
+        test_file (str): test file path
+
+    Returns:
+        Optional[List[Tuple[str, str]]]: os name, version of every host, None
+        when the file can't be memory-mapped (compressed or empty) or parsed
+    """
+    if is_compressed(test_file):
+        return None
+
+    with open(test_file, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+
+        with buffer:
+            if not is_json_callback_buffer(buffer):
+                return parse_converge_hosts_buffer(buffer)
+
+            # Stats are decoded either way, so parse the whole test
+            try:
+                test = parse_json_callback_buffer(buffer)
+            except MoleculeTestParseError:
+                return None
+
+            return [recap.os for recap in test["converge"]["play_recap"]]
+
+
+def is_compressed(test_file: str) -> bool:
+    """
+    Checks if a test file is compressed (gzip, xz or zstd), by its extension.
+
+    Args:
+        test_file (str): test file path
+
+    Returns:
+        bool: whether compressed or not
+    """
+    return test_file.endswith(COMPRESSED_EXTENSIONS)
+
+
+def open_test_file(test_file: str) -> TextIO:
+    """
+    Opens a test file in text mode, decompressing it on the fly if necessary.
+
+    Args:
+        test_file (str): test file path
+
+    Raises:
+        MoleculeTestParseError: raised when a .zst file is read but no zstd
+        module is available
+
+    Returns:
+        TextIO: file object
+    """
+    kwargs = {"encoding": "utf-8", "errors": "replace"}
+
+    if test_file.endswith(".gz"):
+        return gzip.open(test_file, "rt", **kwargs)
+    elif test_file.endswith(".xz"):
+        return lzma.open(test_file, "rt", **kwargs)
+    elif test_file.endswith(".zst"):
+        return open_zstd_file(test_file, **kwargs)
+
+    return open(test_file, **kwargs)
+
+
+def open_zstd_file(test_file: str, **kwargs) -> TextIO:
+    """
+    Opens a zstd compressed file in text mode. Uses compression.zstd (Python
+    3.14+) or the zstandard package, whichever is available.
+
+    Args:
+        test_file (str): test file path
+
+    Raises:
+        MoleculeTestParseError: raised when no zstd module is available
+
+    Returns:
+        TextIO: file object
+    """
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            import zstandard as zstd
+        except ImportError:
+            raise MoleculeTestParseError(
+                f"Can not read {test_file}: install zstandard to read .zst files"
+            )
+
+    return zstd.open(test_file, "rt", **kwargs)
@@ -1,3 +1,4 @@
+import io
 import json
 import math
 from typing import Any, Dict, List, Optional, Union
@@ -7,7 +8,7 @@ from ansibler.platforms.platform_map import (
     parse_platform_map,
     map_to_galaxy_supported_platforms,
 )
-from ansibler.utils.files import create_folder_if_not_exists
+from ansibler.utils.files import report_written_files, write_file_if_changed
 
 
 def populate_platforms(
@@ -50,13 +51,14 @@ def populate_platforms(
     )
     meta_main["galaxy_info"] = galaxy_info
 
-    # Save
-    create_folder_if_not_exists("./meta/")
-    out = "./meta/main.yml"
-    with open(out, "w") as f:
-        yaml = YAML()
-        yaml.explicit_start = True
-        yaml.dump(meta_main, f)
+    # Save, unless platforms didn't change
+    out = io.StringIO()
+    yaml = YAML()
+    yaml.explicit_start = True
+    yaml.dump(meta_main, out)
+
+    written = write_file_if_changed("./meta/main.yml", out.getvalue())
+    report_written_files(int(written), 1)
 
     print("Done")
 
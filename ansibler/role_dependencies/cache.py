@@ -1,9 +1,14 @@
+import asyncio
 import json
 from json.decoder import JSONDecodeError
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 from ruamel.yaml import YAML
-from ansibler.utils.files import create_folder_if_not_exists, list_files
+from ansibler.utils.files import (
+    create_folder_if_not_exists,
+    list_files,
+    write_json_file_if_changed,
+)
 from ansibler.exceptions.ansibler import MetaYMLError
 from ansibler.utils.files import create_folder_if_not_exists
 from ansibler.role_dependencies.role_info import get_role_name
@@ -12,31 +17,44 @@ from ansibler.role_dependencies.role_info import get_role_name
 META_FILES_PATTERN = "**/meta/main.yml"
 CACHE_MAP_DIR = str(Path.home()) + "/.local/megabytelabs/ansibler/"
 CACHE_MAP_FILE = "role_metadata"
+# Bump whenever the cache structure changes. Caches without a version may hold
+# galaxy responses, which must go through the galaxy client (and its TTL)
+CACHE_MAP_VERSION = 1
 
 
-def read_roles_metadata_from_cache() -> Dict[str, Any]:
-    # TODO: TESTS
+def read_roles_metadata_from_cache() -> Optional[Dict[str, Any]]:
+    """
+    Reads the metadata of the roles scanned in the roles paths:
+
+        {"version": 1, "roles": {"snapd": {"role_name": "snapd", ...}}}
+
+    Returns:
+        Optional[Dict[str, Any]]: role metadata per role name, None when there
+        is no cache (or it's empty or from another version) and it needs to be
+        rebuilt
+    """
     try:
-        cache = None
         with open(CACHE_MAP_DIR + CACHE_MAP_FILE) as f:
             cache = json.load(f)
-        if not cache:
-            return None
-        print(f"Read cache from {CACHE_MAP_DIR}{CACHE_MAP_FILE}")
     except (FileNotFoundError, JSONDecodeError):
-        pass
+        return None
 
-    return cache
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_MAP_VERSION:
+        return None
+
+    roles = cache.get("roles")
+    if not roles:
+        return None
+
+    print(f"Read cache from {CACHE_MAP_DIR}{CACHE_MAP_FILE}")
+    return roles
 
 
 def cache_roles_metadata(
-    roles_path: List[str], current_cache: Optional[Dict[str, Any]] = {}
+    roles_path: List[str], current_cache: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     # TODO: TESTS
-    # Create cache folder if it does not exist
-    create_folder_if_not_exists(CACHE_MAP_DIR)
-
-    cache = {**current_cache}
+    cache = {**(current_cache or {})}
 
     for role_path in roles_path:
         meta_files = list_files(role_path, META_FILES_PATTERN, True)
@@ -50,8 +68,7 @@ def cache_roles_metadata(
             except:
                 pass
 
-    with open(CACHE_MAP_DIR + CACHE_MAP_FILE, "w", encoding="utf-8") as f:
-        json.dump(cache, f, ensure_ascii=False, indent=2)
+    write_roles_metadata_cache(cache)
 
     if not current_cache:
         print("Role metadata cached")
@@ -108,14 +125,73 @@ def cache_single_role_metadata(
     cache[role_name] = metadata
 
 
-def append_role_to_cache(role_name: str, metadata: str, cache: Dict[str, Any]) -> None:
-    # TODO: TESTS
-    # Append to cache
-    cache[role_name] = metadata
+def write_roles_metadata_cache(cache: Dict[str, Any]) -> None:
+    """
+    Writes the role metadata cache (see read_roles_metadata_from_cache).
+
+    Args:
+        cache (Dict[str, Any]): role metadata per role name
+    """
+    create_folder_if_not_exists(CACHE_MAP_DIR)
+    write_json_file_if_changed(
+        CACHE_MAP_DIR + CACHE_MAP_FILE, {"version": CACHE_MAP_VERSION, "roles": cache}
+    )
+
+
+class RoleMetadataLookup:
+    """
+    Looks roles up in the role metadata cache. Roles that aren't cached are
+    looked for in the roles paths, which are rescanned at most once per run:
+    the rescan is shared by every role task, and roles still missing after it
+    are remembered so later lookups go straight to Ansible Galaxy.
+    """
 
-    # Rewrite cache
-    with open(CACHE_MAP_DIR + CACHE_MAP_FILE, "w", encoding="utf-8") as f:
-        json.dump(cache, f, ensure_ascii=False, indent=2)
+    def __init__(self, cache: Dict[str, Any], role_paths: List[str]) -> None:
+        """
+        Args:
+            cache (Dict[str, Any]): role metadata cache (updated in place)
+            role_paths (List[str]): roles paths
+        """
+        self.cache = cache
+        self.role_paths = role_paths
+        self.rescanned = False
+        self.missing: Set[str] = set()
+        self.lock = asyncio.Lock()
+
+    async def get(self, role_name: str) -> Dict[str, Any]:
+        """
+        Returns a role's metadata, rescanning the roles paths if needed (and
+        not done yet).
+
+        Args:
+            role_name (str): role name
+
+        Returns:
+            Dict[str, Any]: role metadata, empty when the role isn't available
+            locally
+        """
+        metadata = self.cache.get(role_name)
+        if metadata or role_name in self.missing or not self.role_paths:
+            return metadata or {}
+
+        # Tasks that miss while a rescan is running wait for it, instead of
+        # starting their own
+        async with self.lock:
+            if not self.rescanned:
+                print("\tDoing full re-scan...")
+                loop = asyncio.get_running_loop()
+                self.cache.update(
+                    await loop.run_in_executor(
+                        None, cache_roles_metadata, self.role_paths, dict(self.cache)
+                    )
+                )
+                self.rescanned = True
+
+        metadata = self.cache.get(role_name)
+        if not metadata:
+            self.missing.add(role_name)
+
+        return metadata or {}
 
 
 def clear_cache() -> None:
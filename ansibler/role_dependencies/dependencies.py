@@ -3,15 +3,21 @@ import pathlib
 import json
 import asyncio
 from json.decoder import JSONDecodeError
-from typing import Any, Coroutine, Dict, List, Optional
+from typing import Any, Coroutine, Dict, List, Optional, Tuple
 from ruamel.yaml import YAML
 from ansibler.role_dependencies.role_info import get_role_name_from_req_file
-from ansibler.role_dependencies.galaxy import get_from_ansible_galaxy
-from ansibler.exceptions.ansibler import MetaYMLError, RolesParseError
+from ansibler.role_dependencies.snapshot import GalaxySnapshot
+from ansibler.role_dependencies.galaxy import (
+    GALAXY_CACHE_TTL,
+    GALAXY_CONCURRENCY,
+    GALAXY_TIMEOUT,
+    GalaxyClient,
+)
+from ansibler.exceptions.ansibler import RolesParseError
 from ansibler.role_dependencies.cache import (
+    RoleMetadataLookup,
     read_roles_metadata_from_cache,
     cache_roles_metadata,
-    append_role_to_cache,
 )
 from ansibler.utils.files import (
     check_folder_exists,
@@ -23,6 +29,8 @@ from ansibler.utils.files import (
     check_file_exists,
     create_file_if_not_exists,
     read_gitignore,
+    report_written_files,
+    write_json_file_if_changed,
 )
 
 
@@ -33,11 +41,22 @@ async def generate_role_dependency_chart(
     json_file: Optional[str] = "./ansibler.json",
     template: Optional[str] = None,
     variables: Optional[str] = None,
+    galaxy_concurrency: Optional[int] = GALAXY_CONCURRENCY,
+    galaxy_timeout: Optional[float] = GALAXY_TIMEOUT,
+    galaxy_cache_ttl: Optional[float] = GALAXY_CACHE_TTL,
+    galaxy_snapshot: Optional[str] = None,
 ) -> Coroutine[None, None, None]:
     """
     Generates role dependency charts. Uses caches whenever possible.
+
+    Runs in three phases: the requirements of every role are collected, then
+    every unique dependency is resolved once (dependencies missing from the
+    cache are fetched from ansible-galaxy concurrently, galaxy_concurrency at
+    most at once, unless galaxy responded in the last galaxy_cache_ttl
+    seconds), and then the chart of every role is written. Dependencies in
+    galaxy_snapshot (a local snapshot of galaxy metadata, see GalaxySnapshot)
+    are resolved from it instead of ansible-galaxy.
     """
-    # TODO: TESTS
     # Read role paths
     role_paths = parse_default_roles(get_default_roles())
     is_playbook = check_file_exists("./ansible.cfg")
@@ -49,10 +68,56 @@ async def generate_role_dependency_chart(
     if cache is None:
         cache = cache_roles_metadata(role_paths)
 
-    # Task pool
-    tasks = []
-
     paths = [os.path.abspath("./")] if not is_playbook else role_paths
+    roles = collect_role_requirements(paths, is_playbook)
+
+    # Shared by every dependency, so roles paths are rescanned once at most
+    lookup = RoleMetadataLookup(cache, role_paths)
+    snapshot = GalaxySnapshot(galaxy_snapshot) if galaxy_snapshot else None
+    galaxy = GalaxyClient(
+        concurrency=galaxy_concurrency,
+        timeout=galaxy_timeout,
+        cache_ttl=galaxy_cache_ttl,
+    )
+    dependencies = [dep for _, _, deps in roles for dep in deps if dep is not None]
+    try:
+        resolved = await resolve_dependencies(
+            dependencies, lookup, galaxy, snapshot=snapshot
+        )
+    finally:
+        galaxy.close()
+
+    print(
+        f"Resolved {len(resolved)} unique dependencies of {len(roles)} role(s), "
+        f"saved {len(dependencies) - len(resolved)} lookup(s)"
+    )
+
+    written = [
+        write_role_dependency_chart(
+            role_name, role_path, deps, resolved, json_file=json_file
+        )
+        for role_name, role_path, deps in roles
+    ]
+    report_written_files(sum(written), len(written))
+    print("Done")
+
+
+def collect_role_requirements(
+    paths: List[str], is_playbook: bool
+) -> List[Tuple[str, str, List[str]]]:
+    """
+    Collects the dependencies of every role, from their requirements.yml.
+
+    Args:
+        paths (List[str]): roles paths when in a playbook, else the role dir
+        is_playbook (bool): whether in a playbook
+
+    Returns:
+        List[Tuple[str, str, List[str]]]: role names, role dirs and
+        dependencies
+    """
+    roles = []
+
     for role_path in paths:
         if not check_folder_exists(role_path):
             continue
@@ -80,30 +145,126 @@ async def generate_role_dependency_chart(
 
             # Get the role name
             req_file = f[0].replace("meta/main.yml", "requirements.yml")
-            if is_playbook:
-                role_name = get_role_name_from_req_file(role_path, req_file)
+            role_name = get_role_name_from_req_file(role_path, req_file)
+
+            if role_path.startswith("./"):
+                role_dir = "/" + role_path + "/" + role_name + "/"
             else:
-                role_name = role_path.split("/")[-1]
-
-            # Append task to the pool
-            tasks.append(
-                asyncio.ensure_future(
-                    generate_single_role_dependency_chart(
-                        role_name,
-                        req_file,
-                        role_path,
-                        cache,
-                        json_file=json_file,
-                        role_paths=role_paths,
-                        template=template,
-                        variables=variables,
-                    )
-                )
-            )
-
-    # Execute tasks
-    await asyncio.gather(*tasks)
-    print("Done")
+                role_dir = role_path + "/" + role_name + "/"
+
+            roles.append((role_name, role_dir, read_dependencies(req_file)))
+
+    return roles
+
+
+async def resolve_dependencies(
+    dependencies: List[str],
+    lookup: RoleMetadataLookup,
+    galaxy: GalaxyClient,
+    snapshot: Optional[GalaxySnapshot] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Resolves every unique dependency once, from the role metadata cache (see
+    RoleMetadataLookup), the galaxy snapshot if any, or ansible-galaxy (see
+    GalaxyClient), concurrently.
+
+    Args:
+        dependencies (List[str]): dependencies of all the roles, in the form
+        {{role_namespace}}.{{role_name}}
+        lookup (RoleMetadataLookup): role metadata cache lookup
+        galaxy (GalaxyClient): ansible-galaxy client
+        snapshot (GalaxySnapshot, optional): local snapshot of galaxy
+        metadata. Defaults to None.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: metadata of every dependency
+    """
+    unique_dependencies = list(dict.fromkeys(dependencies))
+
+    async def resolve(dep: str) -> Dict[str, Any]:
+        dep_name = dep.split(".")[-1]
+        dependency_metadata = await lookup.get(dep_name)
+
+        if not dependency_metadata and snapshot is not None:
+            dependency_metadata = snapshot.get_role(dep)
+
+        # if not found locally, try getting from ansible-galaxy
+        if not dependency_metadata:
+            print(f"\tReading dependency {dep} from ansible-galaxy")
+            dependency_metadata = await galaxy.get_role(dep)
+
+        return dependency_metadata
+
+    results = await asyncio.gather(*(resolve(dep) for dep in unique_dependencies))
+    return dict(zip(unique_dependencies, results))
+
+
+def write_role_dependency_chart(
+    role_name: str,
+    role_dir: str,
+    dependencies: List[str],
+    resolved: Dict[str, Dict[str, Any]],
+    json_file: Optional[str] = "ansibler.json",
+) -> bool:
+    """
+    Writes the role_dependencies chart of a role to its JSON file, unless it
+    didn't change.
+
+    Args:
+        role_name (str): role name
+        role_dir (str): role dir
+        dependencies (List[str]): role dependencies
+        resolved (Dict[str, Dict[str, Any]]): metadata of every dependency
+        (see resolve_dependencies)
+        json_file (str, optional): JSON file, relative to the role dir
+
+    Returns:
+        bool: whether the JSON file was written
+    """
+    print(f"Generating role dependency for {role_name}")
+
+    role_dependencies = []
+
+    # If there's at least one dependency, add headers
+    if len(dependencies):
+        role_dependencies.append(
+            [
+                "Dependency",
+                "Description",
+            ]
+        )
+    else:
+        print(f"\tNo dependencies found in {role_name}")
+
+    try:
+        for dep in dependencies:
+            if dep is None:
+                print(f"\tFound invalid dependency in {role_name}")
+                continue
+
+            role_dependencies.append(get_dependency_metadata(resolved[dep]))
+    except ValueError as e:
+        print(f"\tCouldnt generate dependency chart for {role_name}: {e}")
+        return False
+
+    data = {}
+    ansibler_json_file = role_dir + json_file
+
+    try:
+        with open(ansibler_json_file) as f:
+            data = json.load(f)
+
+        if isinstance(data, list):
+            raise JSONDecodeError()
+    except (JSONDecodeError, FileNotFoundError):
+        data = {}
+
+    data["role_dependencies"] = role_dependencies
+
+    # Skip the write (and keep the mtime) when the chart didn't change
+    written = write_json_file_if_changed(ansibler_json_file, data)
+    print(f"\tGenerated role dependency chart for {role_name}")
+    return written
 
 
 def get_default_roles() -> str:
@@ -183,114 +344,6 @@ def is_ansible_dir(directory: str) -> bool:
     )
 
 
-async def generate_single_role_dependency_chart(
-    role_name: str,
-    requirement_file: str,
-    role_base_path: str,
-    cache: Dict[str, Any],
-    json_file: Optional[str] = "ansibler.json",
-    role_paths: Optional[str] = [],
-    template: Optional[str] = None,
-    variables: Optional[str] = None,
-) -> Coroutine[None, None, None]:
-    # TODO: TESTS
-    try:
-        await role_dependency_chart(
-            requirement_file,
-            role_base_path,
-            cache,
-            json_file=json_file,
-            role_paths=role_paths,
-            template=template,
-            variables=variables,
-        )
-    except (ValueError, MetaYMLError) as e:
-        print(f"\tCouldnt generate dependency chart for {role_name}: {e}")
-
-
-async def role_dependency_chart(
-    requirement_file: str,
-    role_base_path: str,
-    cache: Dict[str, Any],
-    json_file: Optional[str] = "ansibler.json",
-    role_paths: Optional[str] = [],
-    template: Optional[str] = None,
-    variables: Optional[str] = None,
-) -> Coroutine[None, None, None]:
-    # TODO: TESTS
-    # Get role's name
-    role_name = get_role_name_from_req_file(role_base_path, requirement_file)
-
-    print(f"Generating role dependency for {role_name}")
-
-    role_dependencies = []
-
-    # Read dependencies
-    dependencies = read_dependencies(requirement_file)
-    # If there's at least one dependency, add headers
-    if len(dependencies):
-        role_dependencies.append(
-            [
-                "Dependency",
-                "Description",
-            ]
-        )
-    else:
-        print(f"\tNo dependencies found in {role_name}")
-
-    for dep in dependencies:
-        if dep is None:
-            print(f"\tFound invalid dependency in {role_name}")
-            continue
-
-        dep_name = dep.split(".")[-1]
-        print(f"\tReading dependency {dep}")
-        dependency_metadata = cache.get(dep_name, {})
-
-        # if not found locally, try getting from ansible-galaxy
-        if not dependency_metadata:
-            if role_paths:
-                print(f"\tDoing full re-scan...")
-                new_cache = cache_roles_metadata(role_paths, cache)
-                return await role_dependency_chart(
-                    requirement_file, role_base_path, new_cache, json_file=json_file
-                )
-
-            print(f"\tReading dependency {dep} from ansible-galaxy")
-            dependency_metadata = get_from_ansible_galaxy(dep)
-            append_role_to_cache(dep_name, dependency_metadata, cache)
-
-        role_dependencies.append(get_dependency_metadata(dependency_metadata))
-
-    if role_base_path.startswith("./"):
-        role_path = "/" + role_base_path + "/" + role_name + "/"
-    else:
-        role_path = role_base_path + "/" + role_name + "/"
-
-    data = {}
-    ansibler_json_file = role_path + json_file
-
-    if not check_file_exists(ansibler_json_file):
-        create_folder_if_not_exists(
-            ansibler_json_file.replace(os.path.basename(ansibler_json_file), "")
-        )
-        create_file_if_not_exists(ansibler_json_file)
-
-    try:
-        with open(ansibler_json_file) as f:
-            data = json.load(f)
-
-        if isinstance(data, list):
-            raise JSONDecodeError()
-    except (JSONDecodeError, FileNotFoundError):
-        data = {}
-
-    data["role_dependencies"] = role_dependencies
-
-    copy_file(ansibler_json_file, ansibler_json_file, json.dumps(data), True)
-    print(f"\tGenerated role dependency chart for {role_name}")
-
-
 def read_dependencies(requirements_file_path: str) -> List[str]:
     """
     Reads a role dependencies from requirements.yml
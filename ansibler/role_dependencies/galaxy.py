@@ -1,37 +1,263 @@
+import asyncio
 import json
-from typing import Any, Dict, Tuple
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from json.decoder import JSONDecodeError
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from ansibler.role_dependencies.cache import CACHE_MAP_DIR
+from ansibler.utils.files import write_json_file_if_changed
 from ansibler.utils.subprocesses import get_subprocess_output
 from ansibler.exceptions.ansibler import RoleMetadataError
 
 
-GALAXY_BASE = """
-https://galaxy.ansible.com/api/internal/ui/repo-or-collection-detail/
-"""
+GALAXY_BASE = (
+    "https://galaxy.ansible.com/api/internal/ui/repo-or-collection-detail/"
+)
+# Galaxy requests made at once, and seconds to wait for galaxy to connect and
+# to respond
+GALAXY_CONCURRENCY = 8
+GALAXY_TIMEOUT = 10.0
 
+GALAXY_CACHE_FILE = "galaxy_responses"
+GALAXY_CACHE_VERSION = 1
+# Seconds cached galaxy responses are used without asking galaxy again. Roles
+# that weren't found are asked for sooner
+GALAXY_CACHE_TTL = 86400
+GALAXY_NEGATIVE_CACHE_TTL = 3600
 
-def get_from_ansible_galaxy(role: str) -> Dict[str, Any]:
+
+class GalaxyClient:
+    """
+    Gets role metadata from ansible-galaxy without blocking the event loop.
+    Requests run in a thread pool and share a session, so connections to
+    galaxy are kept alive and reused. At most concurrency requests are made at
+    once.
+
+    Responses are cached (see read_galaxy_cache) for cache_ttl seconds, or
+    negative_cache_ttl seconds when the role wasn't found. Expired responses
+    are revalidated with their ETag/Last-Modified, and still used when galaxy
+    can't be reached.
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = GALAXY_CONCURRENCY,
+        timeout: Optional[float] = GALAXY_TIMEOUT,
+        galaxy_base: Optional[str] = GALAXY_BASE,
+        cache_ttl: Optional[float] = GALAXY_CACHE_TTL,
+        negative_cache_ttl: Optional[float] = None,
+        use_cache: Optional[bool] = True,
+    ) -> None:
+        """
+        Args:
+            concurrency (int, optional): galaxy requests made at once.
+            Defaults to 8.
+            timeout (float, optional): seconds to wait for galaxy to connect
+            and to respond. Defaults to 10.
+            galaxy_base (str, optional): galaxy API URL
+            cache_ttl (float, optional): seconds responses are cached for.
+            Defaults to a day.
+            negative_cache_ttl (float, optional): seconds "not found"
+            responses are cached for. Defaults to an hour (or cache_ttl, if
+            shorter).
+            use_cache (bool, optional): read and write the galaxy responses
+            cache. Defaults to True.
+        """
+        self.timeout = timeout
+        self.galaxy_base = galaxy_base
+        self.session = create_galaxy_session(concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+        if negative_cache_ttl is None:
+            negative_cache_ttl = min(GALAXY_NEGATIVE_CACHE_TTL, cache_ttl)
+        self.cache_ttl = cache_ttl
+        self.negative_cache_ttl = negative_cache_ttl
+        self.use_cache = use_cache
+        self.cache = read_galaxy_cache() if use_cache else {}
+        self.cache_changed = False
+
+    async def get_role(self, role: str) -> Dict[str, Any]:
+        """
+        Gets role metadata from the galaxy responses cache, or ansible-galaxy
+        when expired (see get_from_ansible_galaxy).
+
+        Args:
+            role (str): role in the form {{role_namespace}}.{{role_name}}
+
+        Returns:
+            Dict[str, Any]: role metadata
+        """
+        entry = self.cache.get(role)
+        if entry is not None and is_galaxy_response_fresh(
+            entry, self.cache_ttl, self.negative_cache_ttl
+        ):
+            return get_galaxy_role_metadata(role, entry)
+
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            new_entry = await loop.run_in_executor(
+                self.executor,
+                partial(
+                    request_galaxy_role,
+                    role,
+                    entry,
+                    session=self.session,
+                    timeout=self.timeout,
+                    galaxy_base=self.galaxy_base,
+                ),
+            )
+
+        # Galaxy couldn't be reached, the expired response is better than none
+        if new_entry is not None:
+            self.cache[role] = entry = new_entry
+            self.cache_changed = True
+
+        return get_galaxy_role_metadata(role, entry)
+
+    def close(self) -> None:
+        """
+        Waits for pending requests, closes the pooled connections and writes
+        the galaxy responses cache.
+        """
+        self.executor.shutdown()
+        self.session.close()
+
+        if self.use_cache and self.cache_changed:
+            write_galaxy_cache(self.cache)
+
+
+def create_galaxy_session(pool_size: int) -> requests.Session:
+    """
+    Creates a session that keeps up to pool_size connections per host alive.
+
+    Args:
+        pool_size (int): connections kept alive per host
+
+    Returns:
+        requests.Session: session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_from_ansible_galaxy(
+    role: str,
+    session: Optional[requests.Session] = None,
+    timeout: Optional[float] = GALAXY_TIMEOUT,
+    galaxy_base: Optional[str] = GALAXY_BASE,
+) -> Dict[str, Any]:
     """
     Gets role metadata from ansible-galaxy by making a GET request to
     galaxy.ansible.com/api/internal/ui/repo-or-collection-detail
 
     Args:
         role (str): role in the form {{role_namespace}}.{{role_name}}
+        session (requests.Session, optional): session used to make the
+        request. Defaults to None (a new connection).
+        timeout (float, optional): seconds to wait for galaxy to connect and
+        to respond. Defaults to 10.
+        galaxy_base (str, optional): galaxy API URL
+
+    Returns:
+        Dict[str, Any]: role metadata, the description is unavailable when the
+        role wasn't found or galaxy couldn't be reached
+    """
+    entry = request_galaxy_role(
+        role, session=session, timeout=timeout, galaxy_base=galaxy_base
+    )
+    return get_galaxy_role_metadata(role, entry)
+
+
+def request_galaxy_role(
+    role: str,
+    entry: Optional[Dict[str, Any]] = None,
+    session: Optional[requests.Session] = None,
+    timeout: Optional[float] = GALAXY_TIMEOUT,
+    galaxy_base: Optional[str] = GALAXY_BASE,
+) -> Optional[Dict[str, Any]]:
+    """
+    Requests a role from ansible-galaxy. When a cached response is given, the
+    request is conditional (If-None-Match/If-Modified-Since), and the cached
+    response is kept when galaxy says it didn't change.
 
-    Raises:
-        RoleMetadataError: raised when role not found
+    Args:
+        role (str): role in the form {{role_namespace}}.{{role_name}}
+        entry (Dict[str, Any], optional): cached response to revalidate
+        session (requests.Session, optional): session used to make the
+        request. Defaults to None (a new connection).
+        timeout (float, optional): seconds to wait for galaxy to connect and
+        to respond. Defaults to 10.
+        galaxy_base (str, optional): galaxy API URL
 
     Returns:
-        Dict[str, Any]: role metadata
+        Optional[Dict[str, Any]]: response to cache (see read_galaxy_cache),
+        None when galaxy couldn't be reached
     """
     role_namespace, role_name = get_namespace_and_name_from_role(role)
-    galaxy_url = build_ansible_galaxy_url(role_namespace, role_name)
+    galaxy_url = build_ansible_galaxy_url(role_namespace, role_name, galaxy_base)
+
+    headers = {}
+    if entry is not None and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry is not None and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
 
     # Make request
-    response = requests.get(galaxy_url)
+    try:
+        response = (session or requests).get(
+            galaxy_url, headers=headers, timeout=timeout
+        )
+    except requests.RequestException as e:
+        print(f"Couldn't reach galaxy for role {role}: {e}")
+        return None
+
+    if response.status_code == 304 and entry is not None:
+        return {
+            **entry,
+            "checked": time.time(),
+            "etag": response.headers.get("ETag", entry.get("etag")),
+            "last_modified": response.headers.get(
+                "Last-Modified", entry.get("last_modified")
+            ),
+        }
+
+    if response.status_code not in (200, 404):
+        print(f"Galaxy responded {response.status_code} for role {role}")
+        return None
+
+    # Get description from ansible galaxy response, None if not found
+    return {
+        "checked": time.time(),
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "description": get_role_description_from_galaxy_response(response),
+    }
 
-    # Get description from ansible galaxy response
-    description = get_role_description_from_galaxy_response(response)
+
+def get_galaxy_role_metadata(
+    role: str, entry: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Returns role metadata from a galaxy response (see request_galaxy_role).
+
+    Args:
+        role (str): role in the form {{role_namespace}}.{{role_name}}
+        entry (Dict[str, Any], optional): galaxy response, None when galaxy
+        couldn't be reached
+
+    Returns:
+        Dict[str, Any]: role metadata
+    """
+    role_namespace, role_name = get_namespace_and_name_from_role(role)
+    description = entry.get("description") if entry is not None else None
 
     if not description:
         print(f"Role {role} not found in galaxy.")
@@ -60,32 +286,39 @@ def get_namespace_and_name_from_role(role: str) -> Tuple[str, str]:
     return role_namespace, role_name
 
 
-def build_ansible_galaxy_url(role_namespace: str, role_name: str) -> str:
+def build_ansible_galaxy_url(
+    role_namespace: str,
+    role_name: str,
+    galaxy_base: Optional[str] = GALAXY_BASE,
+) -> str:
     """
     Build ansible galaxy URL from the given role.
 
     Args:
         role_namespace (str): role namespace
         role_name (str): role name
+        galaxy_base (str, optional): galaxy API URL
 
     Returns:
         str: url
     """
-    # TODO: tests
     return (
-        f"{GALAXY_BASE}"
+        f"{galaxy_base}"
         f"?namespace={role_namespace}"
         f"&name={role_name}"
         f"&format=json"
     )
 
 
-def get_role_description_from_galaxy_response(response: requests.Response) -> str:
+def get_role_description_from_galaxy_response(
+    response: Optional[requests.Response],
+) -> str:
     """
     Extract description for a role from galaxy response
 
     Args:
-        response (requests.Response): response from ansible galaxy (json body)
+        response (requests.Response, optional): response from ansible galaxy
+        (json body), None when galaxy couldn't be reached
 
     Returns:
         str: description
@@ -98,3 +331,81 @@ def get_role_description_from_galaxy_response(response: requests.Response) -> st
 
     # description is in .data.repository.description
     return data.get("data", {}).get("repository", {}).get("description", None)
+
+
+def is_galaxy_response_fresh(
+    entry: Dict[str, Any],
+    cache_ttl: float,
+    negative_cache_ttl: float,
+    now: Optional[float] = None,
+) -> bool:
+    """
+    Checks if a cached galaxy response can still be used without asking
+    galaxy again.
+
+    Args:
+        entry (Dict[str, Any]): cached response
+        cache_ttl (float): seconds responses are cached for
+        negative_cache_ttl (float): seconds "not found" responses are cached
+        for
+        now (float, optional): current time. Defaults to time.time().
+
+    Returns:
+        bool: whether the response didn't expire
+    """
+    if now is None:
+        now = time.time()
+
+    ttl = cache_ttl if entry.get("description") else negative_cache_ttl
+    return now - entry.get("checked", 0) < ttl
+
+
+def read_galaxy_cache() -> Dict[str, Any]:
+    """
+    Reads cached galaxy responses:
+
+        {
+            "geerlingguy.docker": {
+                "checked": 1628294400.0,
+                "etag": "W/\\"5d0c...\\"",
+                "last_modified": "Sat, 07 Aug 2021 00:00:00 GMT",
+                "description": "Docker for Linux."
+            }
+        }
+
+    "checked" is when galaxy was last asked, and description is null when the
+    role wasn't found.
+
+    Returns:
+        Dict[str, Any]: cached responses, per role
+    """
+    try:
+        with open(CACHE_MAP_DIR + GALAXY_CACHE_FILE) as f:
+            cache = json.load(f)
+    except (FileNotFoundError, JSONDecodeError):
+        return {}
+
+    if not isinstance(cache, dict) or cache.get("version") != GALAXY_CACHE_VERSION:
+        return {}
+
+    return cache.get("roles", {})
+
+
+def write_galaxy_cache(cache: Dict[str, Any]) -> None:
+    """
+    Writes cached galaxy responses.
+
+    Args:
+        cache (Dict[str, Any]): cached responses, per role
+    """
+    write_json_file_if_changed(
+        CACHE_MAP_DIR + GALAXY_CACHE_FILE,
+        {"version": GALAXY_CACHE_VERSION, "roles": cache},
+    )
+
+
+def clear_galaxy_cache() -> None:
+    """
+    Clears cached galaxy responses
+    """
+    Path(CACHE_MAP_DIR + GALAXY_CACHE_FILE).unlink(missing_ok=True)
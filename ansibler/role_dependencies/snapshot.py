@@ -0,0 +1,256 @@
+import json
+import os
+from json.decoder import JSONDecodeError
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from ansibler.role_dependencies.cache import CACHE_MAP_DIR
+from ansibler.utils.files import write_json_file_if_changed
+
+
+SNAPSHOT_INDEX_FILE = "galaxy_snapshot_index"
+# Bump whenever the index structure changes
+SNAPSHOT_INDEX_VERSION = 1
+# Files read from a snapshot dir
+SNAPSHOT_EXTENSIONS = (".ndjson", ".jsonl", ".json")
+
+
+class GalaxySnapshot:
+    """
+    Resolves roles from a local snapshot of ansible-galaxy metadata, without
+    any network access. A snapshot is an NDJSON file (or a dir of them), with
+    one role per line:
+
+        {"namespace": "geerlingguy", "name": "docker", "description": "..."}
+
+    (the namespace can also be an object with a name, and name can be
+    role_name, like in galaxy's API responses).
+
+    Only an index of where every role is in the snapshot (file and byte
+    offset) is kept in memory. It's cached (see read_snapshot_index), so
+    snapshot files are only read again when they change. Lookups read a
+    single line.
+    """
+
+    def __init__(self, snapshot_path: str, use_cache: Optional[bool] = True) -> None:
+        """
+        Args:
+            snapshot_path (str): snapshot file or dir
+            use_cache (bool, optional): read and write the snapshot index
+            cache. Defaults to True.
+        """
+        self.files = list_snapshot_files(snapshot_path)
+        self.index = {}
+
+        if not self.files:
+            print(f"Couldn't find galaxy snapshot {snapshot_path}")
+
+        cache = read_snapshot_index() if use_cache else {}
+        indexed = 0
+
+        for snapshot_file in self.files:
+            entry = get_cached_snapshot_file_index(cache, snapshot_file)
+            if entry is None:
+                entry = index_snapshot_file(snapshot_file)
+                cache[snapshot_file] = entry
+                indexed += 1
+
+            # Roles in later files win
+            for role, offset in entry["roles"].items():
+                self.index[role] = (snapshot_file, offset)
+
+        if use_cache and indexed:
+            write_snapshot_index(cache)
+
+        print(
+            f"Loaded {len(self.index)} role(s) from galaxy snapshot "
+            f"{snapshot_path} ({indexed} of {len(self.files)} file(s) indexed)"
+        )
+
+    def get_role(self, role: str) -> Optional[Dict[str, Any]]:
+        """
+        Gets role metadata from the snapshot.
+
+        Args:
+            role (str): role in the form {{role_namespace}}.{{role_name}}
+
+        Returns:
+            Optional[Dict[str, Any]]: role metadata, None when the role isn't
+            in the snapshot
+        """
+        location = self.index.get(role.lower())
+        if location is None:
+            return None
+
+        snapshot_file, offset = location
+        try:
+            with open(snapshot_file, "rb") as f:
+                f.seek(offset)
+                data = json.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+
+        role_namespace, role_name = get_snapshot_role_name(data)
+        return {
+            "namespace": role_namespace,
+            "role_name": role_name,
+            "description": data.get("description") or "Description unavailable",
+        }
+
+
+def list_snapshot_files(snapshot_path: str) -> List[str]:
+    """
+    Lists the files of a snapshot.
+
+    Args:
+        snapshot_path (str): snapshot file or dir
+
+    Returns:
+        List[str]: snapshot files (absolute paths), sorted
+    """
+    snapshot_path = os.path.abspath(snapshot_path)
+    if not os.path.isdir(snapshot_path):
+        return [snapshot_path] if os.path.isfile(snapshot_path) else []
+
+    return sorted(
+        os.path.join(snapshot_path, name)
+        for name in os.listdir(snapshot_path)
+        if name.endswith(SNAPSHOT_EXTENSIONS)
+        and os.path.isfile(os.path.join(snapshot_path, name))
+    )
+
+
+def get_snapshot_role_name(data: Any) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Extracts namespace and name of a role in a snapshot.
+
+    Args:
+        data (Any): snapshot line (JSON)
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: namespace, name (None when
+        missing)
+    """
+    if not isinstance(data, dict):
+        return None, None
+
+    role_namespace = data.get("namespace")
+    if isinstance(role_namespace, dict):
+        role_namespace = role_namespace.get("name")
+
+    return role_namespace, data.get("name", data.get("role_name"))
+
+
+def index_snapshot_file(snapshot_file: str) -> Dict[str, Any]:
+    """
+    Indexes the roles of a snapshot file by byte offset. Lines that aren't
+    valid JSON or miss the namespace or name are skipped.
+
+    Args:
+        snapshot_file (str): snapshot file path
+
+    Returns:
+        Dict[str, Any]: index entry (see read_snapshot_index)
+    """
+    stat = os.stat(snapshot_file)
+    roles = {}
+    offset = 0
+
+    with open(snapshot_file, "rb") as f:
+        for line in f:
+            try:
+                role_namespace, role_name = get_snapshot_role_name(json.loads(line))
+            except ValueError:
+                role_namespace, role_name = None, None
+
+            if role_namespace and role_name:
+                roles[f"{role_namespace}.{role_name}".lower()] = offset
+
+            offset += len(line)
+
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "roles": roles}
+
+
+def get_cached_snapshot_file_index(
+    cache: Dict[str, Any], snapshot_file: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Returns the cached index of a snapshot file, as long as the file didn't
+    change (same size and mtime).
+
+    Args:
+        cache (Dict[str, Any]): cached snapshot file indexes
+        snapshot_file (str): snapshot file path
+
+    Returns:
+        Optional[Dict[str, Any]]: index entry, None when not cached
+    """
+    entry = cache.get(snapshot_file)
+    if not entry:
+        return None
+
+    try:
+        stat = os.stat(snapshot_file)
+    except OSError:
+        return None
+
+    if entry.get("size") != stat.st_size or entry.get("mtime") != stat.st_mtime_ns:
+        return None
+
+    return entry
+
+
+def read_snapshot_index() -> Dict[str, Any]:
+    """
+    Reads cached snapshot file indexes:
+
+        {
+            "/opt/galaxy/roles.ndjson": {
+                "size": 10485760,
+                "mtime": 1628294400000000000,
+                "roles": {"geerlingguy.docker": 0, ...}
+            }
+        }
+
+    Roles are lowercase, and point to the byte offset of their line.
+
+    Returns:
+        Dict[str, Any]: cached indexes, per snapshot file
+    """
+    try:
+        with open(CACHE_MAP_DIR + SNAPSHOT_INDEX_FILE) as f:
+            cache = json.load(f)
+    except (FileNotFoundError, JSONDecodeError):
+        return {}
+
+    if not isinstance(cache, dict) or cache.get("version") != SNAPSHOT_INDEX_VERSION:
+        return {}
+
+    return cache.get("files", {})
+
+
+def write_snapshot_index(cache: Dict[str, Any]) -> None:
+    """
+    Writes cached snapshot file indexes. Entries of files that no longer exist
+    are dropped.
+
+    Args:
+        cache (Dict[str, Any]): cached indexes, per snapshot file
+    """
+    files = {
+        snapshot_file: entry
+        for snapshot_file, entry in cache.items()
+        if os.path.isfile(snapshot_file)
+    }
+
+    write_json_file_if_changed(
+        CACHE_MAP_DIR + SNAPSHOT_INDEX_FILE,
+        {"version": SNAPSHOT_INDEX_VERSION, "files": files},
+        compact=True,
+    )
+
+
+def clear_snapshot_index() -> None:
+    """
+    Clears cached snapshot file indexes
+    """
+    Path(CACHE_MAP_DIR + SNAPSHOT_INDEX_FILE).unlink(missing_ok=True)
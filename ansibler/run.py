@@ -1,10 +1,27 @@
 import asyncio
+import os
 import sys
 from ansibler.args.cmd import get_user_arguments
-from ansibler.compatibility.chart import generate_compatibility_chart
+from ansibler.compatibility.batch import generate_compatibility_charts
+from ansibler.compatibility.cache import clear_molecule_results_cache
+from ansibler.compatibility.chart import (
+    MOLECULE_RESULTS_DIR,
+    generate_compatibility_chart,
+    generate_compatibility_chart_from_stream,
+    watch_compatibility_chart,
+)
+from ansibler.compatibility.compaction import KEEP_DAYS, compact_molecule_results
+from ansibler.compatibility.history import HISTORY_FILE, print_os_history
 from ansibler.platforms.populate import populate_platforms, read_json_file
 from ansibler.role_dependencies.dependencies import generate_role_dependency_chart
+from ansibler.role_dependencies.galaxy import (
+    GALAXY_CACHE_TTL,
+    GALAXY_CONCURRENCY,
+    GALAXY_TIMEOUT,
+    clear_galaxy_cache,
+)
 from ansibler.role_dependencies.cache import clear_cache
+from ansibler.role_dependencies.snapshot import clear_snapshot_index
 from ansibler.utils.files import check_file_exists
 from ansibler.utils.help import display_help
 
@@ -22,14 +39,70 @@ def run_ansibler() -> None:
     # Check for clear-cache
     if "clear-cache" in args:
         clear_cache()
+        clear_molecule_results_cache()
+        clear_galaxy_cache()
+        clear_snapshot_index()
         print("Cache cleared")
 
     json_file = args.get("json-file", "./ansibler.json")
+    history_file = args.get("history-file", HISTORY_FILE)
+    jobs = int(args.get("jobs", 1))
 
     # Run generate compatibility charts
     if "generate-compatibility-chart" in args:
-        molecule_results_dir = args.get("molecule-results-dir")
-        generate_compatibility_chart(molecule_results_dir, json_file=json_file)
+        molecule_results_dir = args.get("molecule-results-dir", MOLECULE_RESULTS_DIR)
+        strip_ansi = "strip-ansi" in args
+
+        if "roles-path" in args:
+            generate_compatibility_charts(
+                args["roles-path"],
+                molecule_results_dir=molecule_results_dir,
+                json_file=json_file,
+                tail_first="tail-first" in args,
+                strip_ansi=strip_ansi,
+                jobs=int(args.get("jobs", os.cpu_count() or 1)),
+                newest_first="newest-first" in args,
+                history_file=history_file if "history" in args else None,
+                aggregate_file=args.get("aggregate-file", None),
+            )
+        elif "from-stdin" in args:
+            generate_compatibility_chart_from_stream(
+                molecule_results_dir=molecule_results_dir,
+                json_file=json_file,
+                strip_ansi=strip_ansi,
+                jobs=jobs,
+            )
+        elif "watch" in args:
+            watch_compatibility_chart(
+                molecule_results_dir,
+                json_file=json_file,
+                tail_first="tail-first" in args,
+                strip_ansi=strip_ansi,
+                jobs=jobs,
+                newest_first="newest-first" in args,
+                history_file=history_file if "history" in args else None,
+            )
+        else:
+            generate_compatibility_chart(
+                molecule_results_dir,
+                json_file=json_file,
+                tail_first="tail-first" in args,
+                strip_ansi=strip_ansi,
+                jobs=jobs,
+                newest_first="newest-first" in args,
+                history_file=history_file if "history" in args else None,
+            )
+    elif "compact-molecule-results" in args:
+        compact_molecule_results(
+            args.get("molecule-results-dir", MOLECULE_RESULTS_DIR),
+            keep_days=int(args.get("keep-days", KEEP_DAYS)),
+            delete="delete-compacted" in args,
+            tail_first="tail-first" in args,
+            strip_ansi="strip-ansi" in args,
+            jobs=jobs,
+        )
+    elif "query-history" in args:
+        print_os_history(args["query-history"], history_file=history_file)
     elif "populate-platforms" in args:
         platform_map = args.get("platform-map", None)
         populate_platforms(json_file=json_file, platform_map_file=platform_map)
@@ -59,6 +132,14 @@ def run_ansibler() -> None:
                 json_file=json_file,
                 template=repository_status_template,
                 variables=variables,
+                galaxy_concurrency=int(
+                    args.get("galaxy-concurrency", GALAXY_CONCURRENCY)
+                ),
+                galaxy_timeout=float(args.get("galaxy-timeout", GALAXY_TIMEOUT)),
+                galaxy_cache_ttl=float(
+                    args.get("galaxy-cache-ttl", GALAXY_CACHE_TTL)
+                ),
+                galaxy_snapshot=args.get("galaxy-snapshot", None),
             )
         )
     else:
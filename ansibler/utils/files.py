@@ -1,9 +1,12 @@
 import json
 import glob
+import os
 from pathlib import Path
 import shutil
+import stat
+import tempfile
 from datetime import datetime
-from typing import List, Optional, Tuple, Union
+from typing import Any, List, Optional, Tuple, Union
 
 
 def create_folder_if_not_exists(path: str) -> None:
@@ -121,6 +124,140 @@ def copy_file(
                 f.write(new_content)
 
 
+def write_file_atomic(path: str, content: Union[str, bytes]) -> None:
+    """
+    Writes a file atomically: the content is written to a temporary file in the
+    same dir, which then replaces the file. Readers never see a half-written
+    file.
+
+    Args:
+        path (str): file path
+        content (Union[str, bytes]): file content (str is encoded as UTF-8)
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    create_folder_if_not_exists(directory)
+
+    # Keep the permissions of the file being replaced (mkstemp uses 0600)
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
+def write_file_if_changed(path: str, content: Union[str, bytes]) -> bool:
+    """
+    Writes a file atomically (see write_file_atomic), unless it already has
+    this exact content. Unchanged files are not touched at all (same mtime),
+    so tools that checksum or watch them don't see a change.
+
+    Args:
+        path (str): file path
+        content (Union[str, bytes]): file content (str is encoded as UTF-8)
+
+    Returns:
+        bool: whether the file was written
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    # Sizes differ most of the time when the content does, so the file is
+    # only read when they match
+    try:
+        if os.path.getsize(path) == len(content):
+            with open(path, "rb") as f:
+                if f.read() == content:
+                    return False
+    except OSError:
+        pass
+
+    write_file_atomic(path, content)
+    return True
+
+
+def dump_json(data: Any, compact: Optional[bool] = False) -> str:
+    """
+    Serializes JSON data the way Ansibler writes JSON files.
+
+    Args:
+        data (Any): JSON data
+        compact (bool, optional): no indentation or whitespace. Defaults to
+        False.
+
+    Returns:
+        str: JSON
+    """
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def write_json_file_atomic(
+    path: str, data: Any, compact: Optional[bool] = False
+) -> None:
+    """
+    Writes a JSON file atomically (see write_file_atomic).
+
+    Args:
+        path (str): file path
+        data (Any): JSON data
+        compact (bool, optional): no indentation or whitespace. Defaults to
+        False.
+    """
+    write_file_atomic(path, dump_json(data, compact=compact))
+
+
+def write_json_file_if_changed(
+    path: str, data: Any, compact: Optional[bool] = False
+) -> bool:
+    """
+    Writes a JSON file atomically, unless it already has this content (see
+    write_file_if_changed).
+
+    Args:
+        path (str): file path
+        data (Any): JSON data
+        compact (bool, optional): no indentation or whitespace. Defaults to
+        False.
+
+    Returns:
+        bool: whether the file was written
+    """
+    return write_file_if_changed(path, dump_json(data, compact=compact))
+
+
+def report_written_files(written: int, total: int) -> None:
+    """
+    Prints how many generated files were actually written (see
+    write_file_if_changed).
+
+    Args:
+        written (int): number of files written
+        total (int): number of files generated
+    """
+    print(f"Wrote {written} of {total} file(s), {total - written} unchanged")
+
+
 def grep_file(filepath: str, pattern: str) -> str:
     """
     Reads a file and returns the lines that match a certain pattern.
@@ -0,0 +1,195 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# See inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+INOTIFY_EVENT = struct.Struct("iIII")
+INOTIFY_READ_SIZE = 64 * 1024
+
+WATCH_POLL_INTERVAL = 1.0
+
+
+def watch_files(
+    path: str,
+    poll_interval: Optional[float] = WATCH_POLL_INTERVAL,
+    use_inotify: Optional[bool] = True,
+) -> Iterator[List[str]]:
+    """
+    Watches a directory for new files. Files that already exist are ignored,
+    and files are only reported once they were completely written (closed
+    after writing, or moved into the directory).
+
+    Uses inotify when available (Linux), and falls back to polling the
+    directory otherwise. Watching starts right away, before the first batch is
+    requested.
+
+    Args:
+        path (str): directory to watch
+        poll_interval (float, optional): seconds to wait for new files before
+        yielding an empty batch (or between polls). Defaults to 1 second.
+        use_inotify (bool, optional): use inotify if available. Defaults to
+        True.
+
+    Returns:
+        Iterator[List[str]]: batches of new files (absolute paths), empty when
+        nothing happened during poll_interval
+    """
+    fd = init_inotify(path) if use_inotify else None
+
+    if fd is None:
+        return poll_files(path, scan_files(path), poll_interval)
+
+    return read_inotify_events(fd, path, poll_interval)
+
+
+def init_inotify(path: str) -> Optional[int]:
+    """
+    Creates an inotify instance watching a directory.
+
+    Args:
+        path (str): directory to watch
+
+    Returns:
+        Optional[int]: inotify file descriptor, None when inotify isn't
+        available
+    """
+    library = ctypes.util.find_library("c")
+    if library is None:
+        return None
+
+    try:
+        libc = ctypes.CDLL(library, use_errno=True)
+        inotify_init1 = libc.inotify_init1
+        inotify_add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+
+    inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+    fd = inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    if fd < 0:
+        return None
+
+    if inotify_add_watch(fd, os.fsencode(path), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+        os.close(fd)
+        return None
+
+    return fd
+
+
+def read_inotify_events(
+    fd: int, path: str, poll_interval: float
+) -> Iterator[List[str]]:
+    """
+    Reads inotify events and yields the files they refer to. The inotify
+    instance is closed once the generator is.
+
+    Args:
+        fd (int): inotify file descriptor
+        path (str): watched directory
+        poll_interval (float): seconds to wait for events before yielding an
+        empty batch
+
+    Yields:
+        Iterator[List[str]]: batches of new files (absolute paths)
+    """
+    path = os.path.abspath(path)
+
+    try:
+        while True:
+            readable, _, _ = select.select([fd], [], [], poll_interval)
+            if not readable:
+                yield []
+                continue
+
+            try:
+                data = os.read(fd, INOTIFY_READ_SIZE)
+            except BlockingIOError:
+                continue
+
+            files, offset = [], 0
+            while offset + INOTIFY_EVENT.size <= len(data):
+                _, _, _, name_size = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset : offset + name_size].rstrip(b"\0")
+                offset += name_size
+
+                new_file = os.path.join(path, os.fsdecode(name))
+                if name and new_file not in files and os.path.isfile(new_file):
+                    files.append(new_file)
+
+            yield files
+    finally:
+        os.close(fd)
+
+
+def poll_files(
+    path: str, reported: Dict[str, Tuple[int, int]], poll_interval: float
+) -> Iterator[List[str]]:
+    """
+    Polls a directory for new (or rewritten) files. A file is reported once
+    its size and modification time didn't change between two polls, so files
+    that are still being written are not.
+
+    Args:
+        path (str): directory to watch
+        reported (Dict[str, Tuple[int, int]]): files that are not new (see
+        scan_files)
+        poll_interval (float): seconds between polls
+
+    Yields:
+        Iterator[List[str]]: batches of new files (absolute paths)
+    """
+    reported = dict(reported)
+    pending = {}
+
+    while True:
+        time.sleep(poll_interval)
+        current = scan_files(path)
+
+        files = []
+        for new_file, stat in current.items():
+            if reported.get(new_file) == stat:
+                continue
+
+            if pending.get(new_file) == stat:
+                files.append(new_file)
+                reported[new_file] = stat
+                del pending[new_file]
+            else:
+                pending[new_file] = stat
+
+        yield sorted(files)
+
+
+def scan_files(path: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Lists the files of a directory with their size and modification time.
+
+    Args:
+        path (str): directory
+
+    Returns:
+        Dict[str, Tuple[int, int]]: { file path: (size, mtime), ... }
+    """
+    files = {}
+
+    with os.scandir(os.path.abspath(path)) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+            except FileNotFoundError:
+                continue
+
+    return files
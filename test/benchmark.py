@@ -0,0 +1,185 @@
+"""
+Benchmark suite for the molecule test parser and the compatibility chart.
+
+Generates synthetic molecule logs and reports throughput in MB/s (parsers) and
+files/s (chart command). Run it from the repository root:
+
+    python -m test.benchmark --hosts 50 --tasks 200 --files 40 --verbosity 1
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, List, Tuple
+from ansibler.compatibility import cache
+from ansibler.compatibility.chart import generate_compatibility_chart
+from ansibler.molecule_test.json_callback import parse_json_callback_stream
+from ansibler.molecule_test.parse import (
+    parse_play_recap,
+    parse_test,
+    parse_test_stream,
+    strip_ansi,
+)
+from ansibler.molecule_test.read import read_test_file
+from test.test_molecule.synthetic import generate_molecule_log
+
+
+def measure(func: Callable[[], None], repeat: int) -> float:
+    """
+    Runs func repeat times and returns the fastest run, in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def get_recap_dump(log: str) -> str:
+    """
+    Returns the converge PLAY RECAP section of a molecule log.
+    """
+    converge = log.index("PLAY [Converge]")
+    start = log.index("PLAY RECAP", converge)
+    return log[start : log.index("\n\n", start)]
+
+
+def run_parser_benchmarks(
+    args: argparse.Namespace, log: str, test_file: str
+) -> List[Tuple[str, float, str]]:
+    """
+    Benchmarks the molecule test parsers on a single log.
+    """
+    size_mb = len(log.encode()) / 1024 / 1024
+    recap_dump = get_recap_dump(log)
+    recap_mb = len(recap_dump.encode()) / 1024 / 1024
+
+    def read_stream() -> None:
+        with open(test_file) as f:
+            parse_test_stream(strip_ansi(f) if args.colors else f)
+
+    benchmarks = [
+        ("parse_test (str)", lambda: parse_test(log), size_mb),
+        ("parse_test_stream (file)", read_stream, size_mb),
+        ("parse_play_recap", lambda: parse_play_recap(recap_dump), recap_mb),
+    ]
+
+    if not args.colors:
+        benchmarks += [
+            ("read_test_file (mmap)", lambda: read_test_file(test_file), size_mb),
+            (
+                "read_test_file (tail-first)",
+                lambda: read_test_file(test_file, tail_first=True),
+                size_mb,
+            ),
+        ]
+
+    # Same test, with the json stdout callback
+    json_log = generate_molecule_log(
+        host_count=args.hosts, task_count=args.tasks, callback="json"
+    )
+    json_file = test_file.replace(".txt", "-json.txt")
+    with open(json_file, "w") as f:
+        f.write(json_log)
+    json_mb = len(json_log.encode()) / 1024 / 1024
+
+    def read_json_stream() -> None:
+        with open(json_file) as f:
+            parse_json_callback_stream(f)
+
+    benchmarks += [
+        ("read_test_file (json)", lambda: read_test_file(json_file), json_mb),
+        ("parse_json_callback_stream", read_json_stream, json_mb),
+    ]
+
+    results = []
+    for name, func, mb in benchmarks:
+        seconds = measure(func, args.repeat)
+        results.append((name, seconds, f"{mb / seconds:,.1f} MB/s"))
+
+    os.remove(json_file)
+
+    return results
+
+
+def run_chart_benchmarks(
+    args: argparse.Namespace, results_dir: str, work_dir: str
+) -> List[Tuple[str, float, str]]:
+    """
+    Benchmarks the compatibility chart command on a results dir.
+    """
+    json_file = os.path.join(work_dir, "ansibler.json")
+    cache.CACHE_MAP_DIR = os.path.join(work_dir, "cache/")
+
+    def chart(**kwargs) -> Callable[[], None]:
+        return lambda: generate_compatibility_chart(
+            results_dir, json_file=json_file, strip_ansi=args.colors, **kwargs
+        )
+
+    benchmarks = [
+        ("chart (no cache)", chart(use_cache=False)),
+        (f"chart (no cache, {args.jobs} jobs)", chart(use_cache=False, jobs=args.jobs)),
+        ("chart (cached)", chart()),
+        ("chart (newest first)", chart(use_cache=False, newest_first=True)),
+    ]
+
+    results = []
+    for name, func in benchmarks:
+        seconds = measure(func, args.repeat)
+        results.append((name, seconds, f"{args.files / seconds:,.1f} files/s"))
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hosts", type=int, default=20, help="hosts per log")
+    parser.add_argument("--tasks", type=int, default=100, help="tasks per play")
+    parser.add_argument("--files", type=int, default=20, help="logs in results dir")
+    parser.add_argument("--verbosity", type=int, default=0, help="number of -v")
+    parser.add_argument("--colors", action="store_true", help="ANSI colored logs")
+    parser.add_argument("--parallel", action="store_true", help="parallel IDs")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="processes")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="ansibler-benchmark-")
+    results_dir = os.path.join(work_dir, "results")
+    os.mkdir(results_dir)
+
+    try:
+        logs = []
+        for i in range(args.files):
+            log = generate_molecule_log(
+                host_count=args.hosts,
+                task_count=args.tasks,
+                verbosity=args.verbosity,
+                colors=args.colors,
+                parallel=args.parallel,
+                seed=i,
+            )
+            test_file = os.path.join(results_dir, f"2021-08-{i % 28 + 1:02d}-s{i}.txt")
+            with open(test_file, "w") as f:
+                f.write(log)
+            logs.append((log, test_file))
+
+        size_mb = sum(len(log.encode()) for log, _ in logs) / 1024 / 1024
+        print(
+            f"{args.files} log(s), {args.hosts} host(s), {args.tasks} task(s), "
+            f"-v x{args.verbosity}, colors={args.colors}, "
+            f"parallel={args.parallel} ({size_mb:,.1f} MB)\n"
+        )
+
+        results = run_parser_benchmarks(args, *logs[0])
+        results += run_chart_benchmarks(args, results_dir, work_dir)
+
+        for name, seconds, throughput in results:
+            print(f"{name:<32} {seconds * 1000:>10.2f} ms {throughput:>18}")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,12 @@ from unittest import TestCase
 from unittest.mock import patch
 import argparse
 from ansibler.args import cmd
-from ansibler.args.cmd import configure_parser, validate_arg, read_parser_args
+from ansibler.args.cmd import (
+    configure_parser,
+    validate_arg,
+    validate_arg_combinations,
+    read_parser_args,
+)
 
 
 class TestArguments(TestCase):
@@ -73,3 +78,13 @@ class TestArguments(TestCase):
         with self.mock_valid_args:
             with patch.object(argparse._sys, "argv", params):
                 self.assertEqual(argparse._sys.argv, params)
+
+    def test_validate_arg_combinations(self):
+        """
+        Tests options that have no effect with --from-stdin are rejected
+        """
+        validate_arg_combinations({"from-stdin": True, "strip-ansi": True})
+
+        for arg_name in ("history", "tail-first", "newest-first"):
+            with self.assertRaises(argparse.ArgumentError):
+                validate_arg_combinations({"from-stdin": True, arg_name: True})
@@ -0,0 +1,151 @@
+from unittest import TestCase
+from unittest.mock import patch
+from datetime import datetime
+import json
+import pathlib
+import shutil
+from ansibler.compatibility import cache
+from ansibler.compatibility.aggregate import build_aggregate_matrix
+from ansibler.compatibility.batch import generate_compatibility_charts
+from test.test_molecule.test_parse import MOLECULE_TEST_DUMP
+
+
+def summary(os_family, os_version, success=True, idempotent=True):
+    """
+    Play recap summary, as returned by get_play_recap_summary
+    """
+    return {
+        "os_family": os_family,
+        "os_version": os_version,
+        "success": success,
+        "idempotent": idempotent,
+        "added": datetime(2021, 8, 7),
+    }
+
+
+class TestAggregateMatrix(TestCase):
+    def test_build_aggregate_matrix(self):
+        """
+        Test build a columnar role x OS matrix, roles and OSes sorted
+        """
+        charts = [
+            (
+                "system/snapd",
+                {
+                    "Ubuntu-20.04": summary("Ubuntu", "20.04", idempotent=None),
+                    "Debian-10": summary("Debian", "10"),
+                },
+            ),
+            ("system/homebrew", {"Archlinux-None": summary("Archlinux", None)}),
+            ("languages/go", {"Debian-10": summary("Debian", "10", False)}),
+        ]
+
+        matrix = build_aggregate_matrix(charts)
+
+        self.assertEqual(
+            matrix,
+            {
+                "roles": ["languages/go", "system/homebrew", "system/snapd"],
+                "oses": [["Archlinux", None], ["Debian", "10"], ["Ubuntu", "20.04"]],
+                "role": [2, 2, 1, 0],
+                "os": [2, 1, 0, 1],
+                "success": [True, True, True, False],
+                "idempotent": [None, True, True, True],
+                "tested_on": ["2021-08-07"] * 4,
+            },
+        )
+
+    def test_build_aggregate_matrix_scale(self):
+        """
+        Assert every (role, OS) pair of a large playbook is in the matrix
+        """
+        oses = [("Debian", str(version)) for version in range(40)]
+        charts = [
+            (
+                f"role{role}",
+                {f"{name}-{version}": summary(name, version) for name, version in oses},
+            )
+            for role in range(300)
+        ]
+
+        matrix = build_aggregate_matrix(charts)
+
+        self.assertEqual(len(matrix["roles"]), 300)
+        self.assertEqual(len(matrix["oses"]), 40)
+        self.assertEqual(len(set(zip(matrix["role"], matrix["os"]))), 300 * 40)
+
+
+class TestBatchAggregateMatrix(TestCase):
+    def setUp(self) -> None:
+        """
+        Test case setup
+        """
+        self.base_path = "./test/test_compatibility/aggregate/"
+        self.roles_path = self.base_path + "roles/"
+        self.aggregate_file = self.base_path + "compatibility.json"
+
+        for role, test in (
+            ("snapd", MOLECULE_TEST_DUMP),
+            ("homebrew", MOLECULE_TEST_DUMP.replace("Debian-10", "Fedora-34")),
+        ):
+            results_path = pathlib.Path(self.roles_path, role, "molecule-results")
+            results_path.mkdir(parents=True, exist_ok=True)
+            (results_path / "2021-08-07-default.txt").write_text(test)
+
+        self.mock_cache_dir = patch.object(
+            cache, "CACHE_MAP_DIR", self.base_path + "cache/"
+        )
+        self.mock_cache_dir.start()
+
+    def tearDown(self) -> None:
+        """
+        Test case cleanup
+        """
+        self.mock_cache_dir.stop()
+        shutil.rmtree(self.base_path)
+
+    def test_generate_compatibility_charts_aggregate(self):
+        """
+        Test the batch mode writes the aggregated matrix of all the roles
+        """
+        generate_compatibility_charts(
+            self.roles_path,
+            molecule_results_dir="molecule-results",
+            aggregate_file=self.aggregate_file,
+        )
+
+        with open(self.aggregate_file) as f:
+            content = f.read()
+        matrix = json.loads(content)
+
+        self.assertNotIn("\n", content)
+        self.assertEqual(matrix["roles"], ["homebrew", "snapd"])
+        self.assertEqual(
+            matrix["oses"],
+            [["Debian", "10"], ["Fedora", "34"], ["Ubuntu", "20.04 (Focal)"]],
+        )
+        self.assertEqual(matrix["role"], [0, 0, 1, 1])
+        self.assertEqual(matrix["os"], [1, 2, 0, 2])
+        self.assertEqual(matrix["success"], [True, False, True, False])
+
+    def test_generate_compatibility_charts_aggregate_nested(self):
+        """
+        Assert nested roles that share a dir name are told apart, named by
+        their path relative to the roles path
+        """
+        for parent in ("a", "b"):
+            results_path = pathlib.Path(self.roles_path, parent, "sub/molecule-results")
+            results_path.mkdir(parents=True)
+            (results_path / "2021-08-07-default.txt").write_text(MOLECULE_TEST_DUMP)
+
+        generate_compatibility_charts(
+            self.roles_path,
+            molecule_results_dir="molecule-results",
+            aggregate_file=self.aggregate_file,
+        )
+
+        with open(self.aggregate_file) as f:
+            matrix = json.load(f)
+
+        self.assertEqual(matrix["roles"], ["a/sub", "b/sub", "homebrew", "snapd"])
+        self.assertEqual(matrix["role"], [0, 0, 1, 1, 2, 2, 3, 3])
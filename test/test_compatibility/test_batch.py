@@ -0,0 +1,162 @@
+from unittest import TestCase
+from unittest.mock import patch
+import json
+import os
+import pathlib
+import shutil
+from ansibler.compatibility import batch, cache
+from ansibler.compatibility.batch import (
+    find_role_dirs,
+    generate_compatibility_charts,
+    get_role_cache,
+)
+from ansibler.compatibility.cache import read_molecule_results_cache
+from ansibler.compatibility.history import open_history, query_os_history
+from ansibler.exceptions.ansibler import MoleculeTestsNotFound
+from test.test_molecule.test_parse import MOLECULE_TEST_DUMP
+
+
+class TestBatchCompatibilityCharts(TestCase):
+    ROLES = {
+        "system/snapd": MOLECULE_TEST_DUMP,
+        "system/homebrew": MOLECULE_TEST_DUMP.replace("Debian-10", "Fedora-34"),
+        "languages/go": MOLECULE_TEST_DUMP.replace("failed=1", "failed=0"),
+    }
+
+    def setUp(self) -> None:
+        """
+        Test case setup
+        """
+        self.base_path = "./test/test_compatibility/batch/"
+        self.roles_path = self.base_path + "roles/"
+
+        for role, test in self.ROLES.items():
+            results_path = pathlib.Path(self.roles_path, role, "molecule-results")
+            results_path.mkdir(parents=True, exist_ok=True)
+            (results_path / "2021-08-07-default.txt").write_text(test)
+
+        # Not a role, no molecule results dir
+        pathlib.Path(self.roles_path, "system/README").mkdir(parents=True)
+
+        self.mock_cache_dir = patch.object(
+            cache, "CACHE_MAP_DIR", self.base_path + "cache/"
+        )
+        self.mock_cache_dir.start()
+
+    def tearDown(self) -> None:
+        """
+        Test case cleanup
+        """
+        self.mock_cache_dir.stop()
+        shutil.rmtree(self.base_path)
+
+    def read_compatibility_matrix(self, role):
+        """
+        Reads compatibility_matrix from a role's generated JSON file
+        """
+        with open(os.path.join(self.roles_path, role, "ansibler.json")) as f:
+            return json.load(f)["compatibility_matrix"]
+
+    def test_find_role_dirs(self):
+        """
+        Test find the roles with a molecule results dir
+        """
+        role_dirs = find_role_dirs(self.roles_path, "molecule-results")
+        self.assertEqual(
+            role_dirs,
+            [os.path.abspath(self.roles_path + role) for role in sorted(self.ROLES)],
+        )
+
+    def test_generate_compatibility_charts(self):
+        """
+        Test every role gets its own chart, serially and in parallel
+        """
+        for jobs in (1, 2):
+            charts = generate_compatibility_charts(
+                self.roles_path, molecule_results_dir="molecule-results", jobs=jobs
+            )
+
+            self.assertEqual(len(charts), 3)
+            self.assertEqual(
+                self.read_compatibility_matrix("system/homebrew")[1][:2],
+                ["Fedora", "34"],
+            )
+            self.assertIn("✅", self.read_compatibility_matrix("languages/go")[2][2])
+            self.assertIn("❌", self.read_compatibility_matrix("system/snapd")[2][2])
+
+    def test_generate_compatibility_charts_cache(self):
+        """
+        Assert the parsed tests of every role end up in the cache
+        """
+        generate_compatibility_charts(
+            self.roles_path, molecule_results_dir="molecule-results", jobs=2
+        )
+
+        molecule_cache = read_molecule_results_cache()
+        self.assertEqual(len(molecule_cache), 3)
+
+        role_dir = os.path.abspath(self.roles_path + "system/snapd")
+        self.assertEqual(len(get_role_cache(molecule_cache, role_dir)), 1)
+
+    def test_generate_compatibility_charts_cache_unchanged(self):
+        """
+        Assert the cache is only written again when a role parsed new tests
+        """
+        generate_compatibility_charts(
+            self.roles_path, molecule_results_dir="molecule-results"
+        )
+
+        with patch.object(batch, "write_molecule_results_cache") as write_cache:
+            generate_compatibility_charts(
+                self.roles_path, molecule_results_dir="molecule-results"
+            )
+            write_cache.assert_not_called()
+
+            test_file = pathlib.Path(
+                self.roles_path, "languages/go/molecule-results/2021-08-08-default.txt"
+            )
+            test_file.write_text(MOLECULE_TEST_DUMP)
+            generate_compatibility_charts(
+                self.roles_path, molecule_results_dir="molecule-results"
+            )
+            write_cache.assert_called_once()
+
+    def test_generate_compatibility_charts_history_nested(self):
+        """
+        Assert nested roles that share a dir name get their own history rows
+        """
+        for parent, test in (
+            ("a", MOLECULE_TEST_DUMP),
+            ("b", MOLECULE_TEST_DUMP.replace("Debian-10", "Fedora-34")),
+        ):
+            results_path = pathlib.Path(self.roles_path, parent, "sub/molecule-results")
+            results_path.mkdir(parents=True)
+            (results_path / "2021-08-07-default.txt").write_text(test)
+
+        history_file = self.base_path + "history.sqlite"
+        generate_compatibility_charts(
+            self.roles_path + "a:" + self.roles_path + "b",
+            molecule_results_dir="molecule-results",
+            history_file=history_file,
+        )
+
+        conn = open_history(history_file)
+        try:
+            debian = query_os_history(conn, "Debian-10")
+            fedora = query_os_history(conn, "Fedora-34")
+        finally:
+            conn.close()
+
+        self.assertEqual([entry["role"] for entry in debian], ["a/sub"])
+        self.assertEqual([entry["role"] for entry in fedora], ["b/sub"])
+        self.assertEqual(self.read_compatibility_matrix("a/sub")[1][0], "Debian")
+        self.assertEqual(self.read_compatibility_matrix("b/sub")[1][0], "Fedora")
+
+    def test_generate_compatibility_charts_no_roles(self):
+        """
+        Assert an error is raised when no role has molecule results
+        """
+        with self.assertRaises(MoleculeTestsNotFound):
+            generate_compatibility_charts(
+                self.roles_path, molecule_results_dir=".molecule-results"
+            )
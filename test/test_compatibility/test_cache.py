@@ -0,0 +1,101 @@
+from unittest import TestCase
+from unittest.mock import patch
+import os
+import pathlib
+import shutil
+from ansibler.compatibility import cache
+from ansibler.compatibility.cache import (
+    cache_molecule_tests,
+    get_cached_molecule_tests,
+    read_molecule_results_cache,
+    write_molecule_results_cache,
+)
+from ansibler.molecule_test.parse import RecapRecord
+
+
+class TestMoleculeResultsCache(TestCase):
+    CONVERGE = {"play_recap": [RecapRecord("Debian", "10", 1, 0, 0, 0, 0, 0, 0)]}
+
+    def setUp(self) -> None:
+        """
+        Test case setup
+        """
+        self.cache_path = "./test/test_compatibility/cache/"
+        self.test_file = os.path.abspath(
+            "./test/test_compatibility/cache/2021-08-07-default.txt"
+        )
+        pathlib.Path(self.cache_path).mkdir(parents=True, exist_ok=True)
+        pathlib.Path(self.test_file).write_text("PLAY [Converge]")
+
+        self.mock_cache_dir = patch.object(cache, "CACHE_MAP_DIR", self.cache_path)
+        self.mock_cache_dir.start()
+
+    def tearDown(self) -> None:
+        """
+        Test case cleanup
+        """
+        self.mock_cache_dir.stop()
+        shutil.rmtree(self.cache_path)
+
+    def test_cache_roundtrip(self):
+        """
+        Test cached tests are read back from the cache file
+        """
+        molecule_cache = {}
+        cache_molecule_tests(molecule_cache, self.test_file, self.CONVERGE, {})
+        write_molecule_results_cache(molecule_cache)
+
+        cached = get_cached_molecule_tests(read_molecule_results_cache(), self.test_file)
+        self.assertEqual(cached, (self.CONVERGE, {}))
+        self.assertEqual(cached[0]["play_recap"][0].os, ("Debian", "10"))
+
+    def test_cache_miss_when_file_changes(self):
+        """
+        Assert cached tests are ignored when the test file changes
+        """
+        molecule_cache = {}
+        cache_molecule_tests(molecule_cache, self.test_file, self.CONVERGE, {})
+
+        with open(self.test_file, "a") as f:
+            f.write("\nPLAY RECAP")
+
+        self.assertIsNone(get_cached_molecule_tests(molecule_cache, self.test_file))
+
+    def test_cache_miss_when_options_change(self):
+        """
+        Assert cached tests are ignored when parsed with other options
+        """
+        molecule_cache = {}
+        cache_molecule_tests(
+            molecule_cache, self.test_file, self.CONVERGE, {}, {"strip_ansi": False}
+        )
+
+        cached = get_cached_molecule_tests(
+            molecule_cache, self.test_file, {"strip_ansi": True}
+        )
+        self.assertIsNone(cached)
+
+    def test_cache_drops_removed_files(self):
+        """
+        Assert entries of removed test files are not written back
+        """
+        molecule_cache = {}
+        cache_molecule_tests(molecule_cache, self.test_file, self.CONVERGE, {})
+        os.remove(self.test_file)
+        write_molecule_results_cache(molecule_cache)
+
+        self.assertEqual(read_molecule_results_cache(), {})
+
+    def test_cache_not_rewritten_when_unchanged(self):
+        """
+        Assert the cache file is left alone when its content didn't change
+        """
+        molecule_cache = {}
+        cache_molecule_tests(molecule_cache, self.test_file, self.CONVERGE, {})
+        write_molecule_results_cache(molecule_cache)
+        cache_file = pathlib.Path(self.cache_path, "molecule_results")
+        mtime = cache_file.stat().st_mtime_ns
+
+        write_molecule_results_cache(read_molecule_results_cache())
+
+        self.assertEqual(cache_file.stat().st_mtime_ns, mtime)
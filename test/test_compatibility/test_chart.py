@@ -0,0 +1,360 @@
+from unittest import TestCase
+from unittest.mock import patch
+from datetime import datetime
+import gzip
+import json
+import pathlib
+import re
+import shutil
+from ansibler.compatibility import cache, chart
+from ansibler.compatibility.chart import (
+    FILTER_FILES_PATTERN,
+    generate_compatibility_chart,
+    generate_compatibility_chart_from_stream,
+    get_test_file_date,
+    get_test_file_oses,
+    read_test_files,
+    update_compatibility_chart,
+    watch_compatibility_chart,
+)
+from ansibler.compatibility.history import open_history
+from ansibler.exceptions.ansibler import MoleculeTestsNotFound
+from test.test_molecule.test_parse import (
+    MOLECULE_TEST_DUMP,
+    PROFILED_MOLECULE_TEST_DUMP,
+)
+
+
+class TestCompatibilityChart(TestCase):
+    def setUp(self) -> None:
+        """
+        Test case setup
+        """
+        self.base_path = "./test/test_compatibility/chart/"
+        self.results_path = self.base_path + "results/"
+        self.json_file = self.base_path + "ansibler.json"
+        pathlib.Path(self.results_path).mkdir(parents=True, exist_ok=True)
+        pathlib.Path(self.results_path + "2021-08-07-default.txt").write_text(
+            MOLECULE_TEST_DUMP
+        )
+
+        self.mock_cache_dir = patch.object(
+            cache, "CACHE_MAP_DIR", self.base_path + "cache/"
+        )
+        self.mock_cache_dir.start()
+
+    def tearDown(self) -> None:
+        """
+        Test case cleanup
+        """
+        self.mock_cache_dir.stop()
+        shutil.rmtree(self.base_path)
+
+    def read_compatibility_matrix(self):
+        """
+        Reads compatibility_matrix from the generated JSON file
+        """
+        with open(self.json_file) as f:
+            return json.load(f)["compatibility_matrix"]
+
+    def test_get_test_file_date(self):
+        """
+        Test get test file date
+        """
+        date = get_test_file_date("/tmp/results/2021-08-07-default.txt")
+        self.assertEqual(date, datetime(2021, 8, 7))
+
+    def test_get_compressed_test_file_date(self):
+        """
+        Test get test file date from compressed test files
+        """
+        for ext in (".gz", ".xz", ".zst"):
+            test_file = f"/tmp/results/2021-08-07-default.txt{ext}"
+            self.assertTrue(re.search(FILTER_FILES_PATTERN, test_file))
+            self.assertEqual(get_test_file_date(test_file), datetime(2021, 8, 7))
+
+    def test_generate_compatibility_chart(self):
+        """
+        Test generate compatibility chart
+        """
+        generate_compatibility_chart(self.results_path, json_file=self.json_file)
+        matrix = self.read_compatibility_matrix()
+
+        self.assertEqual(len(matrix), 3)
+        self.assertEqual(matrix[1][:2], ["Debian", "10"])
+        self.assertIn("✅", matrix[1][2])
+        self.assertIn("✅", matrix[1][3])
+        self.assertEqual(matrix[2][:2], ["Ubuntu", "20.04 (Focal)"])
+        self.assertIn("❌", matrix[2][2])
+        self.assertEqual(matrix[1][4], "August 7th, 2021")
+
+    def test_generate_performance_matrix(self):
+        """
+        Test generate performance matrix from profile_tasks timings
+        """
+        generate_compatibility_chart(self.results_path, json_file=self.json_file)
+        with open(self.json_file) as f:
+            self.assertNotIn("performance_matrix", json.load(f))
+
+        pathlib.Path(self.results_path + "2021-08-07-default.txt").write_text(
+            PROFILED_MOLECULE_TEST_DUMP
+        )
+        generate_compatibility_chart(self.results_path, json_file=self.json_file)
+        with open(self.json_file) as f:
+            matrix = json.load(f)["performance_matrix"]
+
+        self.assertEqual(len(matrix), 3)
+        self.assertEqual(matrix[1][:4], ["Debian", "10", "62.12s", "14.50s"])
+        self.assertTrue(matrix[2][4].startswith("professormanhattan.snapd"))
+        self.assertIn("Gathering Facts (5.21s)", matrix[2][4])
+        self.assertEqual(matrix[2][5], "August 7th, 2021")
+
+    def test_update_compatibility_chart(self):
+        """
+        Assert updating the chart with a new test file (watch mode) gives the
+        same chart as generating it from scratch
+        """
+        temp_compat = generate_compatibility_chart(
+            self.results_path, json_file=self.json_file
+        )
+
+        new_file = self.results_path + "2021-08-08-default.txt"
+        pathlib.Path(new_file).write_text(
+            MOLECULE_TEST_DUMP.replace("Debian-10", "Fedora-34")
+        )
+        update_compatibility_chart(temp_compat, [new_file], self.json_file, {}, {})
+        updated = self.read_compatibility_matrix()
+
+        generate_compatibility_chart(self.results_path, json_file=self.json_file)
+        self.assertEqual(updated, self.read_compatibility_matrix())
+        self.assertEqual(len(updated), 4)
+
+    def test_watch_compatibility_chart_missing_dir(self):
+        """
+        Test watching a missing molecule results dir
+        """
+        with self.assertRaises(MoleculeTestsNotFound):
+            watch_compatibility_chart(
+                self.base_path + "missing/", json_file=self.json_file
+            )
+
+    def test_watch_compatibility_chart_history(self):
+        """
+        Assert new test files are recorded in the history in watch mode
+        """
+        new_file = self.results_path + "2021-08-08-default.txt"
+        history_file = self.base_path + "history.sqlite"
+
+        def watch_files(path, poll_interval):
+            yield []
+            pathlib.Path(new_file).write_text(
+                MOLECULE_TEST_DUMP.replace("Debian-10", "Fedora-34")
+            )
+            yield [new_file]
+
+        with patch.object(chart, "watch_files", watch_files):
+            watch_compatibility_chart(
+                self.results_path, json_file=self.json_file, history_file=history_file
+            )
+
+        self.assertEqual(len(self.read_compatibility_matrix()), 4)
+        conn = open_history(history_file)
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM test_files").fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(count, 2)
+
+    def test_generate_compatibility_chart_from_stream(self):
+        """
+        Assert the chart is written as soon as the idempotence PLAY RECAP is
+        over, and the rest of the stream is still read
+        """
+        shutil.rmtree(self.results_path)
+        lines = MOLECULE_TEST_DUMP.encode().splitlines(keepends=True)
+        written_before_destroy = []
+
+        def stream():
+            for line in lines:
+                if b"default > destroy" in line:
+                    written_before_destroy.append(pathlib.Path(self.json_file).exists())
+                yield line
+
+        stream = stream()
+        generate_compatibility_chart_from_stream(
+            stream,
+            self.results_path,
+            json_file=self.json_file,
+            test_date=datetime(2021, 8, 7),
+        )
+
+        self.assertEqual(written_before_destroy, [True])
+        self.assertEqual(list(stream), [])
+
+        matrix = self.read_compatibility_matrix()
+        self.assertEqual(len(matrix), 3)
+        self.assertEqual(matrix[1][:2], ["Debian", "10"])
+        self.assertEqual(matrix[1][4], "August 7th, 2021")
+
+    def test_generate_compatibility_chart_from_stream_and_results(self):
+        """
+        Assert tests in the molecule results dir are added to the chart too
+        """
+        dump = MOLECULE_TEST_DUMP.replace("Debian-10", "Fedora-34")
+        stream = iter(dump.encode().splitlines(keepends=True))
+        generate_compatibility_chart_from_stream(
+            stream, self.results_path, json_file=self.json_file
+        )
+
+        matrix = self.read_compatibility_matrix()
+        self.assertEqual(
+            [row[0] for row in matrix[1:]], ["Debian", "Ubuntu", "Fedora"]
+        )
+
+    def test_generate_compatibility_chart_from_cache(self):
+        """
+        Assert unchanged test files are not parsed again
+        """
+        generate_compatibility_chart(self.results_path, json_file=self.json_file)
+        expected = self.read_compatibility_matrix()
+
+        with patch("ansibler.compatibility.chart.read_molecule_tests") as mock_read:
+            generate_compatibility_chart(self.results_path, json_file=self.json_file)
+            mock_read.assert_not_called()
+
+        self.assertEqual(self.read_compatibility_matrix(), expected)
+
+    def test_generate_compatibility_chart_jobs(self):
+        """
+        Assert parsing with a process pool gives the same chart as a serial run
+        """
+        failed_dump = MOLECULE_TEST_DUMP.replace("failed=0", "failed=2")
+        for name, dump in (
+            ("2021-08-07-other.txt", failed_dump),
+            ("2021-08-08-default.txt", failed_dump.replace("Ubuntu", "Fedora")),
+            ("2021-08-06-default.txt.gz", None),
+        ):
+            if dump is not None:
+                pathlib.Path(self.results_path + name).write_text(dump)
+            else:
+                with gzip.open(self.results_path + name, "wt") as f:
+                    f.write(MOLECULE_TEST_DUMP.replace("Debian", "Archlinux"))
+
+        generate_compatibility_chart(
+            self.results_path, json_file=self.json_file, use_cache=False
+        )
+        expected = self.read_compatibility_matrix()
+
+        generate_compatibility_chart(
+            self.results_path, json_file=self.json_file, use_cache=False, jobs=2
+        )
+        self.assertEqual(self.read_compatibility_matrix(), expected)
+        self.assertEqual(len(expected), 5)
+
+    def test_read_test_files_removed(self):
+        """
+        Assert test files removed before they're parsed are skipped, in
+        parallel too
+        """
+        test_files = [
+            self.results_path + "2021-08-07-default.txt",
+            self.results_path + "2021-08-08-default.txt",
+        ]
+
+        for jobs in (1, 2):
+            tests, _ = read_test_files(test_files, {}, {}, jobs=jobs)
+            self.assertIsNotNone(tests[0])
+            self.assertIsNone(tests[1])
+
+    def test_get_test_file_oses(self):
+        """
+        Assert test files without hosts aren't reported as having no OSes, so
+        newest-first reading doesn't skip them
+        """
+        test_file = self.results_path + "2021-08-07-default.txt"
+        self.assertEqual(
+            get_test_file_oses(test_file, {}, {}),
+            {"Ubuntu-20.04 (Focal)", "Debian-10"},
+        )
+
+        pathlib.Path(test_file).write_text("PLAY [Converge] ******\n")
+        self.assertIsNone(get_test_file_oses(test_file, {}, {}))
+
+    def test_generate_compatibility_chart_newest_first(self):
+        """
+        Assert reading newest first gives the same chart, without parsing test
+        files that can't contribute to it
+        """
+        older_dump = MOLECULE_TEST_DUMP.replace("failed=0", "failed=2")
+        for day in range(1, 7):
+            pathlib.Path(self.results_path + f"2021-08-0{day}-default.txt").write_text(
+                older_dump
+            )
+
+        generate_compatibility_chart(
+            self.results_path, json_file=self.json_file, use_cache=False
+        )
+        expected = self.read_compatibility_matrix()
+
+        with patch(
+            "ansibler.compatibility.chart.read_molecule_tests",
+            wraps=chart.read_molecule_tests,
+        ) as mock_read:
+            generate_compatibility_chart(
+                self.results_path,
+                json_file=self.json_file,
+                use_cache=False,
+                newest_first=True,
+            )
+            self.assertEqual(mock_read.call_count, 1)
+
+        self.assertEqual(self.read_compatibility_matrix(), expected)
+
+    def test_generate_compatibility_chart_newest_first_new_os(self):
+        """
+        Assert an OS only tested in an older test file, added after the last
+        run, still makes it to the chart when reading newest first
+        """
+        generate_compatibility_chart(
+            self.results_path, json_file=self.json_file, newest_first=True
+        )
+        pathlib.Path(self.results_path + "2021-08-01-default.txt").write_text(
+            MOLECULE_TEST_DUMP.replace("Debian-10", "Fedora-34")
+        )
+
+        generate_compatibility_chart(
+            self.results_path, json_file=self.json_file, newest_first=True
+        )
+
+        oses = [row[0] for row in self.read_compatibility_matrix()[1:]]
+        self.assertIn("Fedora", oses)
+        self.assertEqual(len(oses), 3)
+
+    def test_generate_compatibility_chart_newest_first_warning(self):
+        """
+        Assert a warning is printed when files whose OSes can't be read cheaply
+        are skipped
+        """
+        generate_compatibility_chart(
+            self.results_path, json_file=self.json_file, use_cache=False
+        )
+        pathlib.Path(self.results_path + "2021-08-01-default.txt").write_text(
+            MOLECULE_TEST_DUMP.replace("Debian-10", "Fedora-34")
+        )
+
+        with patch("builtins.print") as mock_print:
+            generate_compatibility_chart(
+                self.results_path,
+                json_file=self.json_file,
+                use_cache=False,
+                strip_ansi=True,
+                newest_first=True,
+            )
+
+        printed = [call.args[0] for call in mock_print.call_args_list]
+        self.assertTrue(
+            any(
+                line.startswith("Skipped 1 older molecule test file(s) without")
+                for line in printed
+            )
+        )
@@ -0,0 +1,114 @@
+from unittest import TestCase
+from unittest.mock import patch
+from datetime import date
+import gzip
+import json
+import os
+import pathlib
+import shutil
+from ansibler.compatibility import cache
+from ansibler.compatibility.chart import generate_compatibility_chart
+from ansibler.compatibility.compaction import compact_molecule_results
+from test.test_molecule.test_parse import MOLECULE_TEST_DUMP
+
+
+class TestCompaction(TestCase):
+    TEST_FILES = {
+        "2021-08-01-default.txt": MOLECULE_TEST_DUMP,
+        "2021-08-03-default.txt": MOLECULE_TEST_DUMP.replace("Debian-10", "Fedora-34"),
+        "2021-08-05-default.txt": MOLECULE_TEST_DUMP.replace("failed=1", "failed=0"),
+        "2021-08-06-broken.txt": "PLAY [Create]",
+    }
+
+    def setUp(self) -> None:
+        """
+        Test case setup
+        """
+        self.base_path = "./test/test_compatibility/compaction/"
+        self.results_path = self.base_path + "results/"
+        self.json_file = self.base_path + "ansibler.json"
+        pathlib.Path(self.results_path).mkdir(parents=True, exist_ok=True)
+
+        for name, test in self.TEST_FILES.items():
+            pathlib.Path(self.results_path + name).write_text(test)
+
+        self.mock_cache_dir = patch.object(
+            cache, "CACHE_MAP_DIR", self.base_path + "cache/"
+        )
+        self.mock_cache_dir.start()
+
+    def tearDown(self) -> None:
+        """
+        Test case cleanup
+        """
+        self.mock_cache_dir.stop()
+        shutil.rmtree(self.base_path)
+
+    def generate_compatibility_matrix(self):
+        """
+        Generates the chart and returns compatibility_matrix
+        """
+        generate_compatibility_chart(self.results_path, json_file=self.json_file)
+        with open(self.json_file) as f:
+            return json.load(f)["compatibility_matrix"]
+
+    def test_compact_molecule_results(self):
+        """
+        Assert superseded test files are archived, and the chart doesn't change
+        """
+        matrix = self.generate_compatibility_matrix()
+
+        index = compact_molecule_results(self.results_path, today=date(2021, 9, 30))
+
+        self.assertEqual(
+            sorted(os.listdir(self.results_path)),
+            [
+                "2021-08-03-default.txt",
+                "2021-08-05-default.txt",
+                "2021-08-06-broken.txt",
+                "archive",
+            ],
+        )
+        with gzip.open(
+            self.results_path + "archive/2021-08-01-default.txt.gz", "rt"
+        ) as f:
+            self.assertEqual(f.read(), MOLECULE_TEST_DUMP)
+
+        self.assertEqual(
+            index["files"]["2021-08-01-default.txt"],
+            {
+                "date": "2021-08-01",
+                "archive": "archive/2021-08-01-default.txt.gz",
+                "results": [
+                    ["Debian", "10", True, True],
+                    ["Ubuntu", "20.04 (Focal)", False, False],
+                ],
+            },
+        )
+        with open(self.results_path + "archive/index.json") as f:
+            self.assertEqual(json.load(f), index)
+
+        self.assertEqual(self.generate_compatibility_matrix(), matrix)
+
+    def test_compact_molecule_results_window(self):
+        """
+        Assert test files in the history window are kept
+        """
+        compact_molecule_results(self.results_path, today=date(2021, 8, 20))
+        self.assertEqual(len(os.listdir(self.results_path)), 4)
+
+        compact_molecule_results(
+            self.results_path, keep_days=15, today=date(2021, 8, 20)
+        )
+        self.assertNotIn("2021-08-01-default.txt", os.listdir(self.results_path))
+
+    def test_compact_molecule_results_delete(self):
+        """
+        Assert compacted test files can be deleted instead, the index is kept
+        """
+        index = compact_molecule_results(
+            self.results_path, delete=True, today=date(2021, 9, 30)
+        )
+
+        self.assertEqual(os.listdir(self.results_path + "archive"), ["index.json"])
+        self.assertIsNone(index["files"]["2021-08-01-default.txt"]["archive"])
@@ -0,0 +1,169 @@
+from unittest import TestCase
+from unittest.mock import patch
+from datetime import datetime
+import json
+import os
+import pathlib
+import shutil
+from ansibler.compatibility import cache, chart
+from ansibler.compatibility.chart import generate_compatibility_chart
+from ansibler.compatibility.history import (
+    get_history_role,
+    open_history,
+    print_os_history,
+    query_os_history,
+)
+from test.test_molecule.test_parse import MOLECULE_TEST_DUMP
+
+
+class TestCompatibilityHistory(TestCase):
+    def setUp(self) -> None:
+        """
+        Test case setup
+        """
+        self.base_path = "./test/test_compatibility/history/"
+        self.results_path = self.base_path + "snapd/results/"
+        self.json_file = self.base_path + "snapd/ansibler.json"
+        self.history_file = self.base_path + "history.sqlite"
+        pathlib.Path(self.results_path).mkdir(parents=True, exist_ok=True)
+        pathlib.Path(self.results_path + "2021-08-07-default.txt").write_text(
+            MOLECULE_TEST_DUMP
+        )
+
+        self.mock_cache_dir = patch.object(
+            cache, "CACHE_MAP_DIR", self.base_path + "cache/"
+        )
+        self.mock_cache_dir.start()
+
+    def tearDown(self) -> None:
+        """
+        Test case cleanup
+        """
+        self.mock_cache_dir.stop()
+        shutil.rmtree(self.base_path)
+
+    def generate(self, **kwargs):
+        """
+        Generates the compatibility chart from the history, returns
+        compatibility_matrix
+        """
+        generate_compatibility_chart(
+            self.results_path,
+            json_file=self.json_file,
+            history_file=self.history_file,
+            **kwargs,
+        )
+        with open(self.json_file) as f:
+            return json.load(f)["compatibility_matrix"]
+
+    def test_get_history_role(self):
+        """
+        Test the role name is the name of the output JSON file's dir
+        """
+        self.assertEqual(get_history_role(self.json_file), "snapd")
+
+    def test_generate_compatibility_chart_from_history(self):
+        """
+        Assert the chart built from the history matches the one built from
+        the test files
+        """
+        matrix = self.generate(use_cache=False)
+
+        generate_compatibility_chart(
+            self.results_path, json_file=self.json_file, use_cache=False
+        )
+        with open(self.json_file) as f:
+            self.assertEqual(matrix, json.load(f)["compatibility_matrix"])
+
+    def test_recorded_test_files_are_not_parsed(self):
+        """
+        Assert test files are parsed once, and kept in the history after they
+        are removed
+        """
+        first = self.generate(use_cache=False)
+
+        with patch.object(chart, "read_molecule_tests") as mock_read:
+            self.assertEqual(self.generate(use_cache=False), first)
+            mock_read.assert_not_called()
+
+        os.remove(self.results_path + "2021-08-07-default.txt")
+        self.assertEqual(self.generate(use_cache=False), first)
+
+    def test_newer_test_file_replaces_os(self):
+        """
+        Assert newer tests replace older ones in the chart, without removing
+        them from the history
+        """
+        self.generate(use_cache=False)
+        pathlib.Path(self.results_path + "2021-08-09-default.txt").write_text(
+            MOLECULE_TEST_DUMP.replace("failed=1", "failed=0")
+        )
+
+        matrix = self.generate(use_cache=False)
+        self.assertEqual(len(matrix), 3)
+        self.assertIn("✅", matrix[2][2])
+        self.assertEqual(matrix[2][4], "August 9th, 2021")
+
+        conn = open_history(self.history_file)
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM recaps").fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(count, 4)
+
+    def test_retested_os_keeps_its_row(self):
+        """
+        Assert OSes keep their rows when they're tested again, like in charts
+        built from test files
+        """
+        self.generate(use_cache=False)
+        pathlib.Path(self.results_path + "2021-08-09-default.txt").write_text(
+            MOLECULE_TEST_DUMP.replace("Ubuntu-20.04-focal", "Fedora-34")
+        )
+
+        matrix = self.generate(use_cache=False)
+
+        self.assertEqual(
+            [row[1] for row in matrix[1:]], ["10", "20.04 (Focal)", "34"]
+        )
+        self.assertEqual(matrix[1][4], "August 9th, 2021")
+        self.assertEqual(self.generate(use_cache=False), matrix)
+
+    def test_query_os_history(self):
+        """
+        Test when an OS was last tested and last passed
+        """
+        self.generate(use_cache=False)
+        pathlib.Path(self.results_path + "2021-08-09-default.txt").write_text(
+            MOLECULE_TEST_DUMP.replace("failed=0", "failed=2")
+        )
+        self.generate(use_cache=False)
+
+        conn = open_history(self.history_file)
+        try:
+            debian = query_os_history(conn, "Debian-10")
+            ubuntu = query_os_history(conn, "Ubuntu-20.04-focal", role="snapd")
+            other_role = query_os_history(conn, "Debian-10", role="homebrew")
+        finally:
+            conn.close()
+
+        self.assertEqual(
+            debian,
+            [
+                {
+                    "role": "snapd",
+                    "last_tested": datetime(2021, 8, 9),
+                    "last_success": False,
+                    "last_passed": datetime(2021, 8, 7),
+                }
+            ],
+        )
+        self.assertIsNone(ubuntu[0]["last_passed"])
+        self.assertEqual(other_role, [])
+
+        with patch("builtins.print") as mock_print:
+            print_os_history("Debian-10", history_file=self.history_file)
+        mock_print.assert_called_once_with(
+            "snapd: Debian-10 last passed on 2021-08-07 (last tested on "
+            "2021-08-09, failed)"
+        )
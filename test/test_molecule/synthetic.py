@@ -0,0 +1,309 @@
+import json
+import random
+import uuid
+from typing import Dict, List, Optional
+
+
+OS_IMAGES = [
+    "Archlinux-latest",
+    "CentOS-7",
+    "CentOS-8-stream",
+    "Debian-10-buster",
+    "Debian-11-bullseye",
+    "Fedora-34",
+    "Fedora-35",
+    "Ubuntu-18.04-bionic",
+    "Ubuntu-20.04-focal",
+    "Ubuntu-21.10-impish",
+]
+
+COLORS = {"ok": "0;32", "changed": "0;33", "skipping": "0;36", "header": "1;35"}
+PLAY_STARS = "*" * 60
+PROFILE_TASKS_WIDTH = 79
+
+
+def get_hosts(host_count: int, parallel: Optional[bool] = False) -> List[str]:
+    """
+    Returns molecule host names, optionally with molecule's parallel ID suffix.
+
+    Args:
+        host_count (int): number of hosts
+        parallel (bool, optional): add parallel IDs. Defaults to False.
+
+    Returns:
+        List[str]: host names
+    """
+    hosts = [OS_IMAGES[i % len(OS_IMAGES)] for i in range(host_count)]
+    if parallel:
+        hosts = [f"{host}-{uuid.uuid4()}" for host in hosts]
+    return hosts
+
+
+def colorize(text: str, color: str, colors: bool) -> str:
+    """
+    Wraps text in an ANSI color escape sequence when colors are enabled.
+    """
+    return f"\x1b[{COLORS[color]}m{text}\x1b[0m" if colors else text
+
+
+def generate_play(
+    name: str,
+    hosts: List[str],
+    task_count: int,
+    rng: random.Random,
+    verbosity: Optional[int] = 0,
+    colors: Optional[bool] = False,
+    changed: Optional[bool] = True,
+    profile_tasks: Optional[bool] = False,
+) -> List[str]:
+    """
+    Generates the output of a play, PLAY RECAP included.
+
+    Args:
+        name (str): play name
+        hosts (List[str]): host names
+        task_count (int): number of tasks
+        rng (random.Random): random number generator
+        verbosity (int, optional): ansible verbosity (number of -v)
+        colors (bool, optional): add ANSI colors
+        changed (bool, optional): whether tasks report changes
+        profile_tasks (bool, optional): add profile_tasks callback output
+
+    Returns:
+        List[str]: play output lines
+    """
+    lines = [colorize(f"PLAY [{name}] {PLAY_STARS}", "header", colors), ""]
+    counters = {host: {"ok": 0, "changed": 0, "skipped": 0} for host in hosts}
+    durations, elapsed = {}, 0.0
+
+    for task in range(task_count):
+        lines.append(f"TASK [role : Task number {task}] {PLAY_STARS}")
+
+        if profile_tasks:
+            previous = durations.get(f"role : Task number {task - 1}", 0.0)
+            lines.append(profile_tasks_timestamp(previous, elapsed))
+            durations[f"role : Task number {task}"] = round(rng.uniform(0, 30), 2)
+            elapsed += durations[f"role : Task number {task}"]
+
+        for host in hosts:
+            status = rng.choice(["ok", "changed", "skipping"] if changed else ["ok"])
+            counters[host]["skipped" if status == "skipping" else "ok"] += 1
+            if status == "changed":
+                counters[host]["changed"] += 1
+
+            line = f"{status}: [{host}]"
+            if verbosity:
+                result = {"changed": status == "changed", "rc": 0, "stdout": ""}
+                if verbosity > 2:
+                    result["invocation"] = {
+                        "module_args": {"name": f"package-{task}", "state": "present"}
+                    }
+                line += f" => {json.dumps(result)}"
+
+            lines.append(colorize(line, status, colors))
+
+        lines.append("")
+
+    lines.append(f"PLAY RECAP {PLAY_STARS}")
+    for host in hosts:
+        c = counters[host]
+        lines.append(
+            colorize(f"{host:<26}", "changed" if c["changed"] else "ok", colors)
+            + f" : ok={c['ok']:<4} changed={c['changed']:<4} unreachable=0    "
+            f"failed=0    skipped={c['skipped']:<4} rescued=0    ignored=0"
+        )
+    lines.append("")
+
+    if profile_tasks:
+        lines += profile_tasks_summary(durations, elapsed)
+
+    return lines
+
+
+def generate_json_play(
+    name: str,
+    hosts: List[str],
+    task_count: int,
+    rng: random.Random,
+    changed: Optional[bool] = True,
+) -> List[str]:
+    """
+    Generates the output of a play with the json stdout callback (a single
+    JSON document, stats included).
+
+    Args:
+        name (str): play name
+        hosts (List[str]): host names
+        task_count (int): number of tasks
+        rng (random.Random): random number generator
+        changed (bool, optional): whether tasks report changes
+
+    Returns:
+        List[str]: play output lines
+    """
+    counters = {
+        host: {
+            "changed": 0,
+            "failures": 0,
+            "ignored": 0,
+            "ok": 0,
+            "rescued": 0,
+            "skipped": 0,
+            "unreachable": 0,
+        }
+        for host in hosts
+    }
+    tasks = []
+
+    for task in range(task_count):
+        results = {}
+        for host in hosts:
+            status = rng.choice(["ok", "changed", "skipping"] if changed else ["ok"])
+            counters[host]["skipped" if status == "skipping" else "ok"] += 1
+            if status == "changed":
+                counters[host]["changed"] += 1
+
+            results[host] = {
+                "_ansible_no_log": False,
+                "action": "package",
+                "changed": status == "changed",
+                "invocation": {
+                    "module_args": {"name": f"package-{task}", "state": "present"}
+                },
+                "skipped": status == "skipping",
+                "stdout": "",
+            }
+
+        tasks.append(
+            {
+                "hosts": results,
+                "task": {
+                    "duration": {
+                        "end": f"2021-10-17T20:43:{task % 60:02d}.500000Z",
+                        "start": f"2021-10-17T20:43:{task % 60:02d}.000000Z",
+                    },
+                    "id": str(uuid.UUID(int=task)),
+                    "name": f"role : Task number {task}",
+                },
+            }
+        )
+
+    document = {
+        "custom_stats": {},
+        "global_custom_stats": {},
+        "plays": [
+            {
+                "play": {
+                    "duration": {
+                        "end": "2021-10-17T20:44:02.123000Z",
+                        "start": "2021-10-17T20:43:00.000000Z",
+                    },
+                    "id": str(uuid.UUID(int=task_count)),
+                    "name": name,
+                },
+                "tasks": tasks,
+            }
+        ],
+        "stats": counters,
+    }
+
+    return json.dumps(document, indent=4, sort_keys=True).splitlines()
+
+
+def profile_tasks_timestamp(previous: float, elapsed: float) -> str:
+    """
+    Formats a profile_tasks timestamp line (previous task and total duration).
+    """
+
+    def duration(seconds: float) -> str:
+        minutes, seconds = divmod(seconds, 60)
+        return f"{int(minutes // 60)}:{int(minutes % 60):02d}:{seconds:06.3f}"
+
+    return (
+        f"Sunday 17 October 2021  20:43:06 +0000 ({duration(previous)})"
+        f"       {duration(elapsed)} {'*' * 25}"
+    )
+
+
+def profile_tasks_summary(durations: Dict[str, float], elapsed: float) -> List[str]:
+    """
+    Formats the summary the profile_tasks callback prints after a play.
+    """
+    lines = [
+        profile_tasks_timestamp(list(durations.values() or [0.0])[-1], elapsed),
+        "=" * PROFILE_TASKS_WIDTH,
+    ]
+
+    slowest = sorted(durations.items(), key=lambda d: d[1], reverse=True)[:20]
+    for task, seconds in slowest:
+        lines.append(
+            "{0:-<{2}}{1:->9}".format(f"{task} ", f" {seconds:.2f}s", 70)
+        )
+
+    return lines
+
+
+def generate_molecule_log(
+    host_count: Optional[int] = 4,
+    task_count: Optional[int] = 20,
+    verbosity: Optional[int] = 0,
+    colors: Optional[bool] = False,
+    parallel: Optional[bool] = False,
+    scenario: Optional[str] = "default",
+    seed: Optional[int] = 0,
+    profile_tasks: Optional[bool] = False,
+    callback: Optional[str] = "default",
+) -> str:
+    """
+    Generates a realistic `molecule test` log: create, converge, idempotence,
+    verify and destroy.
+
+    Args:
+        host_count (int, optional): number of hosts (OS images)
+        task_count (int, optional): number of tasks in the role
+        verbosity (int, optional): ansible verbosity (number of -v)
+        colors (bool, optional): add ANSI colors
+        parallel (bool, optional): add molecule parallel IDs to host names
+        scenario (str, optional): scenario name
+        seed (int, optional): random seed
+        profile_tasks (bool, optional): add profile_tasks callback output
+        callback (str, optional): stdout callback (default or json)
+
+    Returns:
+        str: molecule log
+    """
+    rng = random.Random(seed)
+    hosts = get_hosts(host_count, parallel=parallel)
+
+    def info(action: str) -> str:
+        return colorize("INFO", "header", colors) + f"     Running {scenario} > {action}"
+
+    if callback == "json":
+        lines = [info("create")]
+        lines += generate_json_play("Create", ["localhost"], 3, rng)
+        lines += [info("converge")]
+        lines += generate_json_play("Converge", hosts, task_count, rng)
+        lines += [info("idempotence")]
+        lines += generate_json_play("Converge", hosts, task_count, rng, False)
+        lines += ["INFO     Idempotence completed successfully.", info("verify")]
+        lines += generate_json_play("Verify", hosts, 2, rng, False)
+        lines += [info("destroy")]
+        lines += generate_json_play("Destroy", ["localhost"], 2, rng)
+        return "\n".join(lines) + "\n"
+
+    lines = [info("create"), ""]
+    lines += generate_play("Create", ["localhost"], 3, rng, verbosity, colors)
+    lines += [info("converge"), ""]
+    lines += generate_play(
+        "Converge", hosts, task_count, rng, verbosity, colors, True, profile_tasks
+    )
+    lines += [info("idempotence"), ""]
+    lines += generate_play(
+        "Converge", hosts, task_count, rng, verbosity, colors, False, profile_tasks
+    )
+    lines += ["INFO     Idempotence completed successfully.", info("verify"), ""]
+    lines += generate_play("Verify", hosts, 2, rng, verbosity, colors, changed=False)
+    lines += [info("destroy"), ""]
+    lines += generate_play("Destroy", ["localhost"], 2, rng, verbosity, colors)
+
+    return "\n".join(lines) + "\n"
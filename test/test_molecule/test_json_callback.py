@@ -0,0 +1,198 @@
+import gzip
+import io
+import json
+import pathlib
+import shutil
+from unittest import TestCase
+from ansibler.exceptions.ansibler import MoleculeTestParseError
+from ansibler.molecule_test.json_callback import (
+    is_json_callback_buffer,
+    parse_json_callback_buffer,
+    parse_json_callback_stream,
+    sniff_json_callback,
+)
+from ansibler.molecule_test.parse import parse_test
+from ansibler.molecule_test.read import read_test_file, read_test_hosts
+from test.test_molecule.test_parse import MOLECULE_TEST_DUMP
+
+
+def json_callback_document(play_name, stats, indent=4):
+    """
+    Dumps a json stdout callback document, the way ansible does
+    """
+    document = {
+        "custom_stats": {},
+        "global_custom_stats": {},
+        "plays": [
+            {
+                "play": {
+                    "duration": {
+                        "end": "2021-10-17T20:44:02.123000Z",
+                        "start": "2021-10-17T20:43:00.000000Z",
+                    },
+                    "id": "0242ac11-0002-5a2e-6b24-000000000006",
+                    "name": play_name,
+                },
+                "tasks": [
+                    {
+                        "hosts": {
+                            host: {"changed": False, "stats": {"ok": 1}}
+                            for host in stats
+                        },
+                        "task": {"name": "Gathering Facts"},
+                    }
+                ],
+            }
+        ],
+        "stats": stats,
+    }
+    return json.dumps(document, indent=indent, sort_keys=True)
+
+
+def host_stats(ok, changed, failures=0):
+    """
+    Stats of a host
+    """
+    return {
+        "changed": changed,
+        "failures": failures,
+        "ignored": 0,
+        "ok": ok,
+        "rescued": 0,
+        "skipped": 4,
+        "unreachable": 0,
+    }
+
+
+def json_callback_dump(indent=4):
+    """
+    Same molecule test as MOLECULE_TEST_DUMP, with the json stdout callback
+    """
+    return "\n".join(
+        [
+            "INFO     Running default > create",
+            json_callback_document(
+                "Create", {"localhost": host_stats(1, 1)}, indent=indent
+            ),
+            "INFO     Running default > converge",
+            json_callback_document(
+                "Converge",
+                {
+                    "Debian-10": host_stats(16, 3),
+                    "Ubuntu-20.04-focal": host_stats(15, 3, failures=1),
+                },
+                indent=indent,
+            ),
+            "INFO     Running default > idempotence",
+            json_callback_document(
+                "Converge",
+                {
+                    "Debian-10": host_stats(16, 0),
+                    "Ubuntu-20.04-focal": host_stats(15, 1),
+                },
+                indent=indent,
+            ),
+            "INFO     Idempotence completed successfully.",
+            "INFO     Running default > destroy",
+            json_callback_document(
+                "Destroy", {"localhost": host_stats(2, 2)}, indent=indent
+            ),
+            "",
+        ]
+    )
+
+
+JSON_CALLBACK_DUMP = json_callback_dump()
+
+
+class TestJsonCallback(TestCase):
+    def setUp(self) -> None:
+        """
+        Test case setup
+        """
+        self.results_path = "./test/test_molecule/json_results/"
+        pathlib.Path(self.results_path).mkdir(parents=True, exist_ok=True)
+
+    def tearDown(self) -> None:
+        """
+        Test case cleanup
+        """
+        shutil.rmtree(self.results_path)
+
+    def assert_same_recaps(self, res):
+        """
+        Asserts play recaps match the ones of the text molecule test
+        """
+        expected = parse_test(MOLECULE_TEST_DUMP)
+        self.assertEqual(
+            res["converge"]["play_recap"], expected["converge"]["play_recap"]
+        )
+        self.assertEqual(
+            res["idempotence"]["play_recap"], expected["idempotence"]["play_recap"]
+        )
+
+    def test_parse_json_callback_buffer(self):
+        """
+        Test parse json callback output from a buffer
+        """
+        res = parse_json_callback_buffer(JSON_CALLBACK_DUMP.encode())
+        self.assert_same_recaps(res)
+        self.assertEqual(res["converge"]["duration"], 62.123)
+
+    def test_parse_json_callback_stream(self):
+        """
+        Assert streaming returns the same as parsing a buffer
+        """
+        stream = io.StringIO(JSON_CALLBACK_DUMP)
+        self.assertEqual(
+            parse_json_callback_stream(stream),
+            parse_json_callback_buffer(JSON_CALLBACK_DUMP.encode()),
+        )
+
+    def test_parse_json_callback_no_indent(self):
+        """
+        Test parse json callback documents dumped on a single line
+        """
+        dump = json_callback_dump(indent=None)
+        self.assert_same_recaps(parse_json_callback_buffer(dump.encode()))
+        self.assert_same_recaps(parse_json_callback_stream(dump.splitlines()))
+
+    def test_parse_json_callback_no_converge(self):
+        """
+        Assert an exception is raised when there's no converge play
+        """
+        dump = JSON_CALLBACK_DUMP.replace('"Converge"', '"Prepare"')
+        with self.assertRaises(MoleculeTestParseError):
+            _ = parse_json_callback_buffer(dump.encode())
+
+    def test_sniff_json_callback(self):
+        """
+        Test detect json callback output, without losing the lines read
+        """
+        self.assertTrue(is_json_callback_buffer(JSON_CALLBACK_DUMP.encode()))
+        self.assertFalse(is_json_callback_buffer(MOLECULE_TEST_DUMP.encode()))
+
+        lines = iter(MOLECULE_TEST_DUMP.splitlines())
+        json_callback, sniffed = sniff_json_callback(lines)
+        self.assertFalse(json_callback)
+        # Stopped reading at PLAY [Create], the lines read are kept
+        self.assertEqual(next(lines), "")
+        self.assertEqual(list(sniffed)[:3], MOLECULE_TEST_DUMP.splitlines()[:3])
+
+        json_callback, _ = sniff_json_callback(JSON_CALLBACK_DUMP.splitlines())
+        self.assertTrue(json_callback)
+
+    def test_read_json_callback_test_file(self):
+        """
+        Assert read_test_file picks the json callback parser
+        """
+        test_file = self.results_path + "2021-08-07-default.txt"
+        pathlib.Path(test_file).write_text(JSON_CALLBACK_DUMP)
+        self.assert_same_recaps(read_test_file(test_file, tail_first=True))
+        self.assertEqual(
+            read_test_hosts(test_file), [("Debian", "10"), ("Ubuntu", "20.04 (Focal)")]
+        )
+
+        with gzip.open(test_file + ".gz", "wt") as f:
+            f.write(JSON_CALLBACK_DUMP)
+        self.assert_same_recaps(read_test_file(test_file + ".gz"))
@@ -1,12 +1,80 @@
+import io
 from unittest import TestCase
-from unittest.mock import patch
 from ansibler.molecule_test.parse import (
+    RecapRecord,
+    index_play_recap,
     parse_play_name,
     parse_play_recap,
     parse_os,
     parse_recap_value,
+    parse_test,
+    parse_test_stream,
+    strip_ansi,
     OK_COUNT_PATTERN,
 )
+from ansibler.exceptions.ansibler import MoleculeTestParseError
+
+
+MOLECULE_TEST_DUMP = """INFO     Running default > create
+
+PLAY [Create] ******************************************************************
+
+TASK [Create molecule instance(s)] *********************************************
+changed: [localhost]
+
+PLAY RECAP *********************************************************************
+localhost                  : ok=1    changed=1    unreachable=0    failed=0    skipped=0    rescued=0    ignored=0
+
+INFO     Running default > converge
+
+PLAY [Converge] ****************************************************************
+
+TASK [Gathering Facts] *********************************************************
+ok: [Debian-10]
+ok: [Ubuntu-20.04-focal]
+
+PLAY RECAP *********************************************************************
+Debian-10                  : ok=16   changed=3    unreachable=0    failed=0    skipped=4    rescued=0    ignored=0
+Ubuntu-20.04-focal         : ok=15   changed=3    unreachable=0    failed=1    skipped=4    rescued=0    ignored=0
+
+INFO     Running default > idempotence
+
+PLAY [Converge] ****************************************************************
+
+TASK [Gathering Facts] *********************************************************
+ok: [Debian-10]
+ok: [Ubuntu-20.04-focal]
+
+PLAY RECAP *********************************************************************
+Debian-10                  : ok=16   changed=0    unreachable=0    failed=0    skipped=4    rescued=0    ignored=0
+Ubuntu-20.04-focal         : ok=15   changed=1    unreachable=0    failed=0    skipped=4    rescued=0    ignored=0
+
+INFO     Idempotence completed successfully.
+INFO     Running default > destroy
+
+PLAY [Destroy] *****************************************************************
+
+PLAY RECAP *********************************************************************
+localhost                  : ok=2    changed=2    unreachable=0    failed=0    skipped=0    rescued=0    ignored=0
+
+"""
+
+PROFILE_TASKS_SUMMARY = """
+Playbook run took 0 days, 0 hours, 1 minutes, 2 seconds
+Sunday 17 October 2021  20:43:06 +0000 (0:00:00.612)       0:01:02.123 *******
+===============================================================================
+professormanhattan.snapd : Ensure snapd is installed ------------------- 25.32s
+Gathering Facts --------------------------------------------------------- 5.21s
+professormanhattan.snapd : Ensure the snap command is available --------- 0.61s"""
+
+PROFILED_MOLECULE_TEST_DUMP = MOLECULE_TEST_DUMP.replace(
+    "\nINFO     Running default > idempotence",
+    PROFILE_TASKS_SUMMARY + "\nINFO     Running default > idempotence",
+).replace(
+    "\nINFO     Idempotence completed",
+    PROFILE_TASKS_SUMMARY.replace("0:01:02.123", "0:00:14.500")
+    + "\nINFO     Idempotence completed",
+)
 
 
 class TestParseMolecule(TestCase):
@@ -18,38 +86,38 @@ class TestParseMolecule(TestCase):
         res = parse_play_name(dump)
         self.assertEqual(res, "idempotence")
 
-    @patch("ansibler.molecule_test.parse.parse_play_recap_dump")
-    def test_parse_play_recap(self, mock_parse_play_recap_dump):
+    def test_parse_play_recap(self):
         """
         Test parse play recap
-
-        Args:
-            mock_parse_play_recap_dump (Mock): parse play recap dump mock
         """
         play_recap = (
-            "Debian-10: ok=16 changed=0 unreachable=0 failed=0 "
-            "skipped=4 rescued=0 ignored=0\nUbuntu-20.04: ok=16 "
+            "PLAY RECAP *****\n"
+            "Debian-10 : ok=16 changed=0 unreachable=0 failed=0 "
+            "skipped=4 rescued=0 ignored=0\nUbuntu-20.04 : ok=16 "
             "changed=0 unreachable=0 failed=0 skipped=4 rescued=0 "
             "ignored=0"
         )
-        mock_parse_play_recap_dump.return_value = play_recap
 
         res = parse_play_recap(play_recap)
-        expected_recap = {
-            "ok": 16,
-            "changed": 0,
-            "unreachable": 0,
-            "failed": 0,
-            "skipped": 4,
-            "rescued": 0,
-            "ignored": 0,
-        }
         expected_recap = [
-            {"os_name": "Debian", "os_version": "10", **expected_recap},
-            {"os_name": "Ubuntu", "os_version": "20.04", **expected_recap},
+            RecapRecord("Debian", "10", 16, 0, 0, 0, 4, 0, 0),
+            RecapRecord("Ubuntu", "20.04", 16, 0, 0, 0, 4, 0, 0),
         ]
 
         self.assertEqual(res, expected_recap)
+        self.assertEqual(res[1].os, ("Ubuntu", "20.04"))
+        self.assertEqual(res[1].skipped, 4)
+
+    def test_index_play_recap(self):
+        """
+        Test index play recap by OS (first occurrence wins)
+        """
+        debian = RecapRecord("Debian", "10", 16, 0, 0, 0, 4, 0, 0)
+        ubuntu = RecapRecord("Ubuntu", "20.04", 16, 1, 0, 0, 4, 0, 0)
+
+        index = index_play_recap([debian, ubuntu, debian._replace(changed=2)])
+
+        self.assertEqual(index, {("Debian", "10"): debian, ("Ubuntu", "20.04"): ubuntu})
 
     def test_parse_os(self):
         """
@@ -78,3 +146,76 @@ class TestParseMolecule(TestCase):
         """
         res = parse_recap_value(OK_COUNT_PATTERN, "")
         self.assertEqual(res, -1)
+
+    def test_parse_test_stream(self):
+        """
+        Test parse converge and idempotence recaps from a line iterator
+        """
+        res = parse_test_stream(iter(MOLECULE_TEST_DUMP.splitlines(keepends=True)))
+        converge = res["converge"]["play_recap"]
+        idempotence = res["idempotence"]["play_recap"]
+
+        self.assertEqual([r.os_name for r in converge], ["Debian", "Ubuntu"])
+        self.assertEqual(converge[1].os_version, "20.04 (Focal)")
+        self.assertEqual(converge[0].changed, 3)
+        self.assertEqual(converge[1].failed, 1)
+        self.assertEqual([r.changed for r in idempotence], [0, 1])
+
+    def test_parse_test_stream_matches_parse_test(self):
+        """
+        Assert streaming a file handle returns the same as parsing a string
+        """
+        stream = io.StringIO(MOLECULE_TEST_DUMP)
+        self.assertEqual(parse_test_stream(stream), parse_test(MOLECULE_TEST_DUMP))
+
+    def test_parse_test_stream_no_idempotence(self):
+        """
+        Assert idempotence is empty when there's only one [Converge] play
+        """
+        dump = MOLECULE_TEST_DUMP.split("INFO     Running default > idempotence")[0]
+        res = parse_test_stream(dump.splitlines())
+        self.assertEqual(len(res["converge"]["play_recap"]), 2)
+        self.assertEqual(res["idempotence"], {})
+
+    def test_parse_test_stream_no_converge(self):
+        """
+        Assert an exception is raised when there's no converge PLAY RECAP
+        """
+        with self.assertRaises(MoleculeTestParseError):
+            _ = parse_test_stream(["INFO     Running default > create", ""])
+
+    def test_parse_test_profile_tasks(self):
+        """
+        Test parse converge and idempotence timings (profile_tasks callback)
+        """
+        res = parse_test(PROFILED_MOLECULE_TEST_DUMP)
+
+        self.assertEqual(res["converge"]["duration"], 62.123)
+        self.assertEqual(res["idempotence"]["duration"], 14.5)
+        self.assertEqual(
+            res["converge"]["slowest_tasks"][0],
+            {
+                "task": "professormanhattan.snapd : Ensure snapd is installed",
+                "duration": 25.32,
+            },
+        )
+        self.assertEqual(len(res["converge"]["slowest_tasks"]), 3)
+        self.assertEqual(
+            res["converge"]["play_recap"],
+            parse_test(MOLECULE_TEST_DUMP)["converge"]["play_recap"],
+        )
+
+    def test_parse_test_no_profile_tasks(self):
+        """
+        Assert there are no timings when profile_tasks wasn't enabled
+        """
+        res = parse_test(MOLECULE_TEST_DUMP)
+        self.assertNotIn("duration", res["converge"])
+        self.assertNotIn("slowest_tasks", res["idempotence"])
+
+    def test_strip_ansi(self):
+        """
+        Test strip ANSI escape sequences from molecule test lines
+        """
+        lines = ["\x1b[0;33mDebian-10\x1b[0m : \x1b[0;32mok=16\x1b[0m", "plain"]
+        self.assertEqual(list(strip_ansi(lines)), ["Debian-10 : ok=16", "plain"])
@@ -0,0 +1,182 @@
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+import gzip
+import importlib.util
+import lzma
+import pathlib
+import shutil
+from ansibler.molecule_test import read
+from ansibler.molecule_test.parse import parse_test
+from ansibler.molecule_test.read import read_test_file, read_test_file_tail
+from ansibler.exceptions.ansibler import MoleculeTestParseError
+from test.test_molecule.test_parse import (
+    MOLECULE_TEST_DUMP,
+    PROFILED_MOLECULE_TEST_DUMP,
+)
+
+
+def zstd_compress(data: bytes) -> bytes:
+    """
+    Compresses data with whichever zstd module is available
+    """
+    try:
+        from compression import zstd
+
+        return zstd.compress(data)
+    except ImportError:
+        import zstandard
+
+        return zstandard.ZstdCompressor().compress(data)
+
+
+class TestReadMolecule(TestCase):
+    def setUp(self) -> None:
+        """
+        Test case setup
+        """
+        self.results_path = "./test/test_molecule/results/"
+        pathlib.Path(self.results_path).mkdir(parents=True, exist_ok=True)
+
+    def tearDown(self) -> None:
+        """
+        Test case cleanup
+        """
+        shutil.rmtree(self.results_path)
+
+    def write_test_file(self, name: str, content: str) -> str:
+        """
+        Writes a molecule test file to the results dir
+        """
+        test_file = self.results_path + name
+        with open(test_file, "w", newline="") as f:
+            f.write(content)
+        return test_file
+
+    def test_read_test_file(self):
+        """
+        Test read (memory-mapped) test file
+        """
+        test_file = self.write_test_file("2021-08-07-default.txt", MOLECULE_TEST_DUMP)
+        self.assertEqual(read_test_file(test_file), parse_test(MOLECULE_TEST_DUMP))
+
+    def test_read_profiled_test_file(self):
+        """
+        Assert memory-mapped and tail-first reads find profile_tasks timings
+        """
+        dump = PROFILED_MOLECULE_TEST_DUMP.replace("\n", "\r\n")
+        test_file = self.write_test_file("2021-08-07-default.txt", dump)
+        expected = parse_test(PROFILED_MOLECULE_TEST_DUMP)
+
+        self.assertEqual(read_test_file(test_file), expected)
+        self.assertEqual(read_test_file(test_file, tail_first=True), expected)
+
+    def test_read_test_file_crlf(self):
+        """
+        Test read test file with Windows line endings
+        """
+        dump = MOLECULE_TEST_DUMP.replace("\n", "\r\n")
+        test_file = self.write_test_file("2021-08-07-default.txt", dump)
+        self.assertEqual(read_test_file(test_file), parse_test(MOLECULE_TEST_DUMP))
+
+    def test_read_colored_test_file(self):
+        """
+        Test read test file with ANSI colors
+        """
+        dump = (
+            MOLECULE_TEST_DUMP.replace("INFO", "\x1b[34mINFO\x1b[0m")
+            .replace("Debian-10 ", "\x1b[0;33mDebian-10\x1b[0m ")
+            .replace("ok=16", "\x1b[0;32mok=16\x1b[0m")
+        )
+        test_file = self.write_test_file("2021-08-07-default.txt", dump)
+
+        test = read_test_file(test_file, strip_ansi=True)
+        self.assertEqual(test, parse_test(MOLECULE_TEST_DUMP))
+
+    def test_read_gzip_test_file(self):
+        """
+        Test read gzip compressed test file
+        """
+        test_file = self.results_path + "2021-08-07-default.txt.gz"
+        with gzip.open(test_file, "wt") as f:
+            f.write(MOLECULE_TEST_DUMP)
+
+        self.assertEqual(read_test_file(test_file), parse_test(MOLECULE_TEST_DUMP))
+
+    def test_read_xz_test_file(self):
+        """
+        Test read xz compressed test file (tail-first is ignored)
+        """
+        test_file = self.results_path + "2021-08-07-default.txt.xz"
+        with lzma.open(test_file, "wt") as f:
+            f.write(MOLECULE_TEST_DUMP)
+
+        test = read_test_file(test_file, tail_first=True)
+        self.assertEqual(test, parse_test(MOLECULE_TEST_DUMP))
+
+    @skipUnless(
+        importlib.util.find_spec("zstandard") or importlib.util.find_spec("compression"),
+        "no zstd module available",
+    )
+    def test_read_zstd_test_file(self):
+        """
+        Test read zstd compressed test file
+        """
+        test_file = self.results_path + "2021-08-07-default.txt.zst"
+        with open(test_file, "wb") as f:
+            f.write(zstd_compress(MOLECULE_TEST_DUMP.encode()))
+
+        self.assertEqual(read_test_file(test_file), parse_test(MOLECULE_TEST_DUMP))
+
+    def test_read_empty_test_file(self):
+        """
+        Makes sure an exception is raised when the test file is empty
+        """
+        test_file = self.write_test_file("2021-08-07-default.txt", "")
+        with self.assertRaises(MoleculeTestParseError):
+            _ = read_test_file(test_file)
+
+    def test_read_test_file_tail(self):
+        """
+        Test read test file backwards, in small chunks
+        """
+        # Make the converge play output big so it takes several reads
+        dump = MOLECULE_TEST_DUMP.replace(
+            "ok: [Ubuntu-20.04-focal]\n", "ok: [Ubuntu-20.04-focal]\n" * 200, 1
+        )
+        test = read_test_file_tail(dump.encode(), chunk_size=128)
+        self.assertEqual(test, parse_test(dump))
+
+    def test_read_test_file_tail_unexpected_structure(self):
+        """
+        Assert tail-first reading gives up when there's no idempotence play,
+        and read_test_file falls back to the forward scan
+        """
+        dump = MOLECULE_TEST_DUMP.split("INFO     Running default > idempotence")[0]
+        test_file = self.write_test_file("2021-08-07-default.txt", dump)
+
+        self.assertIsNone(read_test_file_tail(dump.encode(), chunk_size=128))
+        self.assertEqual(read_test_file(test_file, tail_first=True), parse_test(dump))
+
+    def test_read_test_file_tail_failed_converge(self):
+        """
+        Assert tail-first reading gives up right after the converge stage when
+        there's no idempotence play, instead of reading the rest backwards
+        """
+        dump = MOLECULE_TEST_DUMP.split("INFO     Running default > idempotence")[0]
+        # Make the create play output big so the file takes several reads
+        dump = dump.replace("changed: [localhost]\n", "changed: [localhost]\n" * 500)
+
+        with patch.object(
+            read, "find_tail_recaps_start", wraps=read.find_tail_recaps_start
+        ) as find_tail_recaps_start:
+            self.assertIsNone(read_test_file_tail(dump.encode(), chunk_size=1024))
+
+        self.assertEqual(find_tail_recaps_start.call_count, 1)
+
+    def test_read_test_file_tail_max_size(self):
+        """
+        Assert tail-first reading stops after max_size bytes
+        """
+        self.assertIsNone(
+            read_test_file_tail(MOLECULE_TEST_DUMP.encode(), chunk_size=64, max_size=64)
+        )
@@ -0,0 +1,91 @@
+import re
+import timeit
+from unittest import TestCase
+from ansibler.molecule_test.parse import (
+    parse_os_name,
+    parse_play_recap_line,
+    parse_recap_value,
+    OK_COUNT_PATTERN,
+    CHANGED_COUNT_PATTERN,
+    UNREACHABLE_COUNT_PATTERN,
+    FAILED_COUNT_PATTERN,
+    SKIPPED_COUNT_PATTERN,
+    RESCUED_COUNT_PATTERN,
+    IGNORED_COUNT_PATTERN,
+    PLAY_RECAP_OS_NAME_PATTERN,
+    PLAY_RECAP_PARALLEL_OS_ID_PATTERN,
+)
+
+
+RECAP_LINES = [
+    f"{os}-{i:08x}-abcd-ef01-2345-6789abcdef01 : ok=16   changed=0    "
+    "unreachable=0    failed=0    skipped=4    rescued=0    ignored=0"
+    for i, os in enumerate(
+        ["Debian-10", "Debian-11", "Ubuntu-20.04-focal", "CentOS-8-stream"] * 50
+    )
+]
+
+
+def legacy_parse_play_recap_line(recap_line):
+    """
+    PLAY RECAP line parser as it was before the single-pass tokenizer: two
+    regexes for the OS plus one per counter.
+    """
+    m = re.search(PLAY_RECAP_OS_NAME_PATTERN, recap_line)
+    host = re.sub(PLAY_RECAP_PARALLEL_OS_ID_PATTERN, "", m.group())
+    os_name, os_version = parse_os_name.__wrapped__(host)
+
+    return {
+        "os_name": os_name,
+        "os_version": os_version,
+        "ok": parse_recap_value(OK_COUNT_PATTERN, recap_line),
+        "changed": parse_recap_value(CHANGED_COUNT_PATTERN, recap_line),
+        "unreachable": parse_recap_value(UNREACHABLE_COUNT_PATTERN, recap_line),
+        "failed": parse_recap_value(FAILED_COUNT_PATTERN, recap_line),
+        "skipped": parse_recap_value(SKIPPED_COUNT_PATTERN, recap_line),
+        "rescued": parse_recap_value(RESCUED_COUNT_PATTERN, recap_line),
+        "ignored": parse_recap_value(IGNORED_COUNT_PATTERN, recap_line),
+    }
+
+
+class TestRecapBenchmark(TestCase):
+    def test_tokenizer_matches_legacy_parser(self):
+        """
+        Assert the single-pass tokenizer returns the same as the legacy parser
+        """
+        for line in RECAP_LINES:
+            self.assertEqual(
+                parse_play_recap_line(line)._asdict(),
+                legacy_parse_play_recap_line(line),
+            )
+
+    def test_tokenizer_missing_counters(self):
+        """
+        Assert counters missing from the line (older Ansible) are set to -1
+        """
+        recap = parse_play_recap_line("Debian-10 : ok=3 changed=1 failed=0")
+        self.assertEqual(recap.ok, 3)
+        self.assertEqual(recap.unreachable, -1)
+        self.assertEqual(recap.ignored, -1)
+
+    def test_tokenizer_speedup(self):
+        """
+        Micro-benchmark: tokenize a 200 host PLAY RECAP with both parsers
+        """
+        legacy = min(
+            timeit.repeat(
+                lambda: [legacy_parse_play_recap_line(l) for l in RECAP_LINES],
+                number=20,
+                repeat=3,
+            )
+        )
+        tokenizer = min(
+            timeit.repeat(
+                lambda: [parse_play_recap_line(l) for l in RECAP_LINES],
+                number=20,
+                repeat=3,
+            )
+        )
+
+        print(f"PLAY RECAP tokenizer speedup: {legacy / tokenizer:.1f}x")
+        self.assertLess(tokenizer, legacy)
@@ -0,0 +1,46 @@
+from unittest import TestCase
+from ansibler.molecule_test.json_callback import parse_json_callback_buffer
+from ansibler.molecule_test.parse import parse_test, parse_test_stream, strip_ansi
+from test.test_molecule.synthetic import generate_molecule_log
+
+
+class TestSyntheticMoleculeLog(TestCase):
+    def test_generate_molecule_log(self):
+        """
+        Assert synthetic logs parse into one recap per host
+        """
+        test = parse_test(generate_molecule_log(host_count=12, task_count=5))
+        converge = test["converge"]["play_recap"]
+        idempotence = test["idempotence"]["play_recap"]
+
+        self.assertEqual(len(converge), 12)
+        self.assertEqual(len(idempotence), 12)
+        self.assertTrue(all(recap.changed == 0 for recap in idempotence))
+
+    def test_generate_parallel_verbose_molecule_log(self):
+        """
+        Assert parallel IDs and verbose task output don't change the recaps
+        """
+        plain = parse_test(generate_molecule_log(seed=1))
+        parallel = parse_test(generate_molecule_log(verbosity=3, parallel=True, seed=1))
+        self.assertEqual(parallel, plain)
+
+    def test_generate_colored_molecule_log(self):
+        """
+        Assert colored logs parse the same once ANSI colors are stripped
+        """
+        plain = parse_test(generate_molecule_log(seed=2))
+        colored = generate_molecule_log(colors=True, seed=2)
+        lines = strip_ansi(colored.splitlines())
+        self.assertEqual(parse_test_stream(lines), plain)
+
+    def test_generate_json_callback_molecule_log(self):
+        """
+        Assert json callback logs parse into the same recaps as text logs
+        """
+        text = parse_test(generate_molecule_log(seed=3))
+        test = parse_json_callback_buffer(
+            generate_molecule_log(callback="json", seed=3).encode()
+        )
+        for play in ("converge", "idempotence"):
+            self.assertEqual(test[play]["play_recap"], text[play]["play_recap"])
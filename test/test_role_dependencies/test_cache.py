@@ -0,0 +1,110 @@
+from unittest import TestCase
+from unittest.mock import patch
+import asyncio
+import json
+import pathlib
+import shutil
+from ansibler.role_dependencies import cache
+from ansibler.role_dependencies.cache import (
+    RoleMetadataLookup,
+    read_roles_metadata_from_cache,
+    write_roles_metadata_cache,
+)
+
+
+class TestRoleMetadataCache(TestCase):
+    def setUp(self) -> None:
+        """
+        Test case setup
+        """
+        self.base_path = "./test/test_role_dependencies/cache/"
+        self.mock_cache_dir = patch.object(cache, "CACHE_MAP_DIR", self.base_path)
+        self.mock_cache_dir.start()
+
+    def tearDown(self) -> None:
+        """
+        Test case cleanup
+        """
+        self.mock_cache_dir.stop()
+        shutil.rmtree(self.base_path, ignore_errors=True)
+
+    def test_read_roles_metadata_cache(self):
+        """
+        Test read the role metadata cache back
+        """
+        self.assertIsNone(read_roles_metadata_from_cache())
+
+        write_roles_metadata_cache({"snapd": {"role_name": "snapd"}})
+        self.assertEqual(
+            read_roles_metadata_from_cache(), {"snapd": {"role_name": "snapd"}}
+        )
+
+    def test_read_unversioned_roles_metadata_cache(self):
+        """
+        Assert caches without a version (which may hold galaxy responses) are
+        rebuilt
+        """
+        pathlib.Path(self.base_path).mkdir(parents=True)
+        pathlib.Path(self.base_path + "role_metadata").write_text(
+            json.dumps({"docker": {"role_name": "docker", "namespace": "geerlingguy"}})
+        )
+
+        self.assertIsNone(read_roles_metadata_from_cache())
+
+
+class TestRoleMetadataLookup(TestCase):
+    def lookup_all(self, lookup, role_names):
+        """
+        Looks roles up concurrently, like the role tasks of a run
+        """
+
+        async def run():
+            return await asyncio.gather(
+                *(lookup.get(role_name) for role_name in role_names)
+            )
+
+        return asyncio.run(run())
+
+    def test_get_cached_role(self):
+        """
+        Test cached roles are returned without rescanning
+        """
+        lookup = RoleMetadataLookup({"snapd": {"role_name": "snapd"}}, ["./roles"])
+
+        with patch.object(cache, "cache_roles_metadata") as rescan:
+            metadata = self.lookup_all(lookup, ["snapd"])
+
+        self.assertEqual(metadata, [{"role_name": "snapd"}])
+        rescan.assert_not_called()
+
+    def test_get_rescans_once(self):
+        """
+        Assert concurrent misses share a single rescan, and roles still missing
+        after it are not looked for again
+        """
+        lookup = RoleMetadataLookup({}, ["./roles"])
+        scanned = {"snapd": {"role_name": "snapd"}}
+
+        with patch.object(
+            cache, "cache_roles_metadata", return_value=scanned
+        ) as rescan:
+            metadata = self.lookup_all(lookup, ["snapd", "go", "go", "snapd", "nginx"])
+            self.assertEqual(self.lookup_all(lookup, ["nginx"]), [{}])
+
+        rescan.assert_called_once()
+        self.assertEqual(
+            metadata, [scanned["snapd"], {}, {}, scanned["snapd"], {}]
+        )
+        self.assertEqual(lookup.cache, scanned)
+        self.assertEqual(lookup.missing, {"go", "nginx"})
+
+    def test_get_without_role_paths(self):
+        """
+        Test misses go straight to galaxy when there are no roles paths
+        """
+        lookup = RoleMetadataLookup({}, [])
+
+        with patch.object(cache, "cache_roles_metadata") as rescan:
+            self.assertEqual(self.lookup_all(lookup, ["snapd"]), [{}])
+
+        rescan.assert_not_called()
@@ -0,0 +1,138 @@
+from unittest import TestCase
+from unittest.mock import patch
+import asyncio
+import json
+import os
+import pathlib
+import shutil
+from ansibler.role_dependencies import cache, dependencies, snapshot
+from ansibler.role_dependencies.dependencies import generate_role_dependency_chart
+
+
+class FakeGalaxyClient:
+    """
+    Galaxy client that records the roles it's asked for
+    """
+
+    requested = []
+
+    def __init__(self, **options):
+        pass
+
+    async def get_role(self, role):
+        self.requested.append(role)
+        namespace, role_name = role.split(".")
+        return {
+            "namespace": namespace,
+            "role_name": role_name,
+            "description": f"Installs {role_name}",
+        }
+
+    def close(self):
+        pass
+
+
+class TestRoleDependencyChart(TestCase):
+    ROLES = {
+        "system/snapd": ["geerlingguy.docker", "professormanhattan.homebrew"],
+        "system/homebrew": ["geerlingguy.docker"],
+        "languages/go": ["geerlingguy.docker", "professormanhattan.snapd"],
+    }
+
+    def setUp(self) -> None:
+        """
+        Test case setup
+        """
+        self.base_path = "./test/test_role_dependencies/chart/"
+        self.roles_path = os.path.abspath(self.base_path + "roles")
+
+        for role, requirements in self.ROLES.items():
+            role_path = pathlib.Path(self.roles_path, role)
+            (role_path / "meta").mkdir(parents=True, exist_ok=True)
+            (role_path / "meta/main.yml").write_text(
+                "galaxy_info:\n"
+                f"  role_name: {role_path.name}\n"
+                "  author: professormanhattan\n"
+                f"  description: Installs {role_path.name}\n"
+            )
+            (role_path / "requirements.yml").write_text(
+                "roles:\n" + "".join(f"  - name: {req}\n" for req in requirements)
+            )
+
+        FakeGalaxyClient.requested = []
+        self.patches = [
+            patch.object(cache, "CACHE_MAP_DIR", self.base_path + "cache/"),
+            patch.object(dependencies, "GalaxyClient", FakeGalaxyClient),
+            patch.object(
+                dependencies,
+                "get_default_roles",
+                return_value=f"roles_path = {self.roles_path}",
+            ),
+            # Run as if in a playbook
+            patch.object(
+                dependencies,
+                "check_file_exists",
+                side_effect=lambda path: path == "./ansible.cfg"
+                or os.path.isfile(path),
+            ),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self) -> None:
+        """
+        Test case cleanup
+        """
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.base_path)
+
+    def read_role_dependencies(self, role):
+        """
+        Returns the role_dependencies chart of a role
+        """
+        with open(os.path.join(self.roles_path, role, "ansibler.json")) as f:
+            return json.load(f)["role_dependencies"]
+
+    def test_generate_role_dependency_chart(self):
+        """
+        Assert each unique dependency is resolved once, and every role's chart
+        is written
+        """
+        asyncio.run(generate_role_dependency_chart(json_file="ansibler.json"))
+
+        self.assertEqual(FakeGalaxyClient.requested, ["geerlingguy.docker"])
+
+        go = self.read_role_dependencies("languages/go")
+        self.assertEqual(len(go), 3)
+        self.assertEqual(go[0], ["Dependency", "Description"])
+        self.assertIn("geerlingguy.docker", go[1][0])
+        self.assertEqual(go[1][1], "Installs docker")
+        self.assertIn("professormanhattan.snapd", go[2][0])
+        self.assertEqual(len(self.read_role_dependencies("system/homebrew")), 2)
+
+        # Galaxy responses expire, they're cached by the galaxy client
+        with open(self.base_path + "cache/role_metadata") as f:
+            self.assertNotIn("docker", json.load(f)["roles"])
+
+    def test_generate_role_dependency_chart_snapshot(self):
+        """
+        Test dependencies in the galaxy snapshot are resolved from it
+        """
+        snapshot_file = self.base_path + "galaxy.ndjson"
+        pathlib.Path(snapshot_file).write_text(
+            json.dumps(
+                {"namespace": "geerlingguy", "name": "docker", "description": "Docker"}
+            )
+        )
+
+        with patch.object(snapshot, "CACHE_MAP_DIR", self.base_path + "cache/"):
+            asyncio.run(
+                generate_role_dependency_chart(
+                    json_file="ansibler.json", galaxy_snapshot=snapshot_file
+                )
+            )
+
+        self.assertEqual(FakeGalaxyClient.requested, [])
+        go = self.read_role_dependencies("languages/go")
+        self.assertEqual(go[1][1], "Docker")
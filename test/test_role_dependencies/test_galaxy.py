@@ -1,6 +1,19 @@
 from unittest import TestCase
 from unittest.mock import patch
-from ansibler.role_dependencies.galaxy import get_from_ansible_galaxy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import asyncio
+import json
+import shutil
+import threading
+import time
+from ansibler.role_dependencies import galaxy
+from ansibler.role_dependencies.galaxy import (
+    GalaxyClient,
+    build_ansible_galaxy_url,
+    get_from_ansible_galaxy,
+    read_galaxy_cache,
+)
 from ansibler.exceptions.ansibler import RoleMetadataError
 
 
@@ -26,3 +39,195 @@ class TestGalaxy(TestCase):
         mock_get_subprocess_output.return_value = ""
         with self.assertRaises(RoleMetadataError):
             _ = get_from_ansible_galaxy("professormanhattan.snapd")
+
+
+class StubGalaxyHandler(BaseHTTPRequestHandler):
+    """
+    Answers like galaxy's repo-or-collection-detail, after server.delay
+    seconds. Roles named "missing" are not found, and responses have an ETag
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+
+        time.sleep(server.delay)
+        name = parse_qs(urlparse(self.path).query)["name"][0]
+        body = json.dumps(
+            {"data": {"repository": {"description": f"Installs {name}"}}}
+        ).encode()
+
+        with server.lock:
+            server.in_flight -= 1
+
+        if self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            body = b""
+        elif name == "missing":
+            self.send_response(404)
+            body = b""
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestGalaxyClient(TestCase):
+    def setUp(self) -> None:
+        """
+        Starts a stub galaxy server
+        """
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubGalaxyHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.connections = set()
+        self.server.requests = 0
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.server.delay = 0.2
+        self.server.etag = '"v1"'
+        self.galaxy_base = f"http://127.0.0.1:{self.server.server_port}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.base_path = "./test/test_role_dependencies/galaxy/"
+        self.mock_cache_dir = patch.object(galaxy, "CACHE_MAP_DIR", self.base_path)
+        self.mock_cache_dir.start()
+
+    def tearDown(self) -> None:
+        """
+        Stops the stub galaxy server
+        """
+        self.mock_cache_dir.stop()
+        shutil.rmtree(self.base_path, ignore_errors=True)
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_roles(self, roles, **options):
+        """
+        Gets roles concurrently with a galaxy client
+
+        Returns:
+            Tuple[List[Dict[str, Any]], float]: roles metadata, and seconds it
+            took to get them
+        """
+
+        async def run():
+            client = GalaxyClient(galaxy_base=self.galaxy_base, **options)
+            try:
+                start = time.perf_counter()
+                results = await asyncio.gather(*(client.get_role(r) for r in roles))
+                return results, time.perf_counter() - start
+            finally:
+                client.close()
+
+        return asyncio.run(run())
+
+    def test_get_roles_concurrently(self):
+        """
+        Assert requests run concurrently, up to the limit, over kept-alive
+        connections
+        """
+        roles = [f"professormanhattan.role{i}" for i in range(16)]
+
+        results, elapsed = self.get_roles(roles, concurrency=8, use_cache=False)
+
+        self.assertEqual(results[3]["description"], "Installs role3")
+        self.assertEqual(results[3]["role_name"], "role3")
+        # 16 requests of 0.2s take 3.2s one at a time, 0.4s 8 at a time
+        self.assertLess(elapsed, 1.6)
+        self.assertEqual(self.server.max_in_flight, 8)
+        self.assertLessEqual(len(self.server.connections), 8)
+
+    def test_get_role_timeout(self):
+        """
+        Test the description is unavailable when galaxy takes too long
+        """
+        self.server.delay = 1
+
+        results, _ = self.get_roles(
+            ["professormanhattan.snapd"], timeout=0.2, use_cache=False
+        )
+
+        self.assertEqual(results[0]["description"], "Description unavailable")
+
+    def test_galaxy_url(self):
+        """
+        Test the default galaxy URL has no stray whitespace
+        """
+        url = build_ansible_galaxy_url("professormanhattan", "snapd")
+        self.assertEqual(
+            url,
+            "https://galaxy.ansible.com/api/internal/ui/repo-or-collection-detail/"
+            "?namespace=professormanhattan&name=snapd&format=json",
+        )
+
+    def test_get_role_cached(self):
+        """
+        Assert cached responses are used until they expire
+        """
+        self.server.delay = 0
+        roles = ["geerlingguy.docker", "professormanhattan.snapd"]
+
+        self.get_roles(roles)
+        results, _ = self.get_roles(roles)
+
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(results[0]["description"], "Installs docker")
+        self.assertEqual(read_galaxy_cache()["geerlingguy.docker"]["etag"], '"v1"')
+
+    def test_get_role_revalidated(self):
+        """
+        Assert expired responses are revalidated with their ETag, and updated
+        when they changed
+        """
+        self.server.delay = 0
+        self.get_roles(["geerlingguy.docker"])
+
+        results, _ = self.get_roles(["geerlingguy.docker"], cache_ttl=0)
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(results[0]["description"], "Installs docker")
+
+        self.server.etag = '"v2"'
+        self.get_roles(["geerlingguy.docker"], cache_ttl=0)
+        self.assertEqual(read_galaxy_cache()["geerlingguy.docker"]["etag"], '"v2"')
+
+    def test_get_role_not_found_cached(self):
+        """
+        Assert roles not found are cached, for a shorter time
+        """
+        self.server.delay = 0
+
+        results, _ = self.get_roles(["professormanhattan.missing"])
+        self.get_roles(["professormanhattan.missing"])
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(results[0]["description"], "Description unavailable")
+        entry = read_galaxy_cache()["professormanhattan.missing"]
+        self.assertIsNone(entry["description"])
+
+        self.get_roles(["professormanhattan.missing"], negative_cache_ttl=0)
+        self.assertEqual(self.server.requests, 2)
+
+    def test_get_role_stale_when_unreachable(self):
+        """
+        Assert expired responses are used when galaxy can't be reached
+        """
+        self.server.delay = 0
+        self.get_roles(["geerlingguy.docker"])
+        self.galaxy_base = "http://127.0.0.1:1/"
+
+        results, _ = self.get_roles(["geerlingguy.docker"], cache_ttl=0)
+
+        self.assertEqual(results[0]["description"], "Installs docker")
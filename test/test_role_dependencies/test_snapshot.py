@@ -0,0 +1,123 @@
+from unittest import TestCase
+from unittest.mock import patch
+import json
+import os
+import pathlib
+import shutil
+import time
+from ansibler.role_dependencies import snapshot
+from ansibler.role_dependencies.snapshot import GalaxySnapshot, read_snapshot_index
+
+
+class TestGalaxySnapshot(TestCase):
+    def setUp(self) -> None:
+        """
+        Test case setup
+        """
+        self.base_path = "./test/test_role_dependencies/snapshot/"
+        self.snapshot_path = self.base_path + "galaxy/"
+        pathlib.Path(self.snapshot_path).mkdir(parents=True, exist_ok=True)
+
+        self.write_snapshot(
+            "roles.ndjson",
+            [
+                {"namespace": "geerlingguy", "name": "docker", "description": "Docker"},
+                "not json",
+                {"namespace": {"name": "ProfessorManhattan"}, "role_name": "snapd"},
+                {"namespace": "geerlingguy", "description": "No name"},
+            ],
+        )
+
+        self.mock_cache_dir = patch.object(
+            snapshot, "CACHE_MAP_DIR", self.base_path + "cache/"
+        )
+        self.mock_cache_dir.start()
+
+    def tearDown(self) -> None:
+        """
+        Test case cleanup
+        """
+        self.mock_cache_dir.stop()
+        shutil.rmtree(self.base_path)
+
+    def write_snapshot(self, name, roles):
+        """
+        Writes an NDJSON snapshot file
+        """
+        lines = [role if isinstance(role, str) else json.dumps(role) for role in roles]
+        pathlib.Path(self.snapshot_path + name).write_text("\n".join(lines) + "\n")
+
+    def test_get_role(self):
+        """
+        Test get roles from a snapshot
+        """
+        galaxy_snapshot = GalaxySnapshot(self.snapshot_path)
+
+        self.assertEqual(len(galaxy_snapshot.index), 2)
+        self.assertEqual(
+            galaxy_snapshot.get_role("geerlingguy.docker"),
+            {
+                "namespace": "geerlingguy",
+                "role_name": "docker",
+                "description": "Docker",
+            },
+        )
+        self.assertEqual(
+            galaxy_snapshot.get_role("professormanhattan.snapd"),
+            {
+                "namespace": "ProfessorManhattan",
+                "role_name": "snapd",
+                "description": "Description unavailable",
+            },
+        )
+        self.assertIsNone(galaxy_snapshot.get_role("geerlingguy.nginx"))
+
+    def test_snapshot_index_cached(self):
+        """
+        Assert snapshot files are only indexed again when they change, and
+        later files win
+        """
+        GalaxySnapshot(self.snapshot_path)
+        self.assertEqual(len(read_snapshot_index()), 1)
+
+        with patch.object(snapshot, "index_snapshot_file") as index_snapshot_file:
+            GalaxySnapshot(self.snapshot_path)
+        index_snapshot_file.assert_not_called()
+
+        self.write_snapshot(
+            "updates.ndjson",
+            [{"namespace": "geerlingguy", "name": "docker", "description": "New"}],
+        )
+        galaxy_snapshot = GalaxySnapshot(self.snapshot_path)
+
+        self.assertEqual(len(read_snapshot_index()), 2)
+        self.assertEqual(
+            galaxy_snapshot.get_role("geerlingguy.docker")["description"], "New"
+        )
+
+    def test_snapshot_scale(self):
+        """
+        Assert tens of thousands of roles load quickly, from the index even
+        more so
+        """
+        roles = [
+            {"namespace": f"ns{i % 500}", "name": f"role{i}", "description": "x" * 200}
+            for i in range(30000)
+        ]
+        self.write_snapshot("roles.ndjson", roles)
+
+        start = time.perf_counter()
+        GalaxySnapshot(self.snapshot_path)
+        indexed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        galaxy_snapshot = GalaxySnapshot(self.snapshot_path)
+        loaded = time.perf_counter() - start
+
+        self.assertEqual(len(galaxy_snapshot.index), 30000)
+        self.assertEqual(
+            galaxy_snapshot.get_role("ns123.role29623")["role_name"], "role29623"
+        )
+        self.assertLess(indexed, 5)
+        self.assertLess(loaded, indexed)
+        self.assertTrue(os.path.isfile(self.base_path + "cache/galaxy_snapshot_index"))
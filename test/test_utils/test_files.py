@@ -1,4 +1,7 @@
 from unittest import TestCase
+import json
+import os
+import stat
 import pathlib
 import shutil
 from ansibler.utils.files import (
@@ -6,6 +9,9 @@ from ansibler.utils.files import (
     copy_file,
     create_folder_if_not_exists,
     list_files,
+    write_file_if_changed,
+    write_json_file_atomic,
+    write_json_file_if_changed,
 )
 
 
@@ -104,3 +110,41 @@ class TestFileUtils(TestCase):
         self.assertEqual(dst_content, "Hello, world!")
 
         shutil.rmtree(self.copy_path)
+
+    def test_write_json_file_atomic(self):
+        """
+        Test write JSON file atomically, keeping its permissions
+        """
+        json_file = self.copy_path + "example.json"
+        write_json_file_atomic(json_file, {"compatibility_matrix": []})
+        os.chmod(json_file, 0o640)
+        write_json_file_atomic(json_file, {"compatibility_matrix": [["✅"]]})
+
+        with open(json_file, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"compatibility_matrix": [["✅"]]})
+
+        self.assertEqual(stat.S_IMODE(os.stat(json_file).st_mode), 0o640)
+        self.assertEqual(os.listdir(self.copy_path), ["example.json"])
+
+        shutil.rmtree(self.copy_path)
+
+    def test_write_file_if_changed(self):
+        """
+        Assert files are only written when their content changes
+        """
+        json_file = self.copy_path + "example.json"
+        self.assertTrue(write_json_file_if_changed(json_file, {"a": ["✅"]}))
+
+        os.utime(json_file, ns=(0, 0))
+        self.assertFalse(write_json_file_if_changed(json_file, {"a": ["✅"]}))
+        self.assertEqual(os.stat(json_file).st_mtime_ns, 0)
+
+        # Same size, different content
+        self.assertTrue(write_json_file_if_changed(json_file, {"a": ["❌"]}))
+        self.assertNotEqual(os.stat(json_file).st_mtime_ns, 0)
+
+        self.assertTrue(write_file_if_changed(json_file, "{}"))
+        with open(json_file) as f:
+            self.assertEqual(f.read(), "{}")
+
+        shutil.rmtree(self.copy_path)
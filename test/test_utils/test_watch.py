@@ -0,0 +1,55 @@
+from unittest import TestCase
+import os
+import pathlib
+import shutil
+from ansibler.utils.watch import watch_files
+
+
+class TestWatch(TestCase):
+    def setUp(self) -> None:
+        """
+        Test case setup
+        """
+        self.watch_path = "./test/test_utils/watch/"
+        pathlib.Path(self.watch_path).mkdir(parents=True, exist_ok=True)
+        pathlib.Path(self.watch_path + "existing.txt").write_text("existing")
+
+    def tearDown(self) -> None:
+        """
+        Test case cleanup
+        """
+        shutil.rmtree(self.watch_path)
+
+    def next_files(self, batches, tries=20):
+        """
+        Returns the next non empty batch of files
+        """
+        for _ in range(tries):
+            files = next(batches)
+            if files:
+                return files
+        return []
+
+    def test_watch_files_inotify(self):
+        """
+        Test watch new files (inotify, or polling when it's not available)
+        """
+        batches = watch_files(self.watch_path, poll_interval=0.05)
+        pathlib.Path(self.watch_path + "new.txt").write_text("new")
+
+        files = self.next_files(batches)
+        self.assertEqual(files, [os.path.abspath(self.watch_path + "new.txt")])
+        batches.close()
+
+    def test_watch_files_polling(self):
+        """
+        Test watch new files by polling the directory
+        """
+        batches = watch_files(self.watch_path, poll_interval=0.01, use_inotify=False)
+        pathlib.Path(self.watch_path + "new.txt").write_text("new")
+
+        files = self.next_files(batches)
+        self.assertEqual(files, [os.path.abspath(self.watch_path + "new.txt")])
+
+        # Unchanged files are only reported once
+        self.assertEqual(next(batches), [])